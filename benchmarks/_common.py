@@ -0,0 +1,102 @@
+"""
+_common.py
+----------
+Utilidades compartidas por los benchmarks: medición de tiempos, percentiles,
+escritura de resultados en JSON y comparación contra un baseline guardado.
+
+Todas las métricas en `results["metrics"]` son tiempos (menor es mejor).
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+
+
+def time_calls(fn: Callable[[], object], repeats: int, warmup: int = 3) -> np.ndarray:
+    """Ejecuta `fn` varias veces y devuelve la duración de cada llamada en ms."""
+    for _ in range(warmup):
+        fn()
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    return times * 1000.0
+
+
+def percentiles(times_ms: np.ndarray, prefix: str) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(times_ms, [50, 95, 99])
+    return {f"{prefix}_p50_ms": float(p50), f"{prefix}_p95_ms": float(p95), f"{prefix}_p99_ms": float(p99)}
+
+
+def add_common_args(parser: argparse.ArgumentParser, name: str) -> None:
+    parser.add_argument("--out", type=str, default=str(BENCH_DIR / "results" / f"{name}.json"))
+    parser.add_argument("--baseline", type=str, default=str(BENCH_DIR / "baselines" / f"{name}.json"))
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="Regresión tolerada respecto del baseline (0.20 = 20% más lento)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Guarda los resultados actuales como nuevo baseline")
+
+
+def compare(metrics: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Devuelve las métricas que empeoraron más que `threshold` respecto del baseline."""
+    regressions = []
+    for key, base in baseline.items():
+        current = metrics.get(key)
+        if current is None or not base or base <= 0:
+            continue
+        if current > base * (1.0 + threshold):
+            regressions.append(f"{key}: {current:.3f} vs baseline {base:.3f} (+{(current / base - 1) * 100:.0f}%)")
+    return regressions
+
+
+def finish(args: argparse.Namespace, name: str, metrics: Dict[str, float], info: Dict[str, object]) -> int:
+    """
+    Escribe los resultados, compara contra el baseline y devuelve el exit code
+    (0 = sin regresiones, 1 = regresión detectada, 2 = no hay baseline).
+    """
+    results = {
+        "benchmark": name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "metrics": metrics,
+        "info": info,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"[bench] resultados en {out}")
+    for key, value in metrics.items():
+        print(f"  {key:<40} {value:10.3f}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+        print(f"[bench] baseline actualizado en {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        # Sin baseline no hay comparación: falla en lugar de pasar en silencio
+        print(f"[bench] ERROR: sin baseline en {baseline_path}; no se comparó contra nada. "
+              f"Usar --update-baseline para crearlo en esta máquina.")
+        return 2
+
+    regressions = compare(metrics, json.loads(baseline_path.read_text(encoding="utf-8")), args.threshold)
+    if regressions:
+        print(f"[bench] REGRESIONES (umbral {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"[bench] sin regresiones respecto de {baseline_path}")
+    return 0
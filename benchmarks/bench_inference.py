@@ -0,0 +1,202 @@
+"""
+bench_inference.py
+------------------
+Benchmark de latencia y throughput de los caminos críticos:
+  - /predict vía TestClient (p50/p95/p99)
+  - MODEL.predict directo con lotes de 1, 16, 256 y 4096 filas
+  - /feedback con índices de feedback de tamaño creciente
+  - evaluate_and_decide sobre logs sintéticos de 10k, 1M y 10M filas
+
+Corre en un directorio temporal (logs/ y artifacts/ propios), usando el
+modelo registrado en el repo o entrenando uno nuevo con --train.
+
+Uso:
+    python benchmarks/bench_inference.py
+    python benchmarks/bench_inference.py --eval_sizes 10000,1000000 --update-baseline
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from _common import REPO_ROOT, add_common_args, finish, percentiles, time_calls
+
+NAME = "inference"
+PAYLOAD = {
+    "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+    "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+    "PTRATIO": 15, "B": 390, "LSTAT": 5.0,
+}
+
+
+def _sizes(text: str):
+    return [int(float(s)) for s in text.split(",") if s.strip()]
+
+
+def prepare_workdir(train: bool) -> Path:
+    """
+    Crea un directorio de trabajo temporal con el modelo activo del repo
+    (o uno recién entrenado) y se mueve a él.
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="mlops_bench_"))
+    version_file = REPO_ROOT / "artifacts" / "version.json"
+    run_dir = None
+    if not train and version_file.exists():
+        run_dir = REPO_ROOT / json.loads(version_file.read_text(encoding="utf-8"))["current"]
+        if not (run_dir / "model.joblib").exists():
+            run_dir = None
+
+    os.chdir(workdir)
+    if run_dir is not None:
+        shutil.copytree(run_dir, workdir / "artifacts" / run_dir.name)
+        (workdir / "artifacts" / "version.json").write_text(
+            json.dumps({"current": f"artifacts/{run_dir.name}"}), encoding="utf-8"
+        )
+    else:
+        from mlops_housing.train import train_and_register
+        train_and_register(str(REPO_ROOT / "data" / "HousingData.csv"), tag="bench")
+    return workdir
+
+
+def bench_api_predict(n_requests: int):
+    from fastapi.testclient import TestClient
+    from mlops_housing.api.app import app
+
+    with TestClient(app) as client:
+        times = time_calls(lambda: client.post("/predict", json=PAYLOAD), n_requests, warmup=20)
+    return percentiles(times, "api_predict")
+
+
+def bench_model_predict(batch_sizes):
+    from mlops_housing.config import FEATURES
+    from mlops_housing.registry import load_current
+
+    model, _ = load_current()
+    data = pd.read_csv(REPO_ROOT / "data" / "HousingData.csv")[FEATURES]
+    metrics, info = {}, {}
+    for b in batch_sizes:
+        X = data.sample(b, replace=True, random_state=0).reset_index(drop=True)
+        repeats = int(min(200, max(5, 2000 // b)))
+        times = time_calls(lambda: model.predict(X), repeats)
+        metrics[f"model_predict_b{b}_ms"] = float(np.median(times))
+        info[f"model_predict_b{b}_rows_per_s"] = float(b / (np.median(times) / 1000.0))
+    return metrics, info
+
+
+def bench_feedback(log_sizes, n_calls: int):
+    from fastapi.testclient import TestClient
+    import mlops_housing.api.app as app_module
+    from mlops_housing.feedback_store import FeedbackStore
+
+    metrics = {}
+    with TestClient(app_module.app) as client:
+        original = app_module.FEEDBACK_STORE
+        for n in log_sizes:
+            store = FeedbackStore(Path("logs") / f"bench_feedback_{n}.db")
+            ids = np.char.add("id", np.arange(n).astype(str))
+            for start in range(0, n, 500_000):
+                chunk = ids[start:start + 500_000]
+                store.add_predictions(zip(chunk.tolist(), ["2025-01-01T00:00:00"] * len(chunk), [20.0] * len(chunk)))
+
+            app_module.FEEDBACK_STORE = store
+            rng = np.random.default_rng(0)
+            targets = iter(rng.integers(0, n, size=n_calls + 3).tolist())
+            times = time_calls(
+                lambda: client.post("/feedback", json={"id": f"id{next(targets)}", "real_price": 21.0}),
+                n_calls,
+            )
+            metrics.update(percentiles(times, f"feedback_n{n}"))
+            app_module.FEEDBACK_STORE = original
+            store.close()
+    return metrics
+
+
+def write_synthetic_log(path: Path, n: int, chunk: int = 1_000_000) -> None:
+    """
+    Log sintético en orden cronológico: la mitad de las filas dentro de la
+    última jornada, 30% con real_price.
+    """
+    from mlops_housing.config import FEATURES, LOG_COLUMNS
+
+    rng = np.random.default_rng(0)
+    now = np.datetime64(pd.Timestamp.utcnow().tz_localize(None).to_datetime64(), "us")
+    span = np.timedelta64(2 * 86_400_000_000, "us")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    for start in range(0, n, chunk):
+        k = min(chunk, n - start)
+        pos = (np.arange(start, start + k) / max(1, n - 1))
+        ts = now - span + (pos * span.astype(np.int64)).astype("timedelta64[us]")
+        real = rng.normal(25, 5, k).round(3)
+        real[rng.random(k) > 0.3] = np.nan
+        df = pd.DataFrame({
+            "id": np.char.add("id", np.arange(start, start + k).astype(str)),
+            "timestamp": np.datetime_as_string(ts, unit="us"),
+            **{f: rng.random(k).round(3) for f in FEATURES},
+            "predicted_price": rng.normal(25, 5, k).round(3),
+            "real_price": real,
+        })[LOG_COLUMNS]
+        df.to_csv(path, mode="a", header=start == 0, index=False)
+
+
+def bench_evaluate(log_sizes):
+    from mlops_housing import evaluate
+    from mlops_housing.config import LOG_PATH
+
+    os.environ["EVAL_MIN_FEEDBACK"] = "1"
+    metrics = {}
+    for n in log_sizes:
+        write_synthetic_log(LOG_PATH, n)
+        for mode in ("full", "streaming"):
+            os.environ["EVAL_STREAMING"] = "1" if mode == "streaming" else "0"
+            start = time.perf_counter()
+            # Solo la decisión: sin gráfico ni MLflow (su I/O no es parte de la medición)
+            evaluate.evaluate_and_decide(plot=False, log_mlflow=False)
+            metrics[f"evaluate_{mode}_n{n}_ms"] = (time.perf_counter() - start) * 1000.0
+    LOG_PATH.unlink()
+    return metrics
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de inferencia, feedback y evaluación")
+    add_common_args(parser, NAME)
+    parser.add_argument("--train", action="store_true", help="Entrenar un modelo nuevo en lugar de usar el registrado")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch_sizes", type=str, default="1,16,256,4096")
+    parser.add_argument("--feedback_sizes", type=str, default="1000,100000,1000000")
+    parser.add_argument("--feedback_calls", type=int, default=200)
+    parser.add_argument("--eval_sizes", type=str, default="10000,1000000,10000000")
+    args = parser.parse_args()
+    args.out = str(Path(args.out).resolve())
+    args.baseline = str(Path(args.baseline).resolve())
+
+    workdir = prepare_workdir(args.train)
+    print(f"[bench] directorio de trabajo: {workdir}")
+    metrics, info = {}, {}
+    try:
+        metrics.update(bench_api_predict(args.requests))
+        m, i = bench_model_predict(_sizes(args.batch_sizes))
+        metrics.update(m)
+        info.update(i)
+        metrics.update(bench_feedback(_sizes(args.feedback_sizes), args.feedback_calls))
+        metrics.update(bench_evaluate(_sizes(args.eval_sizes)))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return finish(args, NAME, metrics, info)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+bench_loader.py
+---------------
+Benchmark de carga de datos (cada medición en un proceso nuevo):
+  - dataset de entrenamiento: pd.read_csv por defecto vs loader tipado
+    (CSV con pyarrow y Parquet), tiempo y memoria pico del proceso
+  - log de predicciones: pd.read_csv completo (ruta anterior de evaluate.py)
+    vs load_frame con las columnas necesarias
+
+Los datos son sintéticos, generados en un directorio temporal a partir de
+data/HousingData.csv.
+
+Uso:
+    python benchmarks/bench_loader.py
+    python benchmarks/bench_loader.py --rows 5000000 --update-baseline
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from _common import REPO_ROOT, add_common_args, finish
+
+NAME = "loader"
+LOG_EVAL_COLUMNS = ["id", "timestamp", "predicted_price", "real_price"]
+
+# Cada snippet imprime {"seconds", "peak_mb"} en la última línea
+# (VmHWM se reinicia con exec; ru_maxrss hereda el pico del proceso padre en Linux)
+SNIPPET = """
+import json, resource, time
+t = time.perf_counter()
+{load}
+seconds = time.perf_counter() - t
+try:
+    hwm = next(l for l in open("/proc/self/status") if l.startswith("VmHWM:"))
+    peak_mb = int(hwm.split()[1]) / 1024
+except (OSError, StopIteration):
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"seconds": seconds, "peak_mb": peak_mb}}))
+"""
+LOADERS = {
+    "train_read_csv": "import pandas as pd; df = pd.read_csv({path!r})",
+    "train_typed_csv": "from mlops_housing.loader import load_training_data; df = load_training_data({path!r})",
+    "train_typed_parquet": "from mlops_housing.loader import load_training_data; df = load_training_data({path!r})",
+    "log_read_csv": "import pandas as pd; df = pd.read_csv({path!r})",
+    "log_typed_csv": (
+        "from mlops_housing.loader import load_frame; "
+        f"df = load_frame({{path!r}}, {LOG_EVAL_COLUMNS!r})"
+    ),
+}
+
+
+def prepare_data(workdir: Path, rows: int) -> dict:
+    """Dataset de entrenamiento (CSV y Parquet) y log de predicciones sintéticos."""
+    from mlops_housing.config import FEATURES, LOG_COLUMNS
+
+    base = pd.read_csv(REPO_ROOT / "data" / "HousingData.csv")
+    df = base.sample(rows, replace=True, random_state=0).reset_index(drop=True)
+    paths = {"train_csv": workdir / "train.csv", "train_parquet": workdir / "train.parquet", "log": workdir / "log.csv"}
+    df.to_csv(paths["train_csv"], index=False)
+    df.to_parquet(paths["train_parquet"], index=False)
+
+    rng = np.random.default_rng(0)
+    now = pd.Timestamp.utcnow().tz_localize(None)
+    log = df[FEATURES].copy()
+    log.insert(0, "timestamp", (now - pd.to_timedelta(np.linspace(7, 0, rows), unit="D")).strftime("%Y-%m-%dT%H:%M:%S.%f"))
+    log.insert(0, "id", [str(uuid.UUID(int=int(i), version=4)) for i in rng.integers(0, 2**63, rows)])
+    log["predicted_price"] = rng.normal(22, 8, rows).round(3)
+    log["real_price"] = np.where(rng.random(rows) < 0.3, rng.normal(22, 8, rows).round(1), np.nan)
+    log[LOG_COLUMNS].to_csv(paths["log"], index=False)
+    return paths
+
+
+def measure(load: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(load=load.format(path=str(path)))],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del loader tipado vs pd.read_csv")
+    add_common_args(parser, NAME)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="mlops_loader_"))
+    print(f"[bench] generando {args.rows:,} filas en {workdir}")
+    metrics, info = {}, {"rows": args.rows}
+    try:
+        paths = prepare_data(workdir, args.rows)
+        info.update({f"{k}_mb": p.stat().st_size / 1e6 for k, p in paths.items()})
+        inputs = {
+            "train_read_csv": paths["train_csv"],
+            "train_typed_csv": paths["train_csv"],
+            "train_typed_parquet": paths["train_parquet"],
+            "log_read_csv": paths["log"],
+            "log_typed_csv": paths["log"],
+        }
+        for name, load in LOADERS.items():
+            runs = [measure(load, inputs[name]) for _ in range(args.repeats)]
+            metrics[f"{name}_ms"] = float(np.median([r["seconds"] for r in runs])) * 1000.0
+            info[f"{name}_peak_mb"] = float(np.median([r["peak_mb"] for r in runs]))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for key, value in info.items():
+        if key.endswith("_peak_mb"):
+            print(f"  {key:<40} {value:10.1f}")
+    return finish(args, NAME, metrics, info)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
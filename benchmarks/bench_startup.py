@@ -0,0 +1,122 @@
+"""
+bench_startup.py
+----------------
+Benchmark de arranque en frío (cada medición en un proceso nuevo):
+  - tiempo de importar mlops_housing.api.app, evaluate y train
+  - tiempo desde lanzar uvicorn hasta el primer /predict exitoso,
+    con el artefacto joblib y con el formato "slim"
+
+Corre en un directorio temporal con un modelo recién entrenado (con la
+variante slim).
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeats 10 --update-baseline
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+from _common import REPO_ROOT, add_common_args, finish
+
+NAME = "startup"
+PAYLOAD = {
+    "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+    "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+    "PTRATIO": 15, "B": 390, "LSTAT": 5.0,
+}
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def prepare_workdir() -> Path:
+    """Directorio temporal con un modelo registrado en los formatos joblib y slim."""
+    workdir = Path(tempfile.mkdtemp(prefix="mlops_startup_"))
+    os.chdir(workdir)
+    from mlops_housing.train import train_and_register
+    train_and_register(str(REPO_ROOT / "data" / "HousingData.csv"), tag="bench_startup", formats=["slim"])
+    return workdir
+
+
+def import_ms(module: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1]) * 1000.0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_predict_ms(model_format: str, timeout: float = 60.0) -> float:
+    """Lanza uvicorn y mide hasta la primera respuesta 200 de /predict."""
+    port = _free_port()
+    env = {**os.environ, "MODEL_FORMAT": model_format}
+    body = json.dumps(PAYLOAD).encode()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mlops_housing.api.app:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/predict", data=body, headers={"Content-Type": "application/json"}
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=1.0) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - start) * 1000.0
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"/predict no respondió en {timeout:.0f}s (MODEL_FORMAT={model_format})")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío de la API")
+    add_common_args(parser, NAME)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    args.out = str(Path(args.out).resolve())
+    args.baseline = str(Path(args.baseline).resolve())
+
+    workdir = prepare_workdir()
+    print(f"[bench] directorio de trabajo: {workdir}")
+    metrics, info = {}, {}
+    try:
+        for module in ("mlops_housing.api.app", "mlops_housing.evaluate", "mlops_housing.train"):
+            key = module.rsplit(".", 1)[-1]
+            metrics[f"import_{key}_ms"] = float(np.median([import_ms(module) for _ in range(args.repeats)]))
+        for model_format in ("joblib", "slim"):
+            times = [first_predict_ms(model_format) for _ in range(args.repeats)]
+            metrics[f"first_predict_{model_format}_ms"] = float(np.median(times))
+            info[f"first_predict_{model_format}_max_ms"] = float(np.max(times))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return finish(args, NAME, metrics, info)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,33 +7,221 @@ Carga automáticamente el modelo activo desde artifacts/version.json.
 
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, status, Response
+from fastapi import APIRouter, FastAPI, HTTPException, Request, status, Response
+from fastapi.concurrency import run_in_threadpool
 from loguru import logger
-import pandas as pd
-import json
-from pathlib import Path
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+import numpy as np
+import os
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+import threading
 import time
 from datetime import datetime
+from pathlib import Path
 import uuid
+from typing import Optional
 
-from .schemas import PredictRequest, PredictResponse, FeedbackRequest
-from mlops_housing.registry import load_current  # Carga el modelo entrenado
-from mlops_housing.config import FEATURES
+from .schemas import (
+    PredictRequest, PredictResponse, FeedbackRequest,
+    BatchPredictRequest, BatchPredictResponse,
+)
+from .batching import MicroBatcher
+from .cache import PredictionCache, cache_key
+from .instrumentation import (
+    RequestTimer, StageTimer, sample_stacks, profile_event_loop,
+    try_acquire_profiler, release_profiler,
+)
+from .model_manager import ServedModel, VersionWatcher
+from .shadow import ShadowScorer
+from mlops_housing.registry import ARTIFACTS_DIR, get_run, read_pointer, load_run  # Carga el modelo entrenado
+from mlops_housing.config import (
+    FEATURES, LOG_PATH, LOG_COLUMNS, FEEDBACK_DB_PATH, PARQUET_LOG_DIR, DRIFT_STATE_DIR,
+    env_int, env_float, env_flag,
+)
+from mlops_housing.bulk_feedback import FeedbackIngest, FeedbackParser, LineSplitter, detect_format
+from mlops_housing.drift import DriftMonitor, load_reference
+from mlops_housing.feedback_store import FeedbackStore
+from mlops_housing.logsink import CsvLogSink, LogWriter, TeeSink
 
 
-# Variable global del modelo
+# Variable global del modelo (ServedModel: modelo + versión, se reemplaza atómicamente)
 MODEL = None
 MODEL_LOADED = False
+_RELOAD_LOCK = threading.Lock()
+WATCHER = None
+
+# Monitor de drift de la versión activa (None si el run no tiene referencia)
+DRIFT = None
+_DRIFT_RUNNING = False
+
+# Modelo candidato puntuado en segundo plano (None = sin shadow/canary)
+SHADOW = None
+_SHADOW_LOCK = threading.Lock()
 
 # Métricas Prometheus
 PRED_COUNTER = Counter("pred_requests_total", "Total de requests a /predict")
 PRED_LATENCY = Histogram("pred_latency_seconds", "Latencia de /predict en segundos")
+MODEL_INFO = Gauge("model_active_info", "Versión (run) del modelo activo", ["run_id"])
+MODEL_RELOADS = Counter("model_reloads_total", "Recargas en caliente del modelo", ["result"])
+BATCH_COUNTER = Counter("pred_batch_requests_total", "Total de requests a /predict/batch")
+BATCH_LATENCY = Histogram("pred_batch_latency_seconds", "Latencia de /predict/batch en segundos")
+BATCH_SIZE = Histogram(
+    "pred_batch_size",
+    "Número de filas por request a /predict/batch",
+    buckets=(1, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+FEEDBACK_BULK_ROWS = Counter("feedback_bulk_rows_total", "Filas recibidas por /feedback/bulk", ["result"])
+DRIFT_PSI = Gauge("feature_drift_psi", "PSI de cada feature contra la referencia del modelo activo", ["feature"])
+DRIFT_KS = Gauge("feature_drift_ks", "KS (por bins) de cada feature contra la referencia del modelo activo", ["feature"])
 
-# Logs
-LOG_PATH = Path("logs") / "predictions.csv"
+# Logs: las filas se encolan y un hilo dedicado las escribe en lotes,
+# tanto en el log (CSV o Parquet por día) como en el índice de feedback (SQLite)
+LOG_BACKEND = os.getenv("LOG_BACKEND", "csv")
 LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+FEEDBACK_STORE = FeedbackStore(FEEDBACK_DB_PATH)
+
+
+def _log_writer(sink) -> LogWriter:
+    return LogWriter(
+        sink,
+        max_rows=env_int("LOG_FLUSH_MAX_ROWS", 256),
+        flush_interval=env_float("LOG_FLUSH_INTERVAL_SECONDS", 1.0),
+    )
+
+
+if LOG_BACKEND == "parquet":
+    from mlops_housing.parquet_log import ParquetLogSink, PREDICTIONS, FEEDBACK  # pyarrow solo en este backend
+
+    LOG_WRITER = _log_writer(TeeSink(ParquetLogSink(PARQUET_LOG_DIR, PREDICTIONS), FEEDBACK_STORE))
+    FEEDBACK_WRITER = _log_writer(ParquetLogSink(PARQUET_LOG_DIR, FEEDBACK))
+else:
+    LOG_WRITER = _log_writer(TeeSink(CsvLogSink(LOG_PATH, LOG_COLUMNS), FEEDBACK_STORE))
+    FEEDBACK_WRITER = None
+
+
+def _swap_drift(served: ServedModel) -> None:
+    """Reinicia el monitoreo de drift con la referencia de la nueva versión."""
+    global DRIFT
+    reference = load_reference(served.run_dir) if env_flag("DRIFT_ENABLED", True) else None
+    old, DRIFT = DRIFT, (DriftMonitor(reference, served.run_id) if reference is not None else None)
+    if old is not None:
+        old.stop()  # Borra el estado de la versión anterior
+    if DRIFT is not None and _DRIFT_RUNNING:
+        DRIFT.start(DRIFT_STATE_DIR, env_float("DRIFT_PERSIST_INTERVAL_SECONDS", 30.0))
+
+
+def _load_served(run_dir: Path) -> ServedModel:
+    """Carga y valida una versión con la configuración de la API."""
+    mmap_mode = "r" if env_flag("MODEL_MMAP") else None
+    engine = os.getenv("MODEL_ENGINE", "sklearn")
+    fmt = os.getenv("MODEL_FORMAT", "auto")
+    served = ServedModel(load_run(run_dir, mmap_mode=mmap_mode, fmt=fmt), run_dir, engine=engine)
+    served.warm_up()
+    return served
+
+
+def reload_model(force: bool = False) -> bool:
+    """
+    Carga la versión apuntada por version.json, la valida con una predicción
+    de prueba y la activa reemplazando MODEL. Si la carga o el warm-up fallan,
+    se mantiene el modelo anterior.
+
+    Returns:
+        True si se activó una nueva versión.
+    """
+    global MODEL, MODEL_LOADED
+    with _RELOAD_LOCK:
+        run_dir = read_pointer()
+        if not force and MODEL is not None and MODEL.run_dir == run_dir:
+            return False
+
+        try:
+            served = _load_served(run_dir)
+        except Exception:
+            MODEL_RELOADS.labels("error").inc()
+            raise
+
+        MODEL = served
+        MODEL_LOADED = True
+        _swap_drift(served)
+        MODEL_INFO.clear()
+        MODEL_INFO.labels(served.run_id).set(1)
+        MODEL_RELOADS.labels("ok").inc()
+        logger.info(f"Modelo activo: {served.run_id} ({run_dir}), motor: {served.engine}")
+        return True
+
+
+def set_shadow(run: str = "", fraction: float = 1.0):
+    """
+    Carga (o reemplaza) el modelo candidato. `run` es el run_id de un run
+    registrado en el índice; vacío deshabilita el shadow.
+    """
+    global SHADOW
+    with _SHADOW_LOCK:
+        scorer = None
+        if run:
+            # Solo runs del índice dentro de artifacts/: el artefacto se deserializa
+            # con joblib, así que nunca se carga una ruta arbitraria del request
+            try:
+                get_run(run)
+            except KeyError:
+                raise FileNotFoundError(f"No existe el run {run}")
+            run_dir = ARTIFACTS_DIR / run
+            if run_dir.resolve().parent != ARTIFACTS_DIR.resolve() or not run_dir.is_dir():
+                raise FileNotFoundError(f"No existe el run {run}")
+            scorer = ShadowScorer(
+                _load_served(run_dir),
+                FEEDBACK_STORE.add_shadow,
+                fraction=fraction,
+                max_pending=env_int("SHADOW_MAX_PENDING", 10_000),
+                max_rows=env_int("SHADOW_MAX_ROWS", 256),
+            )
+        old, SHADOW = SHADOW, None
+        if old is not None:
+            old.stop()  # Puntúa lo que quedó encolado para la versión anterior
+        if scorer is not None:
+            scorer.start()
+            logger.info(f"Modelo candidato: {scorer.run_id} (fracción {scorer.fraction:g})")
+        SHADOW = scorer
+        return scorer
+
+
+def _predict_active(X: np.ndarray) -> np.ndarray:
+    """Predice con el modelo activo al momento de ejecutar el lote."""
+    return MODEL.predict_matrix(X)
+
+
+# Micro-batching de /predict (opcional): agrupa requests concurrentes en un solo predict
+BATCHER = (
+    MicroBatcher(
+        _predict_active,
+        max_rows=env_int("MICROBATCH_MAX_ROWS", 64),
+        max_wait_ms=env_float("MICROBATCH_MAX_WAIT_MS", 2.0),
+    )
+    if env_flag("MICROBATCH_ENABLED")
+    else None
+)
+
 
+# Cache de predicciones de /predict (opcional), invalidado al cambiar el modelo
+PRED_CACHE = (
+    PredictionCache(
+        n_features=len(FEATURES),
+        max_entries=env_int("PREDICT_CACHE_MAX_ENTRIES", 10_000),
+        max_bytes=env_int("PREDICT_CACHE_MAX_MB", 16) * 1024 * 1024,
+        ttl_seconds=env_float("PREDICT_CACHE_TTL_SECONDS", 300.0),
+    )
+    if env_flag("PREDICT_CACHE_ENABLED")
+    else None
+)
+
+
+# Precarga al importar: con `gunicorn --preload` el modelo se carga una sola vez
+# en el proceso master y los workers comparten sus páginas copy-on-write.
+if env_flag("MODEL_PRELOAD"):
+    try:
+        reload_model(force=True)
+    except Exception as e:
+        logger.error(f"Error al precargar el modelo: {str(e)}")
 
 
 @asynccontextmanager
@@ -42,19 +230,58 @@ async def lifespan(app: FastAPI):
     Gestiona los eventos de arranque y parada de la API.
     Carga el modelo al iniciar.
     """
-    global MODEL, MODEL_LOADED
+    global MODEL_LOADED, WATCHER, _DRIFT_RUNNING
     logger.info("Iniciando API...")
     try:
-        MODEL, run_dir = load_current()
-        MODEL_LOADED = True
-        logger.info(f"Modelo cargado desde: {run_dir}")
+        # No recarga si el modelo ya fue precargado (MODEL_PRELOAD) y sigue vigente
+        reload_model()
     except Exception as e:
-        MODEL_LOADED = False
+        MODEL_LOADED = MODEL is not None
         logger.error(f"Error al cargar el modelo: {str(e)}")
+
+    # Recarga en caliente al cambiar version.json (0 = deshabilitado)
+    reload_interval = env_float("MODEL_RELOAD_INTERVAL_SECONDS", 0.0)
+    if reload_interval > 0:
+        WATCHER = VersionWatcher(reload_interval, reload_model)
+        WATCHER.start()
+    try:
+        n = FEEDBACK_STORE.backfill_from_log(LOG_PATH)
+        if n:
+            logger.info(f"Índice de feedback inicializado con {n} predicciones del log")
+    except Exception as e:
+        logger.error(f"Error al indexar el log de predicciones: {str(e)}")
+    # Modelo candidato (shadow / canary), cargado en cada worker
+    if os.getenv("SHADOW_RUN"):
+        try:
+            set_shadow(os.getenv("SHADOW_RUN"), env_float("SHADOW_FRACTION", 1.0))
+        except Exception as e:
+            logger.error(f"Error al cargar el modelo candidato: {str(e)}")
+    LOG_WRITER.start()
+    if FEEDBACK_WRITER is not None:
+        FEEDBACK_WRITER.start()
+    if BATCHER is not None:
+        await BATCHER.start()
+    # La persistencia del drift arranca en cada worker (después del fork)
+    _DRIFT_RUNNING = True
+    if DRIFT is not None:
+        DRIFT.start(DRIFT_STATE_DIR, env_float("DRIFT_PERSIST_INTERVAL_SECONDS", 30.0))
     
     yield  # La API está lista para recibir peticiones
 
     logger.info("Apagando API...")
+    if BATCHER is not None:
+        await BATCHER.stop()  # Responde las filas ya encoladas
+    if WATCHER is not None:
+        WATCHER.stop()
+        WATCHER = None
+    _DRIFT_RUNNING = False
+    if DRIFT is not None:
+        DRIFT.stop()
+    set_shadow("")  # Puntúa lo pendiente antes de cerrar el índice
+    LOG_WRITER.close()  # Vacía las filas pendientes antes de salir
+    if FEEDBACK_WRITER is not None:
+        FEEDBACK_WRITER.close()
+    FEEDBACK_STORE.close()
     
 
 # Crear instancia de FastAPI y registrar el manejador de eventos lifespan
@@ -64,6 +291,18 @@ app = FastAPI(
     description="API para predecir precios de viviendas entrenada con RandomForest y registrada con MLflow.",
     lifespan=lifespan # Se registra manejador de eventos
 )
+app.add_middleware(RequestTimer)  # Marca la llegada de cada request (etapa de validación)
+
+PROFILE_MAX_SECONDS = env_float("PROFILE_MAX_SECONDS", 60.0)
+
+# Endpoints de operación (recarga, shadow, profiling): solo se montan con ADMIN_ENABLED=1
+admin = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _stage_timer(handler: str, request: Request, served=None) -> StageTimer:
+    """Cronómetro por etapas que arranca cuando llegó la request."""
+    version = served.run_id if served is not None else "none"
+    return StageTimer(handler, version, start=getattr(request.state, "received_at", None))
 
 
 @app.get("/healthz")
@@ -76,60 +315,167 @@ def health():
 
 @app.get("/version")
 def version():
-    try:
-        _, run_dir = load_current()
-        metrics_path = Path(run_dir) / "metrics.json"
-        metrics = {}
-        if metrics_path.exists():
-            metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
-        return {"run_dir": str(run_dir), "metrics": metrics}
-    except Exception as e:
-        logger.error(f"Error leyendo versión/metrics: {e}")
+    """
+    Versión y métricas del modelo activo, servidas desde memoria
+    (se actualizan solo cuando se recarga el modelo).
+    """
+    served = MODEL
+    if served is None:
         raise HTTPException(status_code=500, detail="No se pudo leer versión actual")
+    shadow = SHADOW
+    return {
+        "run_dir": str(served.run_dir),
+        "run_id": served.run_id,
+        "metrics": served.metrics,
+        "shadow": {"run_id": shadow.run_id, "fraction": shadow.fraction} if shadow is not None else None,
+    }
 
 @app.get("/metrics")
 def metrics():
+    drift = DRIFT
+    DRIFT_PSI.clear()
+    DRIFT_KS.clear()
+    if drift is not None:
+        for feature, score in drift.scores().items():
+            DRIFT_PSI.labels(feature).set(score["psi"])
+            DRIFT_KS.labels(feature).set(score["ks"])
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
+@admin.post("/reload")
+def admin_reload(force: bool = False):
+    """
+    Recarga el modelo si cambió version.json (o siempre, con force=true)
+    sin cortar las requests en curso.
+    """
+    try:
+        changed = reload_model(force=force)
+    except Exception as e:
+        logger.error(f"Error recargando el modelo: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="No se pudo recargar el modelo; se mantiene la versión anterior."
+        )
+    return {"reloaded": changed, "run_id": MODEL.run_id}
+
+
+@admin.post("/shadow")
+def admin_shadow(run_id: str, fraction: float = 1.0):
+    """
+    Puntúa en segundo plano con el candidato `run_id` una fracción del
+    tráfico (1.0 = shadow completo); las respuestas siguen saliendo del
+    modelo activo.
+    """
+    if not 0 < fraction <= 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="fraction debe estar entre 0 y 1.")
+    try:
+        scorer = set_shadow(run_id, fraction)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Run {run_id} no encontrado.")
+    except Exception as e:
+        logger.error(f"Error cargando el modelo candidato {run_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="No se pudo cargar el modelo candidato.",
+        )
+    return {"run_id": scorer.run_id, "fraction": scorer.fraction}
+
+
+@admin.delete("/shadow")
+def admin_shadow_stop():
+    """Deja de puntuar con el modelo candidato."""
+    set_shadow("")
+    return {"shadow": None}
+
+
+@admin.post("/profile")
+async def admin_profile(seconds: float = 5.0, mode: str = "sample", top: int = 30):
+    """
+    Perfila la API en caliente durante `seconds` segundos:
+      - mode=sample: muestreo de stacks de todos los hilos (incluye el threadpool)
+      - mode=cprofile: cProfile del hilo del event loop
+    """
+    if mode not in ("sample", "cprofile"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="mode debe ser 'sample' o 'cprofile'.")
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds debe estar entre 0 y {PROFILE_MAX_SECONDS:g}.",
+        )
+    if not try_acquire_profiler():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya hay una sesión de profiling en curso.")
+
+    try:
+        if mode == "sample":
+            result = await run_in_threadpool(sample_stacks, seconds, 0.005, top)
+        else:
+            result = await profile_event_loop(seconds, top)
+    finally:
+        release_profiler()
+    return {"mode": mode, "seconds": seconds, **result}
+
+
+if env_flag("ADMIN_ENABLED"):
+    app.include_router(admin)
+
+
 @app.post("/predict", response_model=PredictResponse)
-def predict(payload: PredictRequest) -> PredictResponse:
+async def predict(payload: PredictRequest, request: Request) -> PredictResponse:
     if not MODEL_LOADED:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Modelo no disponible. Entrene un modelo antes de predecir."
         )
 
+    served = MODEL  # Versión fija durante toda la request
+    timer = _stage_timer("predict", request, served)
+    timer.mark("validation")
     start_time = time.time()  
     try:
         PRED_COUNTER.inc()  
 
         # Extraer valores en el orden correcto
         feature_values = [getattr(payload, feature) for feature in FEATURES]
-        X_input = pd.DataFrame([feature_values], columns=FEATURES)
-
-        # Hacer predicción
-        pred = MODEL.predict(X_input)[0]
-        pred_float = round(float(pred), 3)
+        X_input = np.array([feature_values], dtype=float)
+        timer.mark("features")
+
+        # Viviendas repetidas se sirven desde el cache sin pasar por el bosque
+        key = cache_key(feature_values) if PRED_CACHE is not None else None
+        pred_float = PRED_CACHE.get(key, served.run_id) if key is not None else None
+
+        # Hacer predicción (agrupada con otras requests si hay micro-batching)
+        if pred_float is None:
+            if BATCHER is not None:
+                pred = await BATCHER.submit(feature_values)
+            else:
+                pred = (await run_in_threadpool(served.predict_matrix, X_input))[0]
+            pred_float = round(float(pred), 3)
+            if key is not None:
+                PRED_CACHE.put(key, pred_float, served.run_id)
+        timer.mark("inference")
+        if DRIFT is not None:
+            DRIFT.update(feature_values, pred_float)
+            timer.mark("drift")
 
         # Generar ID
         prediction_id = str(uuid.uuid4())
-
-        # Loggear predicción
-        row = {
-            "id": prediction_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            # --- CAMBIO 2: Reemplazar .dict() por .model_dump() ---
-            **payload.model_dump(),
-            "predicted_price": pred_float,
-            "real_price": None
-        }
-
-        df_log = pd.DataFrame([row])
-        if LOG_PATH.exists():
-            df_log.to_csv(LOG_PATH, mode="a", header=False, index=False)
-        else:
-            df_log.to_csv(LOG_PATH, index=False)
+        timer.mark("id")
+
+        # El candidato puntúa en segundo plano con el mismo ID
+        shadow = SHADOW
+        if shadow is not None:
+            shadow.offer([prediction_id], X_input)
+            timer.mark("shadow")
+
+        # Loggear predicción (en el orden de LOG_COLUMNS, sin bloquear la request)
+        LOG_WRITER.write([
+            prediction_id,
+            datetime.utcnow().isoformat(),
+            *feature_values,
+            pred_float,
+            None,
+        ])
+        timer.mark("log")
 
         # Devolver resultado
         return PredictResponse(
@@ -147,25 +493,165 @@ def predict(payload: PredictRequest) -> PredictResponse:
          PRED_LATENCY.observe(time.time() - start_time)  
 
 
-@app.post("/feedback")
-def feedback(payload: FeedbackRequest):
+@app.post("/predict/batch", response_model=BatchPredictResponse)
+def predict_batch(payload: BatchPredictRequest, request: Request) -> BatchPredictResponse:
+    """
+    Predice un lote de viviendas con una única llamada a MODEL.predict.
+    Acepta filas (`rows`) o un payload columnar (`columns`) y escribe
+    todas las predicciones en el log con un único append.
+    """
+    if not MODEL_LOADED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Modelo no disponible. Entrene un modelo antes de predecir."
+        )
+
+    served = MODEL  # Versión fija durante toda la request
+    timer = _stage_timer("predict_batch", request, served)
+    timer.mark("validation")
+    start_time = time.time()
     try:
-        df = pd.read_csv(LOG_PATH)
+        BATCH_COUNTER.inc()
 
-        if payload.id not in df["id"].values:
+        # Matriz (n_filas, n_features) en el orden de FEATURES
+        if payload.rows is not None:
+            X = np.array(
+                [[getattr(r, feature) for feature in FEATURES] for r in payload.rows],
+                dtype=float,
+            )
+        else:
+            X = np.column_stack([np.asarray(payload.columns[f], dtype=float) for f in FEATURES])
+        BATCH_SIZE.observe(len(X))
+        timer.mark("features")
+
+        # Una sola predicción vectorizada para todo el lote
+        preds = np.round(served.predict_matrix(X).astype(float), 3)
+        timer.mark("inference")
+        if DRIFT is not None:
+            DRIFT.update_many(X, preds)
+            timer.mark("drift")
+
+        prediction_ids = [str(uuid.uuid4()) for _ in range(len(X))]
+        timer.mark("id")
+        shadow = SHADOW
+        if shadow is not None:
+            shadow.offer(prediction_ids, X)
+            timer.mark("shadow")
+
+        # Loggear todo el lote como una sola entrada de la cola
+        timestamp = datetime.utcnow().isoformat()
+        chas_idx = FEATURES.index("CHAS")
+        rows = []
+        for pid, values, p in zip(prediction_ids, X.tolist(), preds.tolist()):
+            values[chas_idx] = int(values[chas_idx])
+            rows.append([pid, timestamp, *values, p, None])
+        LOG_WRITER.write_many(rows)
+        timer.mark("log")
+
+        return BatchPredictResponse(
+            predictions=[
+                PredictResponse(id=pid, predicted_price=float(p))
+                for pid, p in zip(prediction_ids, preds)
+            ]
+        )
+
+    except Exception as e:
+        logger.error(f"Error en la predicción por lote: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Hubo un error procesando la solicitud."
+        )
+    finally:
+        BATCH_LATENCY.observe(time.time() - start_time)
+
+
+@app.post("/feedback")
+def feedback(payload: FeedbackRequest, request: Request):
+    timer = _stage_timer("feedback", request, MODEL)
+    timer.mark("validation")
+    try:
+        found = FEEDBACK_STORE.set_feedback(payload.id, payload.real_price)
+        timer.mark("store")
+        if not found:
+            # La predicción puede seguir encolada: se fuerza la escritura y se reintenta
+            LOG_WRITER.flush()
+            found = FEEDBACK_STORE.set_feedback(payload.id, payload.real_price)
+            timer.mark("flush_retry")
+
+        if not found:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="ID no encontrado en el registro de predicciones."
             )
 
-        df.loc[df["id"] == payload.id, "real_price"] = payload.real_price
-        df.to_csv(LOG_PATH, index=False)
+        # En el backend Parquet el feedback también se journaliza por día
+        if FEEDBACK_WRITER is not None:
+            FEEDBACK_WRITER.write([payload.id, datetime.utcnow().isoformat(), payload.real_price])
+            timer.mark("journal")
 
         return {"message": "Valor real actualizado correctamente"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al procesar feedback: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="No se pudo actualizar el valor real."
-        )
\ No newline at end of file
+        )
+
+
+def _journal_feedback(pairs) -> None:
+    """En el backend Parquet el feedback también se journaliza por día."""
+    if FEEDBACK_WRITER is not None:
+        timestamp = datetime.utcnow().isoformat()
+        FEEDBACK_WRITER.write_many([[pid, timestamp, price] for pid, price in pairs])
+
+
+def _apply_feedback(ingest: FeedbackIngest, pairs, final: bool = False) -> None:
+    for pair in pairs:
+        ingest.add(pair)  # Aplica un lote al índice cada `batch_size` pares
+    if final:
+        ingest.flush()
+
+
+@app.post("/feedback/bulk")
+async def feedback_bulk(request: Request, format: Optional[str] = None, batch_size: int = 10_000):
+    """
+    Registra feedback masivo desde un stream JSONL/NDJSON o CSV de pares
+    (id, real_price). El body se procesa por bloques a medida que llega y se
+    aplica al índice en lotes de `batch_size`, con memoria acotada.
+    """
+    if not 1 <= batch_size <= 100_000:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="batch_size debe estar entre 1 y 100000.")
+    try:
+        parser = FeedbackParser(format or detect_format(content_type=request.headers.get("content-type", "")))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    ingest = FeedbackIngest(FEEDBACK_STORE, batch_size, on_matched=_journal_feedback)
+
+    # Las predicciones todavía encoladas también deben poder recibir feedback
+    await run_in_threadpool(LOG_WRITER.flush)
+    # Memoria acotada: una línea de más de FEEDBACK_BULK_MAX_LINE bytes se descarta como inválida
+    splitter = LineSplitter(env_int("FEEDBACK_BULK_MAX_LINE", 4096))
+    try:
+        async for chunk in request.stream():
+            pairs = [p for p in map(parser.parse, splitter.feed(chunk)) if p is not None]
+            if pairs:
+                await run_in_threadpool(_apply_feedback, ingest, pairs)
+        tail = [p for p in map(parser.parse, splitter.close()) if p is not None]
+        await run_in_threadpool(_apply_feedback, ingest, tail, True)
+    except ValueError as e:  # Header CSV inválido
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al procesar feedback masivo: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="No se pudo registrar el feedback.",
+        )
+
+    parser.invalid += splitter.too_long
+    summary = ingest.summary(parser)
+    for result in ("matched", "unmatched", "invalid"):
+        FEEDBACK_BULK_ROWS.labels(result).inc(summary[result])
+    return summary
@@ -0,0 +1,112 @@
+"""
+batching.py
+-----------
+Micro-batching de requests concurrentes a /predict.
+Cada request encola su fila y espera un future; una tarea asyncio agrupa
+las filas que llegan dentro de una ventana corta (o hasta N filas), ejecuta
+una sola predicción vectorizada en el threadpool y resuelve cada future con
+su propio resultado.
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from prometheus_client import Gauge, Histogram
+
+QUEUE_DEPTH = Gauge("microbatch_queue_depth", "Filas esperando en la cola de micro-batching")
+BATCH_ROWS = Histogram(
+    "microbatch_size",
+    "Filas por lote ejecutado por el micro-batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+
+class MicroBatcher:
+    """
+    Args:
+        predict_fn: Función (matriz n_filas x n_features) -> array de predicciones
+        max_rows: Tamaño máximo de lote
+        max_wait_ms: Tiempo máximo que la primera fila de un lote espera compañía
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray], max_rows: int = 64, max_wait_ms: float = 2.0):
+        self.predict_fn = predict_fn
+        self.max_rows = max(1, max_rows)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="micro-batcher")
+
+    async def stop(self) -> None:
+        """Procesa las filas pendientes y detiene la tarea."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, features: Sequence[float]) -> float:
+        """Encola una fila y espera su predicción."""
+        if self._queue is None:
+            raise RuntimeError("El micro-batcher no está iniciado.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        QUEUE_DEPTH.inc()
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch: List[Tuple[Sequence[float], asyncio.Future]] = [item]
+
+            # Junta filas hasta llenar el lote o agotar la ventana de espera
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_rows:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            QUEUE_DEPTH.dec(len(batch))
+            BATCH_ROWS.observe(len(batch))
+            X = np.array([features for features, _ in batch], dtype=float)
+            try:
+                preds = await loop.run_in_executor(None, self.predict_fn, X)
+            except Exception as e:
+                logger.error(f"Error en lote de {len(batch)} filas: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), pred in zip(batch, preds):
+                if not future.done():
+                    future.set_result(float(pred))
+
+        # Filas que llegaron después de la señal de parada
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                _, future = item
+                QUEUE_DEPTH.dec()
+                future.set_exception(RuntimeError("El micro-batcher se detuvo."))
@@ -0,0 +1,103 @@
+"""
+cache.py
+--------
+Cache de predicciones para /predict.
+El tráfico repite muchas viviendas idénticas: el resultado se guarda con clave
+en el vector de features (en el orden de FEATURES), con expiración por TTL,
+desalojo LRU acotado por cantidad de entradas y por memoria, e invalidación
+completa cuando cambia la versión del modelo activo.
+"""
+
+from __future__ import annotations
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge
+
+CACHE_HITS = Counter("pred_cache_hits_total", "Predicciones servidas desde el cache")
+CACHE_MISSES = Counter("pred_cache_misses_total", "Predicciones no encontradas en el cache")
+CACHE_EVICTIONS = Counter("pred_cache_evictions_total", "Entradas desalojadas del cache", ["reason"])
+CACHE_ENTRIES = Gauge("pred_cache_entries", "Entradas actualmente en el cache")
+
+
+def cache_key(values: Sequence[float]) -> Tuple[float, ...]:
+    """
+    Clave canónica del vector de features: tupla de floats, de modo que
+    0 y 0.0 (o CHAS entero) caen en la misma entrada.
+    """
+    return tuple(float(v) for v in values)
+
+
+def _entry_bytes(n_features: int) -> int:
+    """Estimación del tamaño de una entrada (clave, valor y nodo del OrderedDict)."""
+    key = tuple(float(i) + 0.5 for i in range(n_features))
+    per_entry = sys.getsizeof(key) + sum(sys.getsizeof(v) for v in key)
+    per_entry += sys.getsizeof((0.0, 0.0)) + 2 * sys.getsizeof(0.0)  # (predicción, expiración)
+    return per_entry + 100  # enlaces del OrderedDict y slot de la tabla hash
+
+
+class PredictionCache:
+    """
+    Args:
+        n_features: Largo del vector de features (para estimar memoria)
+        max_entries: Máximo de entradas
+        max_bytes: Memoria máxima aproximada
+        ttl_seconds: Vida de cada entrada (0 = sin expiración)
+    """
+
+    def __init__(self, n_features: int, max_entries: int = 10_000, max_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: float = 300.0):
+        self.entry_bytes = _entry_bytes(n_features)
+        self.capacity = max(1, min(max_entries, max_bytes // self.entry_bytes))
+        self.ttl = max(0.0, ttl_seconds)
+        self._data: "OrderedDict[Tuple[float, ...], Tuple[float, float]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _check_version(self, version: str) -> None:
+        # Con un modelo nuevo todas las predicciones guardadas quedan obsoletas
+        if version != self._version:
+            if self._data:
+                CACHE_EVICTIONS.labels("invalidation").inc(len(self._data))
+                self._data.clear()
+                CACHE_ENTRIES.set(0)
+            self._version = version
+
+    def get(self, key: Tuple[float, ...], version: str) -> Optional[float]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                CACHE_MISSES.inc()
+                return None
+            value, expires_at = entry
+            if self.ttl and time.monotonic() >= expires_at:
+                del self._data[key]
+                CACHE_EVICTIONS.labels("ttl").inc()
+                CACHE_ENTRIES.set(len(self._data))
+                CACHE_MISSES.inc()
+                return None
+            self._data.move_to_end(key)
+            CACHE_HITS.inc()
+            return value
+
+    def put(self, key: Tuple[float, ...], value: float, version: str) -> None:
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.labels("capacity").inc()
+            CACHE_ENTRIES.set(len(self._data))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            CACHE_ENTRIES.set(0)
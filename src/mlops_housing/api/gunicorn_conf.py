@@ -0,0 +1,28 @@
+"""
+gunicorn_conf.py
+----------------
+Configuración de gunicorn para servir la API con varios workers uvicorn.
+Con MODEL_PRELOAD=1 (default aquí) la app se importa en el master, que carga
+el modelo una sola vez; los workers heredan sus páginas copy-on-write.
+
+Uso:
+    gunicorn -c python:mlops_housing.api.gunicorn_conf mlops_housing.api.app:app
+"""
+
+import gc
+import os
+
+# El flag debe existir antes de que gunicorn importe la app en el master
+os.environ.setdefault("MODEL_PRELOAD", "1")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ["MODEL_PRELOAD"] == "1"
+
+
+def pre_fork(server, worker):
+    # Mueve los objetos ya creados (modelo incluido) a la generación permanente
+    # del GC, para que las recolecciones en los workers no toquen sus páginas
+    # y se mantengan compartidas.
+    gc.freeze()
@@ -0,0 +1,123 @@
+"""
+instrumentation.py
+------------------
+Instrumentación del hot path de la API:
+  - Histogramas Prometheus por etapa de cada handler (etiquetados con la
+    versión del modelo), para saber en qué se va la latencia.
+  - Profiler bajo demanda, activable en runtime desde /admin/profile:
+    muestreo de stacks de todos los hilos o cProfile del event loop.
+"""
+
+from __future__ import annotations
+import asyncio
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Histogram
+
+STAGE_LATENCY = Histogram(
+    "api_stage_latency_seconds",
+    "Latencia por etapa de los handlers de la API",
+    ["handler", "stage", "model_version"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+class RequestTimer:
+    """
+    Middleware ASGI mínimo: guarda en `request.state.received_at` el instante
+    en que llegó la request, para medir la etapa de parseo/validación del body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+class StageTimer:
+    """
+    Cronómetro por etapas: cada `mark(stage)` observa el tiempo transcurrido
+    desde la marca anterior en STAGE_LATENCY.
+    """
+
+    def __init__(self, handler: str, model_version: str, start: Optional[float] = None):
+        self.handler = handler
+        self.model_version = model_version
+        self._last = start if start is not None else time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        STAGE_LATENCY.labels(self.handler, stage, self.model_version).observe(now - self._last)
+        self._last = now
+
+
+# Profiler bajo demanda
+_PROFILE_LOCK = threading.Lock()
+
+
+def _frame_key(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, top: int = 30) -> Dict[str, Any]:
+    """
+    Muestrea los stacks de todos los hilos (excepto el propio) cada `interval`
+    segundos y devuelve los stacks colapsados más frecuentes.
+    """
+    me = threading.get_ident()
+    stacks: Counter = Counter()
+    n_samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            parts: List[str] = []
+            while frame is not None:
+                parts.append(_frame_key(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(parts))] += 1
+        n_samples += 1
+        time.sleep(interval)
+
+    return {
+        "samples": n_samples,
+        "stacks": [{"stack": stack, "count": count} for stack, count in stacks.most_common(top)],
+    }
+
+
+async def profile_event_loop(seconds: float, top: int = 30) -> Dict[str, Any]:
+    """
+    Activa cProfile en el hilo del event loop durante `seconds` segundos
+    (handlers async, validación y serialización; no el threadpool).
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    return {"stats": out.getvalue()}
+
+
+def try_acquire_profiler() -> bool:
+    """Solo una sesión de profiling a la vez."""
+    return _PROFILE_LOCK.acquire(blocking=False)
+
+
+def release_profiler() -> None:
+    _PROFILE_LOCK.release()
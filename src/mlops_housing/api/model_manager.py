@@ -0,0 +1,136 @@
+"""
+model_manager.py
+----------------
+Gestión del modelo servido por la API: versión activa, warm-up y recarga
+en caliente cuando cambia artifacts/version.json.
+El modelo activo se reemplaza con una sola asignación, por lo que las
+requests en curso terminan con la versión que tomaron al empezar.
+"""
+
+from __future__ import annotations
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+from mlops_housing.compiled import CompiledForest
+from mlops_housing.config import FEATURES
+from mlops_housing.registry import VERSION_FILE
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class ServedModel:
+    """
+    Modelo cargado junto a la versión (run) de la que proviene y sus
+    métricas, leídas una sola vez al cargar.
+    Con engine="compiled" la inferencia usa CompiledForest; si el pipeline
+    no es compatible se mantiene el motor de sklearn. Un artefacto "slim"
+    (CompiledForest) siempre se sirve con el motor compilado.
+    """
+
+    def __init__(self, model: Any, run_dir: Path, engine: str = "sklearn"):
+        self.model = model
+        self.run_dir = Path(run_dir)
+        self.run_id = self.run_dir.name
+        self.metrics = self._read_metrics()
+        self.compiled: Optional[CompiledForest] = None
+        if isinstance(model, CompiledForest):
+            self.compiled = model  # Artefacto en formato "slim": ya es el motor compilado
+        elif engine == "compiled":
+            try:
+                self.compiled = CompiledForest.from_pipeline(model)
+            except Exception as e:
+                logger.warning(f"No se pudo compilar el modelo {self.run_id}, se usa sklearn: {e}")
+
+    @property
+    def engine(self) -> str:
+        return "compiled" if self.compiled is not None else "sklearn"
+
+    def _read_metrics(self) -> Dict[str, Any]:
+        metrics_path = self.run_dir / "metrics.json"
+        if not metrics_path.exists():
+            return {}
+        return json.loads(metrics_path.read_text(encoding="utf-8"))
+
+    def predict(self, X: pd.DataFrame):
+        return self.model.predict(X)
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predice desde una matriz (n_filas, n_features) en el orden de FEATURES.
+        El motor compilado evita construir el DataFrame.
+        """
+        if self.compiled is not None:
+            return self.compiled.predict(X)
+        import pandas as pd  # Ya cargado al deserializar un pipeline de sklearn
+        return self.model.predict(pd.DataFrame(X, columns=FEATURES))
+
+    def warm_up(self) -> None:
+        """
+        Ejecuta una predicción de prueba para validar el artefacto y
+        dejar inicializadas las estructuras internas antes del swap.
+        """
+        X = np.zeros((1, len(FEATURES)))
+        if isinstance(self.model, CompiledForest):
+            pred = self.model.predict(X)  # Artefacto "slim": sin pandas ni sklearn
+        else:
+            import pandas as pd
+            pred = self.predict(pd.DataFrame(X, columns=FEATURES))
+        if len(pred) != 1:
+            raise RuntimeError(f"Warm-up inválido para {self.run_id}: {pred!r}")
+        if self.compiled is not None and self.compiled is not self.model:
+            fast = self.compiled.predict(X)
+            if not np.allclose(fast, pred, rtol=1e-9, atol=0):
+                logger.warning(f"El motor compilado difiere de sklearn en {self.run_id}, se usa sklearn")
+                self.compiled = None
+
+
+class VersionWatcher:
+    """
+    Hilo que revisa periódicamente 'version.json' y llama a `on_change`
+    cuando cambia su contenido o su fecha de modificación.
+    """
+
+    def __init__(self, interval: float, on_change: Callable[[], Any], path: Path = VERSION_FILE):
+        self.interval = interval
+        self.on_change = on_change
+        self.path = Path(path)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last = self._signature()
+
+    def _signature(self):
+        try:
+            st = self.path.stat()
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="version-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            signature = self._signature()
+            if signature is None or signature == self._last:
+                continue
+            try:
+                self.on_change()
+                self._last = signature  # Si la recarga falla se reintenta en el próximo ciclo
+            except Exception as e:
+                logger.error(f"Error recargando el modelo: {e}")
@@ -5,8 +5,10 @@ Define los esquemas de entrada y salida para la API de predicción.
 Usa Pydantic para validar y tipar los datos de entrada.
 """
 
-from pydantic import BaseModel, Field
-from typing import Literal
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Literal, Optional
+
+from mlops_housing.config import FEATURES
 
 class PredictRequest(BaseModel):
     """
@@ -41,3 +43,41 @@ class FeedbackRequest(BaseModel):
     id: str = Field(..., description="ID de la predicción generada por /predict.")
     real_price: float = Field(..., description="Valor real observado para la predicción.")
 
+
+class BatchPredictRequest(BaseModel):
+    """
+    Esquema para la solicitud de predicción en lote.
+    Acepta una lista de filas (`rows`) o un payload columnar (`columns`),
+    pero no ambos a la vez.
+    """
+    rows: Optional[List[PredictRequest]] = Field(None, description="Lista de viviendas con las 13 características.")
+    columns: Optional[Dict[str, List[float]]] = Field(None, description="Payload columnar: cada feature mapea a una lista de valores.")
+
+    @model_validator(mode="after")
+    def _check_payload(self) -> "BatchPredictRequest":
+        if (self.rows is None) == (self.columns is None):
+            raise ValueError("Debe enviarse exactamente uno de 'rows' o 'columns'.")
+
+        if self.rows is not None:
+            if not self.rows:
+                raise ValueError("'rows' no puede estar vacío.")
+            return self
+
+        missing = [f for f in FEATURES if f not in self.columns]
+        if missing:
+            raise ValueError(f"Faltan columnas en el payload: {missing}")
+        lengths = {len(self.columns[f]) for f in FEATURES}
+        if len(lengths) != 1:
+            raise ValueError("Todas las columnas deben tener la misma longitud.")
+        if lengths == {0}:
+            raise ValueError("'columns' no puede estar vacío.")
+        if any(v not in (0, 1) for v in self.columns["CHAS"]):
+            raise ValueError("CHAS solo admite los valores 0 o 1.")
+        return self
+
+
+class BatchPredictResponse(BaseModel):
+    """
+    Esquema para la respuesta de predicción en lote (una entrada por fila, en el mismo orden).
+    """
+    predictions: List[PredictResponse] = Field(..., description="Predicciones con su ID único, en el orden recibido.")
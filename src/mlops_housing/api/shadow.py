@@ -0,0 +1,147 @@
+"""
+shadow.py
+---------
+Modelo candidato servido en sombra (shadow / canary).
+Una fracción configurable del tráfico (todo, en modo shadow) se encola para
+que un hilo dedicado la puntúe en lotes con el candidato, fuera del camino de
+la request: la respuesta siempre sale del modelo activo. Las predicciones del
+candidato se guardan con el mismo ID que la del modelo activo, de modo que
+evaluate.py compara ambos contra el mismo feedback antes de promover.
+"""
+
+from __future__ import annotations
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+
+SHADOW_ROWS = Counter("shadow_rows_total", "Filas enviadas al modelo candidato", ["result"])
+SHADOW_INFO = Gauge("model_shadow_info", "Versión (run) del modelo candidato", ["run_id"])
+SHADOW_BATCH_LATENCY = Histogram("shadow_batch_seconds", "Latencia de cada lote puntuado por el candidato")
+SHADOW_QUEUE = Gauge("shadow_queue_rows", "Filas esperando al modelo candidato")
+
+
+class ShadowScorer:
+    """
+    Cola acotada + hilo que puntúa con el candidato y guarda los resultados.
+    Si la cola está llena las filas se descartan (nunca se bloquea la request).
+
+    Args:
+        served: ServedModel del candidato
+        sink: Función que recibe tuplas (id, run_id, predicted_price)
+        fraction: Fracción de las requests que se puntúan (1.0 = shadow completo)
+        max_pending: Filas máximas en espera
+        max_rows: Filas máximas por lote de predicción
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        served: Any,
+        sink: Callable[[List[Sequence[Any]]], None],
+        fraction: float = 1.0,
+        max_pending: int = 10_000,
+        max_rows: int = 256,
+    ):
+        self.served = served
+        self.sink = sink
+        self.fraction = min(max(fraction, 0.0), 1.0)
+        self.max_pending = max(1, max_pending)
+        self.max_rows = max(1, max_rows)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def run_id(self) -> str:
+        return self.served.run_id
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+        SHADOW_INFO.clear()
+        SHADOW_INFO.labels(self.run_id).set(1)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Puntúa lo pendiente y detiene el hilo."""
+        thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(self._STOP)
+            thread.join(timeout)
+        SHADOW_INFO.clear()
+
+    def offer(self, ids: Sequence[str], X: np.ndarray) -> bool:
+        """
+        Encola las filas de una request si cae en la fracción muestreada.
+
+        Returns:
+            True si las filas quedaron encoladas.
+        """
+        if self.fraction < 1.0 and random.random() >= self.fraction:
+            return False
+        n = len(ids)
+        with self._pending_lock:
+            if self._pending + n > self.max_pending:
+                SHADOW_ROWS.labels("dropped").inc(n)
+                return False
+            self._pending += n
+        self._queue.put((list(ids), X))
+        SHADOW_QUEUE.inc(n)
+        return True
+
+    def _score(self, items: List[Any]) -> None:
+        ids = [i for batch_ids, _ in items for i in batch_ids]
+        X = np.vstack([x for _, x in items])
+        start = time.perf_counter()
+        try:
+            preds = np.round(self.served.predict_matrix(X).astype(float), 3)
+            self.sink([(pid, self.run_id, p) for pid, p in zip(ids, preds.tolist())])
+            SHADOW_ROWS.labels("scored").inc(len(ids))
+        except Exception as e:
+            SHADOW_ROWS.labels("error").inc(len(ids))
+            logger.error(f"Error puntuando {len(ids)} filas con el candidato {self.run_id}: {e}")
+        finally:
+            SHADOW_BATCH_LATENCY.observe(time.perf_counter() - start)
+            with self._pending_lock:
+                self._pending -= len(ids)
+            SHADOW_QUEUE.dec(len(ids))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            items, rows, stop = [], 0, item is self._STOP
+            # Se agrupa todo lo encolado (hasta max_rows) en una sola predicción
+            while not stop:
+                items.append(item)
+                rows += len(item[0])
+                if rows >= self.max_rows:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                stop = item is self._STOP
+            if items:
+                self._score(items)
+            if stop:
+                break
+        # Al detenerse se puntúa lo que haya quedado encolado
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                rest.append(item)
+        if rest:
+            self._score(rest)
@@ -0,0 +1,242 @@
+"""
+bulk_feedback.py
+----------------
+Ingesta masiva de feedback: pares (id, real_price) en JSONL/NDJSON
+(`{"id": ..., "real_price": ...}` por línea) o CSV con header.
+El stream se procesa línea a línea en lotes de tamaño fijo, cada uno aplicado
+en una transacción corta contra el índice SQLite (join por clave primaria con
+la tabla de predicciones), así que la memoria no depende del tamaño del
+archivo y la API puede seguir escribiendo predicciones entre lotes.
+
+Uso:
+    python -m mlops_housing.bulk_feedback --input precios_reales.jsonl
+    python -m mlops_housing.bulk_feedback --input precios_reales.csv --batch-size 20000
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import FEEDBACK_DB_PATH, PARQUET_LOG_DIR
+from .feedback_store import FeedbackStore
+
+FORMATS = ("jsonl", "ndjson", "csv")
+MAX_LINE_BYTES = 4096  # Un par (id, real_price) ocupa ~60 bytes
+Pair = Tuple[str, float]
+
+
+def detect_format(name: str = "", content_type: str = "") -> str:
+    """Formato a partir de la extensión del archivo o del Content-Type."""
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    return "jsonl"
+
+
+class FeedbackParser:
+    """
+    Convierte líneas en pares (id, real_price). Las líneas inválidas se
+    cuentan y se descartan; en CSV la primera línea no vacía es el header.
+    """
+
+    def __init__(self, fmt: str = "jsonl"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt} (opciones: {', '.join(FORMATS)})")
+        self.fmt = fmt
+        self.columns: Optional[List[str]] = None
+        self.invalid = 0
+
+    def parse(self, line: str) -> Optional[Pair]:
+        line = line.strip()
+        if not line:
+            return None
+        if self.fmt == "csv" and self.columns is None:
+            header = next(csv.reader([line]))
+            if "id" not in header or "real_price" not in header:
+                raise ValueError("El CSV debe tener header con las columnas id y real_price.")
+            self.columns = header
+            return None
+        try:
+            if self.fmt == "csv":
+                record: Dict[str, Any] = dict(zip(self.columns, next(csv.reader([line]))))
+            else:
+                record = json.loads(line)
+            pid, price = record["id"], float(record["real_price"])
+        except (ValueError, KeyError, TypeError):
+            self.invalid += 1
+            return None
+        if not isinstance(pid, str) or not pid or not math.isfinite(price):
+            self.invalid += 1
+            return None
+        return pid, price
+
+
+class LineSplitter:
+    """
+    Corta un stream de bytes en líneas sin acumular más de `max_line` bytes:
+    una línea más larga se descarta (hasta el próximo salto de línea) y se
+    cuenta en `too_long`, así la memoria no depende del body recibido.
+    """
+
+    def __init__(self, max_line: int = MAX_LINE_BYTES):
+        self.max_line = max_line
+        self.too_long = 0
+        self._buffer = b""
+        self._skipping = False
+
+    def feed(self, chunk: bytes) -> List[str]:
+        *lines, rest = (self._buffer + chunk).split(b"\n")
+        if self._skipping and lines:
+            lines, self._skipping = lines[1:], False  # Fin de la línea descartada
+        if self._skipping:
+            rest = b""
+        elif len(rest) > self.max_line:
+            self.too_long += 1
+            rest, self._skipping = b"", True
+        self._buffer = rest
+        out = []
+        for line in lines:
+            if len(line) > self.max_line:
+                self.too_long += 1
+            else:
+                out.append(line.decode("utf-8", "replace"))
+        return out
+
+    def close(self) -> List[str]:
+        rest, self._buffer = self._buffer, b""
+        return [rest.decode("utf-8", "replace")] if rest else []
+
+
+def iter_lines(f, max_line: int = MAX_LINE_BYTES, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Líneas de un archivo binario, por bloques y con largo máximo (ver LineSplitter)."""
+    splitter = LineSplitter(max_line)
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+    if splitter.too_long:
+        print(f"[feedback] {splitter.too_long} líneas descartadas por superar {max_line} bytes")
+
+
+class FeedbackIngest:
+    """
+    Acumula pares y los aplica al índice en lotes de `batch_size`.
+    `on_matched` recibe los pares aplicados de cada lote (e.g. para
+    journalizarlos en el log Parquet).
+    """
+
+    def __init__(
+        self,
+        store: FeedbackStore,
+        batch_size: int = 10_000,
+        on_matched: Optional[Callable[[List[Pair]], None]] = None,
+    ):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.on_matched = on_matched
+        self.received = 0
+        self.matched = 0
+        self.unmatched = 0
+        self._batch: Dict[str, float] = {}
+
+    def add(self, pair: Pair) -> None:
+        self.received += 1
+        self._batch[pair[0]] = pair[1]  # Un ID repetido en el lote: gana el último
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = list(self._batch.items()), {}
+        matched = self.store.set_feedback_many(batch)
+        self.matched += len(matched)
+        self.unmatched += len(batch) - len(matched)
+        if matched and self.on_matched is not None:
+            self.on_matched(matched)
+
+    def summary(self, parser: FeedbackParser) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "matched": self.matched,
+            "unmatched": self.unmatched,
+            "invalid": parser.invalid,
+        }
+
+
+def journal_sink(backend: str) -> Optional[Callable[[List[Pair]], None]]:
+    """En el backend Parquet el feedback también se journaliza por día (como /feedback)."""
+    if backend != "parquet":
+        return None
+    from .parquet_log import ParquetLogSink, FEEDBACK
+
+    sink = ParquetLogSink(PARQUET_LOG_DIR, FEEDBACK)
+
+    def _journal(pairs: List[Pair]) -> None:
+        timestamp = datetime.utcnow().isoformat()
+        sink.write([[pid, timestamp, price] for pid, price in pairs])
+
+    return _journal
+
+
+def ingest_lines(
+    lines: Iterable[str],
+    store: FeedbackStore,
+    fmt: str = "jsonl",
+    batch_size: int = 10_000,
+    on_matched: Optional[Callable[[List[Pair]], None]] = None,
+    progress: bool = False,
+) -> Dict[str, int]:
+    """
+    Aplica un stream de líneas al índice de feedback.
+
+    Returns:
+        Conteos {"received", "matched", "unmatched", "invalid"}.
+    """
+    parser = FeedbackParser(fmt)
+    ingest = FeedbackIngest(store, batch_size, on_matched)
+    start = time.perf_counter()
+    for line in lines:
+        pair = parser.parse(line)
+        if pair is None:
+            continue
+        ingest.add(pair)
+        if progress and ingest.received % (batch_size * 10) == 0:
+            rate = ingest.received / (time.perf_counter() - start)
+            print(f"[feedback] {ingest.received:,} pares | {rate:,.0f} pares/s", flush=True)
+    ingest.flush()
+    return ingest.summary(parser)
+
+
+def cli() -> int:
+    parser = argparse.ArgumentParser(description="Carga masiva de feedback (id, real_price) en el índice")
+    parser.add_argument("--input", type=str, default="-", help="JSONL/NDJSON o CSV ('-' = stdin)")
+    parser.add_argument("--format", type=str, default=None, choices=FORMATS,
+                        help="Default: según la extensión (.csv = csv, otro = jsonl)")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.input)
+    store = FeedbackStore(FEEDBACK_DB_PATH)
+    start = time.perf_counter()
+    f = sys.stdin.buffer if args.input == "-" else open(Path(args.input), "rb")
+    try:
+        summary = ingest_lines(
+            iter_lines(f), store, fmt, args.batch_size, journal_sink(os.getenv("LOG_BACKEND", "csv")), progress=True,
+        )
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+        store.close()
+    print(f"[feedback] {json.dumps(summary)} en {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(cli())
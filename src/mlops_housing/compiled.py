@@ -0,0 +1,170 @@
+"""
+compiled.py
+-----------
+Motor de inferencia "compilado" para el pipeline de build_pipeline().
+A partir del pipeline ya entrenado extrae las medianas del imputador y
+aplana los árboles del RandomForest en arrays NumPy contiguos, de modo que
+la predicción de una fila (o de un lote pequeño) es un recorrido vectorizado
+de todos los árboles a la vez, sin la validación de DataFrames del
+ColumnTransformer ni el loop paralelo de joblib.
+
+Reproduce la aritmética de sklearn: imputación en float64, comparación de
+features en float32 contra umbrales float64 y suma de árboles en el mismo orden.
+"""
+
+from __future__ import annotations
+from typing import Any, List
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Bosque aplanado: los nodos de todos los árboles viven en los mismos arrays,
+    y los nodos hoja apuntan a sí mismos para que el recorrido avance un número
+    fijo de pasos (la profundidad máxima) sin enmascarar filas.
+    """
+
+    def __init__(
+        self,
+        features: List[str],
+        medians: np.ndarray,
+        roots: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        value: np.ndarray,
+        depth: int,
+    ):
+        self.features = list(features)
+        self.medians = medians
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.depth = depth
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any) -> "CompiledForest":
+        """
+        Construye el motor desde un pipeline entrenado con build_pipeline().
+
+        Raises:
+            ValueError si el pipeline no tiene la estructura esperada
+        """
+        # sklearn solo se importa al compilar: servir un artefacto "slim" no lo necesita
+        from sklearn.compose import ColumnTransformer
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.impute import SimpleImputer
+
+        preprocessor = pipeline.named_steps["preprocessor"]
+        model = pipeline.named_steps["model"]
+        if not isinstance(preprocessor, ColumnTransformer) or not isinstance(model, RandomForestRegressor):
+            raise ValueError("Se esperaba ColumnTransformer + RandomForestRegressor.")
+
+        fitted = [t for t in preprocessor.transformers_ if t[1] != "drop"]
+        if len(fitted) != 1 or not isinstance(fitted[0][1], SimpleImputer):
+            raise ValueError("Se esperaba un único SimpleImputer en el preprocesador.")
+        _, imputer, features = fitted[0]
+        medians = np.asarray(imputer.statistics_, dtype=np.float64)
+        if imputer.strategy != "median" or np.isnan(medians).any():
+            # Con features vacías en el entrenamiento el imputador descarta columnas
+            raise ValueError("El imputador no tiene medianas válidas para todas las features.")
+        if model.n_outputs_ != 1:
+            raise ValueError("Solo se soportan modelos de una salida.")
+
+        roots, lefts, rights, feats, thresholds, values = [], [], [], [], [], []
+        depth = 0
+        offset = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            node_ids = np.arange(offset, offset + n, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            left = np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.intp)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.intp)
+
+            roots.append(offset)
+            lefts.append(left)
+            rights.append(right)
+            feats.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            values.append(tree.value[:, 0, 0])
+            depth = max(depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            features=list(features),
+            medians=medians,
+            roots=np.asarray(roots, dtype=np.intp),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            feature=np.concatenate(feats),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            value=np.concatenate(values).astype(np.float64),
+            depth=int(depth),
+        )
+
+    def slim(self) -> "CompiledForest":
+        """
+        Copia compacta para guardar como artefacto: índices int32 y umbrales y
+        valores float32. Cada umbral se redondea al mayor float32 <= umbral, así
+        que las comparaciones con features float32 siguen siendo exactas; solo
+        los valores de las hojas pierden precisión (~1e-7 relativo).
+        """
+        threshold = self.threshold.astype(np.float32)
+        above = threshold.astype(np.float64) > self.threshold
+        threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+        return CompiledForest(
+            features=self.features,
+            medians=self.medians,
+            roots=self.roots.astype(np.int32),
+            left=self.left.astype(np.int32),
+            right=self.right.astype(np.int32),
+            feature=self.feature.astype(np.int32),
+            threshold=threshold,
+            value=self.value.astype(np.float32),
+            depth=self.depth,
+        )
+
+    def _prepare(self, X: Any) -> np.ndarray:
+        if hasattr(X, "columns"):  # DataFrame (sin importar pandas)
+            X = X[self.features].to_numpy(dtype=np.float64)
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if X.shape[1] != len(self.features):
+            raise ValueError(f"Se esperaban {len(self.features)} features, llegaron {X.shape[1]}.")
+
+        # Imputación (float64) y conversión a float32 como en los árboles de sklearn
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.medians, X)
+        return X.astype(np.float32)
+
+    def predict(self, X: Any) -> np.ndarray:
+        """
+        Predice un lote. Acepta un DataFrame con las features o una matriz
+        (n_filas, n_features) en el orden de `features`.
+        """
+        Xf = self._prepare(X)
+        rows = np.arange(len(Xf))[:, None]
+        idx = np.broadcast_to(self.roots, (len(Xf), self.n_trees))
+
+        for _ in range(self.depth):
+            go_left = Xf[rows, self.feature[idx]] <= self.threshold[idx]
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+
+        # Suma árbol por árbol (mismo orden que RandomForestRegressor.predict)
+        leaf_values = self.value[idx]
+        out = leaf_values[:, 0].astype(np.float64)
+        for t in range(1, self.n_trees):
+            out += leaf_values[:, t]
+        out /= self.n_trees
+        return out
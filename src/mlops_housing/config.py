@@ -6,6 +6,7 @@ Estas constantes permiten mantener centralizadas las variables críticas
 del flujo de entrenamiento, inferencia y persistencia de artefactos
 """
 
+import os
 from pathlib import Path
 from typing import List
 
@@ -23,3 +24,36 @@ ARTIFACTS_DIR: Path = Path("artifacts")
 
 # Ruta por defecto del dataset 
 DEFAULT_DATA_PATH: Path = Path("data/HousingData.csv")
+
+# Log de predicciones (una fila por predicción, con feedback opcional)
+LOG_DIR: Path = Path("logs")
+LOG_PATH: Path = LOG_DIR / "predictions.csv"
+LOG_COLUMNS: List[str] = ["id", "timestamp", *FEATURES, "predicted_price", "real_price"]
+
+# Log columnar particionado por día (LOG_BACKEND=parquet)
+PARQUET_LOG_DIR: Path = LOG_DIR / "parquet"
+
+# Índice SQLite de predicciones y feedback (clave: id de la predicción)
+FEEDBACK_DB_PATH: Path = LOG_DIR / "feedback.db"
+
+# Estado de los monitores de drift de la API (un archivo por proceso)
+DRIFT_STATE_DIR: Path = LOG_DIR / "drift"
+
+
+# Helpers para leer configuración desde variables de entorno
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except Exception:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except Exception:
+        return default
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, "1" if default else "0") == "1"
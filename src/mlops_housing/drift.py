@@ -0,0 +1,308 @@
+"""
+drift.py
+--------
+Monitoreo incremental de drift de features.
+Al registrar un modelo se guarda un perfil de referencia (bins por cuantiles,
+media y desvío de cada feature y de predicted_price sobre los datos de
+entrenamiento) junto a metrics.json. La API mantiene, por proceso, histogramas
+con esos mismos bins y estadísticas de Welford actualizados en O(1) por
+predicción, y los persiste periódicamente en logs/drift/ para que
+evaluate.py calcule PSI/KS sin releer el log.
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import FEATURES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PREDICTION = "predicted_price"
+REFERENCE_FILE = "drift_reference.json"
+_EPS = 1e-4
+# Estados sin modificar en este tiempo son de procesos que murieron sin borrarlos
+STALE_STATE_SECONDS = 7 * 86400
+
+
+def _f32(values) -> np.ndarray:
+    """
+    Valores redondeados a float32 (en un array float64). El dataset de
+    entrenamiento se lee en float32 (loader.py) y las requests llegan en
+    float64: se comparan contra los bordes en float32 de los dos lados para
+    que un valor igual a un borde caiga en el mismo bin que en la referencia.
+    """
+    return np.asarray(values, dtype=np.float32).astype(np.float64)
+
+
+def _bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Cuenta valores por bin: (-inf, e0], (e0, e1], ..., (e_k, inf) y un último
+    bin para faltantes (NaN). `edges` debe estar en float32 (ver _f32).
+    """
+    values = _f32(values)
+    missing = np.isnan(values)
+    idx = np.searchsorted(edges, values[~missing], side="left")
+    counts = np.bincount(idx, minlength=len(edges) + 2).astype(np.int64)
+    counts[-1] += int(missing.sum())
+    return counts
+
+
+def build_reference(X: pd.DataFrame, predictions: Sequence[float], n_bins: int = 10) -> Dict[str, Any]:
+    """
+    Perfil de referencia de los datos de entrenamiento: bins por cuantiles
+    (deduplicados, así las features discretas quedan con un bin por valor),
+    conteos por bin, media y desvío de cada columna.
+    """
+    columns: Dict[str, Any] = {}
+    data = [(f, X[f].to_numpy(dtype=float)) for f in FEATURES]
+    data.append((PREDICTION, np.asarray(predictions, dtype=float)))
+
+    for name, values in data:
+        present = values[~np.isnan(values)]
+        if len(present):
+            edges = np.unique(_f32(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1])))
+        else:
+            edges = np.array([], dtype=float)
+        columns[name] = {
+            "edges": edges.tolist(),
+            "counts": _bin_counts(values, edges).tolist(),
+            "mean": float(present.mean()) if len(present) else float("nan"),
+            "std": float(present.std()) if len(present) else float("nan"),
+        }
+    return {"n_bins": n_bins, "columns": columns}
+
+
+def load_reference(run_dir: Path) -> Optional[Dict[str, Any]]:
+    """Perfil de referencia de un run (None si el run no lo tiene)."""
+    path = Path(run_dir) / REFERENCE_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def psi(expected: Sequence[float], actual: Sequence[float]) -> float:
+    """Population Stability Index entre dos histogramas con los mismos bins."""
+    p = np.asarray(expected, dtype=float)
+    q = np.asarray(actual, dtype=float)
+    if p.sum() == 0 or q.sum() == 0:
+        return float("nan")
+    p = np.clip(p / p.sum(), _EPS, None)
+    q = np.clip(q / q.sum(), _EPS, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(expected: Sequence[float], actual: Sequence[float]) -> float:
+    """Estadístico KS aproximado: máxima distancia entre las CDF por bin."""
+    p = np.asarray(expected, dtype=float)
+    q = np.asarray(actual, dtype=float)
+    if p.sum() == 0 or q.sum() == 0:
+        return float("nan")
+    return float(np.max(np.abs(np.cumsum(p / p.sum()) - np.cumsum(q / q.sum()))))
+
+
+def drift_scores(reference: Dict[str, Any], counts: Dict[str, Sequence[int]]) -> Dict[str, Dict[str, float]]:
+    """PSI y KS de cada columna contra el perfil de referencia."""
+    scores = {}
+    for name, ref in reference["columns"].items():
+        current = counts.get(name)
+        if current is None:
+            continue
+        scores[name] = {"psi": psi(ref["counts"], current), "ks": ks(ref["counts"], current)}
+    return scores
+
+
+class DriftMonitor:
+    """
+    Estadísticas streaming de la versión activa del modelo: un histograma
+    (bins de la referencia) y media/varianza de Welford por columna.
+    """
+
+    def __init__(self, reference: Dict[str, Any], run_id: str):
+        self.reference = reference
+        self.run_id = run_id
+        self.columns: List[str] = list(reference["columns"])
+        self._edges_np = [_f32(reference["columns"][c]["edges"]) for c in self.columns]
+        self._edges = [e.tolist() for e in self._edges_np]
+        self._counts = [[0] * (len(e) + 2) for e in self._edges]
+        self._n = [0] * len(self.columns)
+        self._mean = [0.0] * len(self.columns)
+        self._m2 = [0.0] * len(self.columns)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.path: Optional[Path] = None
+
+    def _add(self, i: int, value: float) -> None:
+        if value != value:  # NaN
+            self._counts[i][-1] += 1
+            return
+        self._counts[i][bisect_left(self._edges[i], float(np.float32(value)))] += 1
+        n = self._n[i] + 1
+        delta = value - self._mean[i]
+        self._mean[i] += delta / n
+        self._m2[i] += delta * (value - self._mean[i])
+        self._n[i] = n
+
+    def update(self, features: Sequence[float], prediction: float) -> None:
+        """Agrega una predicción (features en el orden de FEATURES)."""
+        with self._lock:
+            for i, value in enumerate(features):
+                self._add(i, float(value))
+            self._add(len(features), float(prediction))
+
+    def update_many(self, X: np.ndarray, predictions: np.ndarray) -> None:
+        """Agrega un lote: histogramas con bincount y Welford combinado (Chan)."""
+        data = np.column_stack([np.asarray(X, dtype=float), np.asarray(predictions, dtype=float)])
+        with self._lock:
+            for i in range(len(self.columns)):
+                values = data[:, i]
+                counts = _bin_counts(values, self._edges_np[i])
+                self._counts[i] = [a + int(b) for a, b in zip(self._counts[i], counts)]
+
+                present = values[~np.isnan(values)]
+                if not len(present):
+                    continue
+                n_b, mean_b = len(present), float(present.mean())
+                m2_b = float(((present - mean_b) ** 2).sum())
+                n_a, mean_a = self._n[i], self._mean[i]
+                n = n_a + n_b
+                delta = mean_b - mean_a
+                self._mean[i] = mean_a + delta * n_b / n
+                self._m2[i] += m2_b + delta * delta * n_a * n_b / n
+                self._n[i] = n
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "columns": {
+                    c: {
+                        "counts": list(self._counts[i]),
+                        "n": self._n[i],
+                        "mean": self._mean[i],
+                        "m2": self._m2[i],
+                    }
+                    for i, c in enumerate(self.columns)
+                },
+            }
+
+    def scores(self) -> Dict[str, Dict[str, float]]:
+        state = self.state()
+        return drift_scores(self.reference, {c: s["counts"] for c, s in state["columns"].items()})
+
+    def save(self, path: Path) -> None:
+        """Escribe el estado de forma atómica (archivo temporal + os.replace)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(self.state()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def start(self, state_dir: Path, interval: float) -> None:
+        """
+        Empieza a persistir el estado en un archivo propio de este proceso
+        (se llama en cada worker, después del fork) cada `interval` segundos.
+        """
+        if self.path is None:
+            prune_states(state_dir)
+            self.path = state_path(state_dir, self.run_id)
+        if self._thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.save(self.path)
+                except Exception:
+                    pass  # Se reintenta en el próximo ciclo
+
+        self._thread = threading.Thread(target=_loop, name="drift-persist", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Detiene el hilo de persistencia y borra el archivo de este proceso: al
+        apagar o cambiar de versión su estado ya no describe tráfico en curso.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+            self.path = None
+
+
+def state_path(state_dir: Path, run_id: str) -> Path:
+    """Archivo de estado de este proceso (uno por proceso y versión de modelo)."""
+    return Path(state_dir) / f"state-{run_id}-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+
+def prune_states(state_dir: Path, max_age: float = STALE_STATE_SECONDS) -> int:
+    """Borra los estados que no se actualizan hace más de `max_age` segundos."""
+    removed, cutoff = 0, time.time() - max_age
+    for path in Path(state_dir).glob("state-*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def read_drift(
+    state_dir: Path, run_dir: Path, window_days: Optional[float] = None
+) -> Optional[Dict[str, Dict[str, float]]]:
+    """
+    Suma los estados persistidos por los procesos de la API para el run
+    indicado y calcula PSI/KS contra su referencia. Con `window_days`, solo
+    cuentan los estados actualizados dentro de la ventana.
+
+    Returns:
+        {columna: {"psi", "ks", "n", "mean"}} o None si no hay referencia o datos.
+    """
+    reference = load_reference(run_dir)
+    state_dir = Path(state_dir)
+    if reference is None or not state_dir.exists():
+        return None
+
+    run_id = Path(run_dir).name
+    counts: Dict[str, np.ndarray] = {}
+    means: Dict[str, Tuple[int, float]] = {}
+    cutoff = time.time() - window_days * 86400 if window_days is not None else None
+    for path in state_dir.glob(f"state-{run_id}-*.json"):
+        try:
+            if cutoff is not None and path.stat().st_mtime < cutoff:
+                continue
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if state.get("run_id") != run_id:
+            continue
+        for name, col in state["columns"].items():
+            c = np.asarray(col["counts"], dtype=np.int64)
+            counts[name] = counts[name] + c if name in counts else c
+            n_a, mean_a = means.get(name, (0, 0.0))
+            n = n_a + col["n"]
+            if n:
+                means[name] = (n, mean_a + (col["mean"] - mean_a) * col["n"] / n)
+
+    if not counts:
+        return None
+    scores = drift_scores(reference, counts)
+    for name, s in scores.items():
+        s["n"] = float(counts[name].sum())
+        s["mean"] = means[name][1] if name in means else float("nan")
+    return scores
@@ -1,19 +1,28 @@
+import argparse
 import os
 import json
+import threading
+import time
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, Optional
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 
-import mlflow
-from mlops_housing.registry import load_current
+from mlops_housing.config import LOG_DIR, LOG_PATH, FEEDBACK_DB_PATH, PARQUET_LOG_DIR, DRIFT_STATE_DIR
+from mlops_housing.drift import read_drift
+from mlops_housing.feedback_store import FeedbackStore
+from mlops_housing.loader import load_frame
+from mlops_housing.parquet_log import read_window, PREDICTIONS, FEEDBACK
+from mlops_housing.registry import read_pointer, baseline_rmse
 
-LOG_PATH = Path("logs") / "predictions.csv"
-PLOT_DIR = Path("logs") / "plots"
-PLOT_DIR.mkdir(parents=True, exist_ok=True)
+PLOT_DIR = LOG_DIR / "plots"  # Se crea al generar el primer gráfico
+
+# Hilo que registra la última evaluación en MLflow (después de la decisión)
+_LOGGING: Optional[threading.Thread] = None
 
 
 # env helpers
@@ -91,70 +100,444 @@ def _filter_window(df: pd.DataFrame, window_days: int) -> pd.DataFrame:
     _dbg(f"rows in window (>=cutoff): {len(df_window)}")
     return df_window
 
-def evaluate_and_decide() -> int:
-    if not LOG_PATH.exists():
-        print(f"[evaluate] No existe {LOG_PATH}. Por lo que no se evalúa si hay degradación del modelo")
-        return 0
-
-    df = pd.read_csv(LOG_PATH)
-
-    if "real_price" not in df.columns:
-        print("[evaluate] No hay columna real_price aún.")
-        return 0
-
-    window_days = _envint("EVAL_WINDOW_DAYS", 1)
-    min_feedback = _envint("EVAL_MIN_FEEDBACK", 20)
-    threshold = _envfloat("EVAL_THRESHOLD", 0.10)
-
-    df_window = _filter_window(df, window_days)
-    n_feedback = len(df_window)
-
-    if n_feedback < min_feedback:
-        print(f"[evaluate] Feedback insuficiente: {n_feedback} < {min_feedback}.")
-        return 0
-
-    y_true = df_window["real_price"].astype(float)
-    y_pred = df_window["predicted_price"].astype(float)
+def _attach_feedback(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Une al log el feedback registrado en el índice SQLite por /feedback.
+    El valor del índice tiene prioridad sobre el `real_price` del CSV (filas legacy).
+    """
+    if not FEEDBACK_DB_PATH.exists() or "id" not in df.columns:
+        return df
 
-    rmse = float(np.sqrt(mean_squared_error(y_true, y_pred)))
-    mae = float(mean_absolute_error(y_true, y_pred))
-    r2 = float(r2_score(y_true, y_pred))
+    store = FeedbackStore(FEEDBACK_DB_PATH)
+    try:
+        feedback = store.get_feedback()
+    finally:
+        store.close()
+    _dbg(f"feedback en índice: {len(feedback)}")
+    if not feedback:
+        return df
+
+    real = df["id"].map(feedback)
+    if "real_price" in df.columns:
+        real = real.fillna(df["real_price"])
+    df["real_price"] = real.astype(float)
+    return df
+
+def _load_parquet_window(window_days: int) -> pd.DataFrame:
+    """
+    Lee del log Parquet solo las particiones diarias que tocan la ventana,
+    con las columnas necesarias, y une el feedback journalizado por ID.
+    El feedback siempre llega después de la predicción, por lo que basta
+    con leer las particiones de feedback desde el mismo día de corte.
+    """
+    since = _make_cutoff(window_days).date()
+    df = read_window(
+        PARQUET_LOG_DIR, PREDICTIONS, since,
+        columns=["id", "timestamp", "predicted_price", "real_price"],
+    ).to_pandas()
+    df = df.drop_duplicates("id", keep="last")
+
+    fb = read_window(PARQUET_LOG_DIR, FEEDBACK, since, columns=["id", "timestamp", "real_price"]).to_pandas()
+    _dbg(f"parquet desde {since}: {len(df)} predicciones, {len(fb)} feedback")
+    if len(fb):
+        latest = fb.sort_values("timestamp").drop_duplicates("id", keep="last").set_index("id")["real_price"]
+        df["real_price"] = df["id"].map(latest).fillna(df["real_price"])
+    return df
+
+class _RunningMetrics:
+    """
+    Acumula RMSE, MAE y R2 por bloques con sumas corridas (memoria constante).
+    La varianza de y_true se combina por bloques (Chan et al.) para que el R2
+    sea numéricamente estable. Guarda además una muestra reservorio acotada
+    de puntos para el gráfico.
+    """
 
-    _, run_dir = load_current()
-    with open(Path(run_dir) / "metrics.json", "r", encoding="utf-8") as f:
-        base_metrics = json.load(f)
-    baseline_rmse = float(base_metrics.get("cv_rmse", float("nan")))
+    def __init__(self, sample_size: int = 5000, seed: int = 42):
+        self.n = 0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+        self.sample_size = sample_size
+        self.sample_true = np.empty(0)
+        self.sample_pred = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        k = len(y_true)
+        if k == 0:
+            return
+        err = y_true - y_pred
+        self.sse += float(np.dot(err, err))
+        self.sae += float(np.abs(err).sum())
+
+        mean_k = float(y_true.mean())
+        m2_k = float(((y_true - mean_k) ** 2).sum())
+        delta = mean_k - self.mean_true
+        total = self.n + k
+        self.mean_true += delta * k / total
+        self.m2_true += m2_k + delta * delta * self.n * k / total
+
+        self._update_sample(y_true, y_pred, total)
+        self.n = total
+
+    def _update_sample(self, y_true: np.ndarray, y_pred: np.ndarray, total: int):
+        # Reservorio: cada punto visto queda en la muestra con probabilidad sample_size / n
+        free = max(0, self.sample_size - len(self.sample_true))
+        self.sample_true = np.concatenate([self.sample_true, y_true[:free]])
+        self.sample_pred = np.concatenate([self.sample_pred, y_pred[:free]])
+        if free >= len(y_true):
+            return
+        positions = np.arange(self.n + free, total) + 1
+        slots = (self._rng.random(len(positions)) * positions).astype(int)
+        keep = slots < self.sample_size
+        self.sample_true[slots[keep]] = y_true[free:][keep]
+        self.sample_pred[slots[keep]] = y_pred[free:][keep]
+
+    @property
+    def rmse(self) -> float:
+        return float(np.sqrt(self.sse / self.n))
+
+    @property
+    def mae(self) -> float:
+        return self.sae / self.n
+
+    @property
+    def r2(self) -> float:
+        if self.m2_true == 0.0:
+            # Mismo criterio que sklearn.metrics.r2_score con y_true constante
+            return 1.0 if self.sse == 0.0 else 0.0
+        return 1.0 - self.sse / self.m2_true
+
+
+def _stream_window_metrics(window_days: int, chunksize: int) -> _RunningMetrics:
+    """
+    Recorre el log CSV por bloques, leyendo solo las columnas necesarias.
+    Los bloques cuyo timestamp máximo es anterior al corte se descartan sin
+    parsear fechas (el log es append-only y usa timestamps ISO, que ordenan
+    lexicográficamente); solo los bloques de la ventana se parsean y se unen
+    al feedback del índice SQLite.
+    """
+    cutoff = _make_cutoff(window_days)
+    cutoff_iso = cutoff.isoformat()
+    store = FeedbackStore(FEEDBACK_DB_PATH) if FEEDBACK_DB_PATH.exists() else None
+    acc = _RunningMetrics()
+    cols = ("id", "timestamp", "predicted_price", "real_price")
+    skipped = 0
 
-    degraded = rmse > baseline_rmse * (1.0 + threshold)
+    try:
+        for chunk in pd.read_csv(LOG_PATH, usecols=lambda c: c in cols, chunksize=chunksize):
+            ts_max = chunk["timestamp"].dropna().astype(str).max()
+            if not isinstance(ts_max, str) or ts_max < cutoff_iso:
+                skipped += 1
+                continue
+
+            ts = _normalize_timestamp_series(chunk["timestamp"])
+            chunk = chunk.loc[ts.notna() & (ts >= cutoff)]
+            if chunk.empty:
+                continue
+
+            real = chunk["real_price"] if "real_price" in chunk.columns else pd.Series(np.nan, index=chunk.index)
+            if store is not None:
+                feedback = store.get_feedback(chunk["id"].tolist())
+                if feedback:
+                    real = chunk["id"].map(feedback).fillna(real)
+            valid = real.notna()
+            acc.update(
+                real[valid].to_numpy(dtype=float),
+                chunk.loc[valid, "predicted_price"].to_numpy(dtype=float),
+            )
+    finally:
+        if store is not None:
+            store.close()
+
+    _dbg(f"streaming: bloques descartados={skipped}, filas en ventana con feedback={acc.n}")
+    return acc
+
+def _check_drift(psi_threshold: float, window_days: float):
+    """
+    Lee el drift acumulado por la API para el modelo activo (no necesita
+    feedback ni releer el log), de los procesos activos en la ventana.
+    Devuelve (scores, drifted).
+    """
+    try:
+        scores = read_drift(DRIFT_STATE_DIR, read_pointer(), window_days)
+    except FileNotFoundError:
+        return None, False
+    if not scores:
+        return None, False
+
+    psis = {c: s["psi"] for c, s in scores.items() if not np.isnan(s["psi"])}
+    if not psis:
+        return scores, False
+    worst = max(psis, key=psis.get)
+    drifted = psi_threshold > 0 and psis[worst] > psi_threshold
+    print(f"[evaluate] drift: max PSI={psis[worst]:.3f} ({worst}), n={int(scores[worst]['n'])}, drifted={drifted}")
+    return scores, drifted
+
+
+def _shadow_metrics(window_days: int) -> Dict[str, Dict[str, float]]:
+    """
+    RMSE de los modelos candidatos (shadow / canary) en la ventana, sobre
+    las mismas requests con feedback que respondió el modelo servido.
+    """
+    if not FEEDBACK_DB_PATH.exists():
+        return {}
+    store = FeedbackStore(FEEDBACK_DB_PATH)
+    try:
+        shadow = store.shadow_metrics(_make_cutoff(window_days).isoformat())
+    finally:
+        store.close()
+    for run_id, m in shadow.items():
+        print(
+            f"[evaluate] candidato {run_id}: n={int(m['n'])}, rmse={m['rmse']:.3f}, "
+            f"servido={m['served_rmse']:.3f}"
+        )
+    return shadow
+
+
+def _plot_payload(y_true, y_pred, max_points: int, bins: int = 100) -> Dict[str, Any]:
+    """
+    Prepara los datos del gráfico en el proceso principal: los puntos si la
+    ventana es chica, o un histograma 2D (bins x bins) si es grande, para no
+    dibujar ni transferir millones de puntos al proceso que renderiza.
+    """
+    yt = np.asarray(y_true, dtype=float)
+    yp = np.asarray(y_pred, dtype=float)
+    lo = float(min(yt.min(), yp.min()))
+    hi = float(max(yt.max(), yp.max()))
+    if len(yt) <= max_points:
+        return {"kind": "scatter", "x": yt, "y": yp, "lo": lo, "hi": hi}
+    counts, xedges, yedges = np.histogram2d(yt, yp, bins=bins, range=[[lo, hi], [lo, hi]])
+    return {"kind": "density", "counts": counts, "xedges": xedges, "yedges": yedges, "lo": lo, "hi": hi}
+
+
+def _warm_plot() -> None:
+    """Importa matplotlib en el proceso del gráfico mientras se cargan los datos."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _render_plot(payload: Dict[str, Any], title: str, fig_path: str) -> str:
+    """Dibuja el gráfico real vs. predicho (corre en un proceso aparte)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
 
-    fig_path = PLOT_DIR / f"prod_eval_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.png"
     plt.figure(figsize=(6, 4))
-    plt.scatter(y_true, y_pred, alpha=0.6)
-    lo = min(y_true.min(), y_pred.min())
-    hi = max(y_true.max(), y_pred.max())
+    if payload["kind"] == "scatter":
+        plt.scatter(payload["x"], payload["y"], alpha=0.6)
+    else:
+        counts = np.ma.masked_equal(payload["counts"].T, 0)
+        plt.pcolormesh(payload["xedges"], payload["yedges"], counts, norm=LogNorm(), cmap="viridis")
+        plt.colorbar(label="Predicciones")
+    lo, hi = payload["lo"], payload["hi"]
     plt.plot([lo, hi], [lo, hi], "r--")
-    plt.title(f"Últimos {window_days} días | RMSE={rmse:.3f} | baseline={baseline_rmse:.3f}")
+    plt.title(title)
     plt.xlabel("Real Price")
     plt.ylabel("Predicted Price")
     plt.tight_layout()
     plt.savefig(fig_path)
     plt.close()
+    return fig_path
+
+
+def _baseline_rmse() -> float:
+    run_dir = read_pointer()  # Solo se necesitan las métricas, no el modelo
+    with open(Path(run_dir) / "metrics.json", "r", encoding="utf-8") as f:
+        base_metrics = json.load(f)
+    return baseline_rmse(base_metrics)
 
+
+def _decide(backend, streaming, window_days, min_feedback, threshold, no_feedback_code, drifted):
+    """
+    Calcula el RMSE de la ventana y la decisión. Devuelve (exit code, datos
+    para el registro), con datos None si no hubo feedback suficiente.
+    """
+    acc = None
+
+    if streaming:
+        # Modo streaming: memoria constante, costo proporcional a la ventana
+        acc = _stream_window_metrics(window_days, _envint("EVAL_CHUNKSIZE", 100_000))
+        n_feedback = acc.n
+        if n_feedback < min_feedback:
+            print(f"[evaluate] Feedback insuficiente: {n_feedback} < {min_feedback}.")
+            return no_feedback_code, None
+
+        y_true = acc.sample_true
+        y_pred = acc.sample_pred
+        rmse = acc.rmse
+    else:
+        if backend == "parquet":
+            df = _load_parquet_window(window_days)
+        else:
+            df = _attach_feedback(load_frame(LOG_PATH, ["id", "timestamp", "predicted_price", "real_price"]))
+
+        if "real_price" not in df.columns:
+            print("[evaluate] No hay columna real_price aún.")
+            return no_feedback_code, None
+
+        df_window = _filter_window(df, window_days)
+        n_feedback = len(df_window)
+
+        if n_feedback < min_feedback:
+            print(f"[evaluate] Feedback insuficiente: {n_feedback} < {min_feedback}.")
+            return no_feedback_code, None
+
+        y_true = df_window["real_price"].to_numpy(dtype=float)
+        y_pred = df_window["predicted_price"].to_numpy(dtype=float)
+        rmse = float(np.sqrt(mean_squared_error(y_true, y_pred)))
+
+    baseline_rmse = _baseline_rmse()
+    degraded = rmse > baseline_rmse * (1.0 + threshold)
     print(f"[evaluate] n={n_feedback}, rmse={rmse:.3f}, baseline={baseline_rmse:.3f}, degraded={degraded}")
-    
-    with mlflow.start_run(run_name=f"prod_eval_{datetime.utcnow().isoformat()}"):
-        mlflow.log_param("window_days", window_days)
-        mlflow.log_param("min_feedback", min_feedback)
-        mlflow.log_param("threshold", threshold)
-        mlflow.log_metric("prod_rmse", rmse)
-        mlflow.log_metric("prod_mae", mae)
-        mlflow.log_metric("prod_r2", r2)
-        mlflow.log_metric("baseline_rmse", baseline_rmse)
-        mlflow.log_metric("degraded_flag", 1.0 if degraded else 0.0)
-        mlflow.log_artifact(str(fig_path), artifact_path="plots")
 
-    return 2 if degraded else 0
+    params = {"window_days": window_days, "min_feedback": min_feedback, "threshold": threshold}
+    metrics = {
+        "prod_rmse": rmse,
+        "baseline_rmse": baseline_rmse,
+        "degraded_flag": 1.0 if degraded else 0.0,
+    }
+    return (2 if degraded or drifted else 0), (params, metrics, y_true, y_pred, acc)
+
+
+def _log_evaluation(
+    params: Dict[str, Any],
+    metrics: Dict[str, float],
+    y_true,
+    y_pred,
+    acc,
+    window_days: int,
+    drift_scores,
+    drifted: bool,
+    executor: Optional[ProcessPoolExecutor],
+    plot_future,
+) -> None:
+    """
+    Completa las métricas secundarias (MAE/R2, shadow, drift) y las registra
+    en MLflow con un único log_batch, junto al gráfico si se pidió.
+    Corre después de la decisión, fuera de su camino crítico.
+    """
+    try:
+        if acc is not None:
+            metrics["prod_mae"], metrics["prod_r2"] = acc.mae, acc.r2
+        else:
+            metrics["prod_mae"] = float(mean_absolute_error(y_true, y_pred))
+            metrics["prod_r2"] = float(r2_score(y_true, y_pred))
+        for run_id, m in _shadow_metrics(window_days).items():
+            for key in ("n", "rmse", "mae", "served_rmse"):
+                metrics[f"shadow/{run_id}/{key}"] = m[key]
+        if drift_scores:
+            for feature, score in drift_scores.items():
+                if not np.isnan(score["psi"]):
+                    metrics[f"drift_psi_{feature}"] = score["psi"]
+                    metrics[f"drift_ks_{feature}"] = score["ks"]
+            metrics["drift_flag"] = 1.0 if drifted else 0.0
+
+        import mlflow  # Import diferido: pesado y fuera del camino de la decisión
+        from mlflow.entities import Metric, Param
+
+        with mlflow.start_run(run_name=f"prod_eval_{datetime.utcnow().isoformat()}") as run:
+            timestamp = int(time.time() * 1000)
+            mlflow.tracking.MlflowClient().log_batch(
+                run.info.run_id,
+                metrics=[Metric(key, float(value), timestamp, 0) for key, value in metrics.items()],
+                params=[Param(key, str(value)) for key, value in params.items()],
+            )
+            if plot_future is not None:
+                try:
+                    mlflow.log_artifact(plot_future.result(), artifact_path="plots")
+                except Exception as e:
+                    print(f"[evaluate] No se pudo generar el gráfico: {e}")
+    except Exception as e:
+        print(f"[evaluate] No se pudo registrar la evaluación en MLflow: {e}")
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def wait_for_logging(timeout: Optional[float] = None) -> None:
+    """Espera a que termine el registro en MLflow de la última evaluación."""
+    if _LOGGING is not None:
+        _LOGGING.join(timeout)
+
+
+def evaluate_and_decide(plot: bool = True, log_mlflow: bool = True) -> int:
+    """
+    Evalúa el modelo activo con el feedback de la ventana y decide si está
+    degradado (exit code 2). El exit code se devuelve apenas está el RMSE:
+    MAE/R2, shadow, drift, el gráfico y el registro en MLflow se completan
+    después en un hilo aparte (ver wait_for_logging). Con plot=False no se
+    genera el gráfico y con log_mlflow=False no se registra nada.
+    """
+    global _LOGGING
+    backend = os.getenv("LOG_BACKEND", "csv")
+    window_days = _envint("EVAL_WINDOW_DAYS", 1)
+    min_feedback = _envint("EVAL_MIN_FEEDBACK", 20)
+    threshold = _envfloat("EVAL_THRESHOLD", 0.10)
+    max_points = _envint("EVAL_PLOT_MAX_POINTS", 5000)
+
+    streaming = backend != "parquet" and os.getenv("EVAL_STREAMING", "0") == "1"
+
+    # El drift de features se detecta antes de que llegue el feedback
+    drift_scores, drifted = _check_drift(_envfloat("EVAL_DRIFT_PSI", 0.0), window_days)
+    no_feedback_code = 2 if drifted else 0
+
+    if backend != "parquet" and not LOG_PATH.exists():
+        print(f"[evaluate] No existe {LOG_PATH}. Por lo que no se evalúa si hay degradación del modelo")
+        return no_feedback_code
+
+    # El proceso del gráfico arranca (e importa matplotlib) mientras se cargan los datos
+    executor = None
+    if plot and log_mlflow:
+        executor = ProcessPoolExecutor(max_workers=1)
+        executor.submit(_warm_plot)
+    try:
+        code, logging_args = _decide(
+            backend, streaming, window_days, min_feedback, threshold, no_feedback_code, drifted
+        )
+    except BaseException:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    if logging_args is None or not log_mlflow:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return code
+
+    params, metrics, y_true, y_pred, acc = logging_args
+    plot_future = None
+    if executor is not None:
+        PLOT_DIR.mkdir(parents=True, exist_ok=True)
+        fig_path = PLOT_DIR / f"prod_eval_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.png"
+        title = (
+            f"Últimos {window_days} días | RMSE={metrics['prod_rmse']:.3f} "
+            f"| baseline={metrics['baseline_rmse']:.3f}"
+        )
+        plot_future = executor.submit(_render_plot, _plot_payload(y_true, y_pred, max_points), title, str(fig_path))
+
+    # Hilo no daemon: el proceso no termina hasta registrar la evaluación
+    _LOGGING = threading.Thread(
+        target=_log_evaluation,
+        args=(params, metrics, y_true, y_pred, acc, window_days, drift_scores, drifted, executor, plot_future),
+        name="evaluate-mlflow",
+    )
+    _LOGGING.start()
+    return code
+
+
+def cli() -> int:
+    parser = argparse.ArgumentParser(description="Evalúa el modelo activo con el feedback de producción")
+    parser.add_argument("--no-plot", action="store_true",
+                        help="No genera el gráfico: la decisión sale apenas están las métricas")
+    args = parser.parse_args()
+    code = evaluate_and_decide(plot=not args.no_plot)
+    print(f"[evaluate] exit code {code}; registrando en MLflow...", flush=True)
+    wait_for_logging()
+    return code
 
 
 if __name__ == "__main__":
-    exit(evaluate_and_decide())
+    exit(cli())
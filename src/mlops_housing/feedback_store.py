@@ -0,0 +1,255 @@
+"""
+feedback_store.py
+-----------------
+Índice de predicciones y feedback en SQLite, con clave primaria en el ID.
+Permite registrar el valor real de una predicción en tiempo constante,
+sin releer ni reescribir el log CSV completo. El log sigue siendo
+append-only; evaluate.py une el feedback al log por ID.
+"""
+
+from __future__ import annotations
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import LOG_COLUMNS
+
+_ID_IDX = LOG_COLUMNS.index("id")
+_TS_IDX = LOG_COLUMNS.index("timestamp")
+_PRED_IDX = LOG_COLUMNS.index("predicted_price")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT,
+    predicted_price REAL
+);
+CREATE TABLE IF NOT EXISTS feedback (
+    id TEXT PRIMARY KEY,
+    real_price REAL NOT NULL,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS feedback_updated_at ON feedback (updated_at);
+CREATE TABLE IF NOT EXISTS shadow_predictions (
+    id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    predicted_price REAL,
+    PRIMARY KEY (id, run_id)
+);
+"""
+
+
+class FeedbackStore:
+    """
+    Tablas `predictions` y `feedback` indexadas por ID, y
+    `shadow_predictions` con las predicciones de modelos candidatos.
+    Una sola conexión por proceso, protegida por un lock; SQLite en modo WAL
+    permite lectores y un escritor concurrentes entre procesos.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Predicciones
+    def write(self, rows: List[Sequence[Any]]) -> None:
+        """
+        Indexa filas del log (en el orden de LOG_COLUMNS).
+        Tiene la misma interfaz que los sinks de logsink.LogWriter.
+        """
+        self.add_predictions((r[_ID_IDX], r[_TS_IDX], r[_PRED_IDX]) for r in rows)
+
+    def add_predictions(self, records: Iterable[Sequence[Any]]) -> None:
+        """Inserta tuplas (id, timestamp, predicted_price); ignora IDs repetidos."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO predictions (id, timestamp, predicted_price) VALUES (?, ?, ?)",
+                records,
+            )
+
+    def has_prediction(self, prediction_id: str) -> bool:
+        with self._lock:
+            cur = self.conn.execute("SELECT 1 FROM predictions WHERE id = ?", (prediction_id,))
+            return cur.fetchone() is not None
+
+    # Feedback
+    def set_feedback(self, prediction_id: str, real_price: float) -> bool:
+        """
+        Registra (o reemplaza) el valor real de una predicción.
+
+        Returns:
+            False si el ID no existe en el índice de predicciones.
+        """
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO feedback (id, real_price) "
+                "SELECT id, ? FROM predictions WHERE id = ? "
+                "ON CONFLICT(id) DO UPDATE SET real_price = excluded.real_price, "
+                "updated_at = excluded.updated_at",
+                (real_price, prediction_id),
+            )
+            return cur.rowcount > 0
+
+    def set_feedback_many(self, pairs: Sequence[Tuple[str, float]]) -> List[Tuple[str, float]]:
+        """
+        Registra un lote de (id, real_price) en una sola transacción: el lote
+        se carga en una tabla temporal y se une a `predictions` por clave
+        primaria. Si un ID se repite en el lote, gana el último valor.
+
+        Returns:
+            Pares que coincidieron con una predicción existente.
+        """
+        with self._lock, self.conn:
+            conn = self.conn
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS feedback_batch (id TEXT PRIMARY KEY, real_price REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM feedback_batch")
+            conn.executemany("INSERT OR REPLACE INTO feedback_batch (id, real_price) VALUES (?, ?)", pairs)
+            matched = conn.execute(
+                "SELECT b.id, b.real_price FROM feedback_batch b JOIN predictions p ON p.id = b.id"
+            ).fetchall()
+            # WHERE true: requerido por SQLite para el upsert sobre un SELECT con JOIN
+            conn.execute(
+                "INSERT INTO feedback (id, real_price) "
+                "SELECT b.id, b.real_price FROM feedback_batch b JOIN predictions p ON p.id = b.id WHERE true "
+                "ON CONFLICT(id) DO UPDATE SET real_price = excluded.real_price, "
+                "updated_at = excluded.updated_at"
+            )
+            conn.execute("DELETE FROM feedback_batch")
+            return matched
+
+    def get_feedback(self, ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Devuelve {id: real_price}. Sin `ids`, devuelve todo el feedback registrado.
+        """
+        with self._lock:
+            if ids is None:
+                cur = self.conn.execute("SELECT id, real_price FROM feedback")
+                return dict(cur.fetchall())
+
+            result: Dict[str, float] = {}
+            ids = list(ids)
+            # SQLite limita la cantidad de parámetros por sentencia
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                placeholders = ",".join("?" * len(chunk))
+                cur = self.conn.execute(
+                    f"SELECT id, real_price FROM feedback WHERE id IN ({placeholders})", chunk
+                )
+                result.update(cur.fetchall())
+            return result
+
+    def feedback_since(self, since: Optional[str] = None) -> List[Tuple[str, str, float, str]]:
+        """
+        Feedback registrado (o actualizado) después de `since` (ISO, UTC),
+        en orden de llegada.
+
+        Returns:
+            Tuplas (id, timestamp de la predicción, real_price, updated_at).
+        """
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT f.id, p.timestamp, f.real_price, f.updated_at "
+                "FROM feedback f JOIN predictions p ON p.id = f.id "
+                "WHERE f.updated_at > ? ORDER BY f.updated_at",
+                (since or "",),
+            )
+            return cur.fetchall()
+
+    # Modelos candidatos (shadow / canary)
+    def add_shadow(self, records: Iterable[Sequence[Any]]) -> None:
+        """Inserta tuplas (id, run_id del candidato, predicted_price)."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO shadow_predictions (id, run_id, predicted_price) VALUES (?, ?, ?)",
+                records,
+            )
+
+    def shadow_metrics(self, since: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Error de cada candidato sobre las predicciones con feedback posteriores
+        a `since`, junto al del modelo que respondió esas mismas requests.
+
+        Returns:
+            {run_id: {"n", "rmse", "mae", "served_rmse"}}
+        """
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT s.run_id, COUNT(*), "
+                "SUM((s.predicted_price - f.real_price) * (s.predicted_price - f.real_price)), "
+                "SUM(ABS(s.predicted_price - f.real_price)), "
+                "SUM((p.predicted_price - f.real_price) * (p.predicted_price - f.real_price)) "
+                "FROM shadow_predictions s "
+                "JOIN feedback f ON f.id = s.id "
+                "JOIN predictions p ON p.id = s.id "
+                "WHERE p.timestamp >= ? GROUP BY s.run_id",
+                (since or "",),
+            )
+            rows = cur.fetchall()
+        return {
+            run_id: {
+                "n": float(n),
+                "rmse": (sse / n) ** 0.5,
+                "mae": sae / n,
+                "served_rmse": (served_sse / n) ** 0.5,
+            }
+            for run_id, n, sse, sae, served_sse in rows
+        }
+
+    # Migración desde el log CSV existente
+    def backfill_from_log(self, log_path: Path, chunksize: int = 100_000) -> int:
+        """
+        Indexa un log CSV preexistente la primera vez que se abre el store
+        (incluyendo el `real_price` ya registrado en el CSV). El feedback
+        histórico toma como `updated_at` el timestamp de su predicción, para
+        que feedback_since no lo trate como recién llegado.
+
+        Returns:
+            Número de filas indexadas (0 si el índice ya tenía datos).
+        """
+        log_path = Path(log_path)
+        if not log_path.exists():
+            return 0
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM predictions LIMIT 1").fetchone() is not None:
+                return 0
+
+        import pandas as pd  # Solo para la migración inicial
+
+        n = 0
+        cols = ["id", "timestamp", "predicted_price", "real_price"]
+        for chunk in pd.read_csv(log_path, usecols=lambda c: c in cols, chunksize=chunksize):
+            self.add_predictions(
+                chunk[["id", "timestamp", "predicted_price"]].itertuples(index=False, name=None)
+            )
+            if "real_price" in chunk.columns:
+                labeled = chunk.loc[chunk["real_price"].notna(), ["real_price", "id", "timestamp"]]
+                labeled = labeled.astype(object).where(labeled.notna(), None)
+                with self._lock, self.conn:
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO feedback (real_price, id, updated_at) "
+                        "VALUES (?, ?, COALESCE(?, strftime('%Y-%m-%dT%H:%M:%f', 'now')))",
+                        labeled.itertuples(index=False, name=None),
+                    )
+            n += len(chunk)
+        return n
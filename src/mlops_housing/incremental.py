@@ -0,0 +1,222 @@
+"""
+incremental.py
+--------------
+Reentrenamiento incremental del modelo activo.
+En lugar de entrenar desde cero (todos los árboles + CV de 5 folds), parte del
+bosque cargado con load_current y, con warm_start, agrega un número acotado de
+árboles nuevos (reemplazando los más viejos si se supera el máximo) entrenados
+sobre los datos base más el feedback llegado desde el último run. La
+validación se hace sobre un holdout del feedback nuevo, contra el modelo
+anterior, por lo que el costo crece con los datos nuevos y no con el historial.
+"""
+
+from __future__ import annotations
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sklearn.metrics import mean_squared_error, r2_score
+
+from .config import FEATURES, TARGET, LOG_PATH, FEEDBACK_DB_PATH, PARQUET_LOG_DIR
+from .drift import build_reference
+from .feedback_store import FeedbackStore
+from .loader import load_training_data
+from .registry import TRAINING_FILE, baseline_rmse, load_current, save_run
+
+
+def _training_info(run_dir: Path) -> Dict[str, Any]:
+    """training.json de un run incremental ({} para runs completos)."""
+    path = Path(run_dir) / TRAINING_FILE
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def _run_cutoff(run_dir: Path) -> str:
+    """
+    Momento (updated_at del feedback, ISO UTC) a partir del cual el feedback
+    es nuevo para un run: el registrado por el reentrenamiento incremental
+    que lo generó o, si no, la fecha de creación del run.
+    """
+    info = _training_info(run_dir)
+    if "feedback_until" in info:
+        return info["feedback_until"]
+    stamp = Path(run_dir).name.split("_", 1)[0]
+    try:
+        return datetime.strptime(stamp, "%Y%m%dT%H%M%SZ").strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return ""
+
+
+def collect_feedback_rows(
+    since: Optional[str],
+    backend: str = "csv",
+    chunksize: int = 100_000,
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Features y valor real de las predicciones con feedback registrado después
+    de `since`. Los IDs salen del índice SQLite (por updated_at) y las
+    features del log, leyendo solo desde la predicción más vieja involucrada.
+
+    Returns:
+        DataFrame con FEATURES + TARGET y el updated_at más reciente (None si no hay filas).
+    """
+    empty = pd.DataFrame(columns=[*FEATURES, TARGET])
+    if not FEEDBACK_DB_PATH.exists():
+        return empty, None
+    store = FeedbackStore(FEEDBACK_DB_PATH)
+    try:
+        records = store.feedback_since(since)
+    finally:
+        store.close()
+    if not records:
+        return empty, None
+
+    feedback = pd.DataFrame(records, columns=["id", "timestamp", "real_price", "updated_at"])
+    ids = set(feedback["id"])
+    min_ts = str(feedback["timestamp"].min())
+
+    if backend == "parquet":
+        from .parquet_log import read_window, PREDICTIONS
+        log = read_window(
+            PARQUET_LOG_DIR, PREDICTIONS, since=date.fromisoformat(min_ts[:10]), columns=["id", *FEATURES]
+        ).to_pandas()
+        log = log.loc[log["id"].isin(ids)]
+    else:
+        if not LOG_PATH.exists():
+            return empty, None
+        parts = []
+        for chunk in pd.read_csv(LOG_PATH, usecols=["id", "timestamp", *FEATURES], chunksize=chunksize):
+            # Log append-only con timestamps ISO: los bloques viejos se descartan sin parsear fechas
+            ts_max = chunk["timestamp"].dropna().astype(str).max()
+            if not isinstance(ts_max, str) or ts_max < min_ts:
+                continue
+            parts.append(chunk.loc[chunk["id"].isin(ids), ["id", *FEATURES]])
+        log = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["id", *FEATURES])
+
+    rows = log.drop_duplicates("id").merge(feedback[["id", "real_price"]], on="id")
+    rows = rows.rename(columns={"real_price": TARGET})
+    return rows[[*FEATURES, TARGET]].astype(float), str(feedback["updated_at"].max())
+
+
+def _rmse(y_true, y_pred) -> float:
+    return float(np.sqrt(mean_squared_error(y_true, y_pred)))
+
+
+def retrain_incremental(
+    data_path: str,
+    tag: str = "rf_incremental",
+    n_new_trees: int = 20,
+    max_trees: int = 200,
+    holdout: float = 0.2,
+    min_new_rows: int = 20,
+    min_baseline_holdout: int = 50,
+    rmse_tolerance: float = 0.0,
+    n_jobs: Optional[int] = -1,
+    formats: Sequence[str] = (),
+) -> Optional[Dict[str, float]]:
+    """
+    Reentrena el modelo activo con el feedback nuevo:
+      1. Juntar las filas con feedback posterior al último run
+      2. Separar un holdout de esas filas
+      3. Agregar `n_new_trees` árboles (warm_start) entrenados sobre datos base + feedback
+      4. Registrar el modelo solo si en el holdout no es peor que el anterior
+
+    Args:
+        max_trees: Tamaño máximo del bosque; al superarlo se descartan los árboles más viejos
+        holdout: Fracción del feedback nuevo reservada para validar
+        min_new_rows: Feedback mínimo para reentrenar
+        min_baseline_holdout: Holdout mínimo para usar su RMSE como baseline de
+            evaluate; con menos filas se hereda el baseline del run anterior
+        rmse_tolerance: RMSE relativo extra aceptado frente al modelo anterior
+
+    Returns:
+        Métricas del nuevo run, o None si no se registró un modelo.
+    """
+    model, run_dir = load_current(fmt="joblib")  # Pipeline de sklearn, no la variante slim
+    since = _run_cutoff(run_dir)
+    new_rows, feedback_until = collect_feedback_rows(since, os.getenv("LOG_BACKEND", "csv"))
+    logger.info(f"Feedback nuevo desde {since or 'el inicio'}: {len(new_rows)} filas")
+    if len(new_rows) < min_new_rows:
+        logger.info(f"Feedback insuficiente para reentrenar ({len(new_rows)} < {min_new_rows}).")
+        return None
+
+    # Holdout tomado del feedback nuevo (datos que ningún árbol vio)
+    order = np.random.default_rng(42).permutation(len(new_rows))
+    n_holdout = max(1, int(len(new_rows) * holdout))
+    hold = new_rows.iloc[order[:n_holdout]]
+    train = pd.concat(
+        [load_training_data(data_path), new_rows.iloc[order[n_holdout:]].astype({f: "float32" for f in FEATURES})],
+        ignore_index=True,
+    )
+    previous_rmse = _rmse(hold[TARGET], model.predict(hold[FEATURES]))
+
+    # El preprocesador (medianas del imputador) se mantiene: solo se entrenan árboles nuevos
+    preprocessor = model.named_steps["preprocessor"]
+    forest = model.named_steps["model"]
+    n_before = len(forest.estimators_)
+    n_keep = max(0, min(n_before, max_trees - n_new_trees))
+    forest.estimators_ = forest.estimators_[n_before - n_keep:]
+    # warm_start asigna semillas por posición: tras descartar árboles, las
+    # posiciones nuevas repetirían semillas de árboles conservados. Se desplaza
+    # random_state por la cantidad de árboles entrenados en todo el linaje.
+    n_built = int(_training_info(run_dir).get("n_trees_built", n_before))
+    seed = forest.random_state if isinstance(forest.random_state, int) else 42
+    forest.set_params(
+        warm_start=True, n_estimators=n_keep + n_new_trees, n_jobs=n_jobs, random_state=seed + n_built,
+    )
+    forest.fit(preprocessor.transform(train[FEATURES]), train[TARGET])
+    forest.set_params(warm_start=False, n_jobs=None)
+
+    y_hold = model.predict(hold[FEATURES])
+    holdout_rmse = _rmse(hold[TARGET], y_hold)
+    if n_holdout >= min_baseline_holdout:
+        baseline = holdout_rmse
+    else:
+        # Un holdout chico da un RMSE muy ruidoso: se mantiene el baseline anterior
+        with open(Path(run_dir) / "metrics.json", "r", encoding="utf-8") as f:
+            baseline = baseline_rmse(json.load(f))
+    metrics = {
+        "holdout_rmse": holdout_rmse,
+        "holdout_r2": float(r2_score(hold[TARGET], y_hold)) if len(hold) > 1 else float("nan"),
+        "previous_holdout_rmse": previous_rmse,
+        "n_new_rows": float(len(new_rows)),
+        "n_holdout": float(n_holdout),
+        "n_trees": float(forest.n_estimators),
+        "n_trees_replaced": float(n_before - n_keep),
+        "baseline_rmse": baseline,
+    }
+    logger.info(f"Métricas del reentrenamiento incremental: {metrics}")
+
+    if metrics["holdout_rmse"] > previous_rmse * (1.0 + rmse_tolerance):
+        logger.warning(
+            f"El modelo incremental no mejora en el holdout "
+            f"({metrics['holdout_rmse']:.3f} vs {previous_rmse:.3f}); se mantiene {run_dir.name}."
+        )
+        return None
+
+    import mlflow  # Import diferido: pesado y solo necesario al registrar
+
+    with mlflow.start_run(run_name=f"incremental_{tag}"):
+        mlflow.log_params({
+            "mode": "incremental", "base_run": run_dir.name, "n_new_trees": n_new_trees,
+            "max_trees": max_trees, "holdout": holdout,
+        })
+        mlflow.log_metrics(metrics)
+
+        X_train = train[FEATURES]
+        new_dir = save_run(
+            model, metrics, tag=tag,
+            reference=build_reference(X_train, model.predict(X_train)),
+            formats=formats, probe=X_train.sample(min(64, len(X_train)), random_state=0),
+            training={
+                "feedback_until": feedback_until, "base_run": run_dir.name, "base_data": str(data_path),
+                "n_trees_built": n_built + n_new_trees,
+            },
+        )
+
+    logger.success(f"Reentrenamiento incremental completado. Artefactos guardados en: {new_dir}")
+    return metrics
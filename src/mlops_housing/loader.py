@@ -0,0 +1,120 @@
+"""
+loader.py
+---------
+Carga tipada de datasets y del log de predicciones.
+En lugar de dejar que pd.read_csv infiera float64/int64 para las features y
+object para id/timestamp, los tipos salen de config (FEATURES en float32,
+TARGET y precios en float64, id como string de Arrow y timestamp parseado una
+sola vez). El target no se reduce: leerlo en float32 cambia el modelo
+entrenado. Los CSV se leen con el parser multihilo de pyarrow y también se
+aceptan archivos Parquet/Arrow, leyendo solo las columnas pedidas.
+"""
+
+from __future__ import annotations
+import csv
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from .config import FEATURES, TARGET
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def column_types() -> Dict[str, pa.DataType]:
+    """
+    Tipos explícitos por columna (las columnas no listadas se infieren).
+    pyarrow se importa al leer, no al importar train.
+    """
+    import pyarrow as pa
+
+    return {
+        **{f: pa.float32() for f in FEATURES},
+        TARGET: pa.float64(),
+        "predicted_price": pa.float64(),
+        "real_price": pa.float64(),
+        "id": pa.string(),
+        "timestamp": pa.timestamp("us"),
+    }
+
+
+def _csv_header(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def _present(columns: Optional[Sequence[str]], names: Sequence[str]) -> Optional[List[str]]:
+    """Columnas pedidas que existen en el archivo (None = todas)."""
+    return None if columns is None else [c for c in columns if c in names]
+
+
+def _cast(table: pa.Table) -> pa.Table:
+    """Aplica column_types() a una tabla leída de Parquet/Arrow."""
+    import pyarrow as pa
+
+    types = column_types()
+    fields = [
+        pa.field(name, types.get(name, table.schema.field(name).type))
+        for name in table.column_names
+    ]
+    return table.cast(pa.schema(fields))
+
+
+def read_table(path: Path, columns: Optional[Sequence[str]] = None) -> pa.Table:
+    """
+    Lee CSV, Parquet o Arrow IPC como tabla de Arrow con column_types(),
+    solo con las `columns` pedidas que existan en el archivo.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    path = Path(path)
+    if path.suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+        return _cast(pq.read_table(path, columns=_present(columns, pq.read_schema(path).names)))
+    if path.suffix in ARROW_SUFFIXES:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)  # Con mmap, leer el schema no copia datos
+        return _cast(table if columns is None else table.select(_present(columns, table.column_names)))
+
+    header = _csv_header(path)
+    selected = header if columns is None else _present(columns, header)
+    types = {c: t for c, t in column_types().items() if c in selected}
+    try:
+        return pacsv.read_csv(
+            path, convert_options=pacsv.ConvertOptions(include_columns=selected, column_types=types)
+        )
+    except pa.ArrowInvalid:
+        if "timestamp" not in types:
+            raise
+        # Timestamps con formato no ISO (o con zona): se leen como texto y se parsean con pandas
+        types["timestamp"] = pa.string()
+        return pacsv.read_csv(
+            path, convert_options=pacsv.ConvertOptions(include_columns=selected, column_types=types)
+        )
+
+
+def load_frame(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    DataFrame tipado (ver column_types()); id queda como string de Arrow y
+    timestamp como datetime64 naive (UTC), con NaT si no se pudo parsear.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    df = read_table(path, columns).to_pandas(
+        types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get,
+        self_destruct=True,
+    )
+    if "timestamp" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True).dt.tz_localize(None)
+    return df
+
+
+def load_training_data(path: Path) -> pd.DataFrame:
+    """Dataset de entrenamiento: FEATURES en float32 y TARGET en float64."""
+    return load_frame(path, [*FEATURES, TARGET])
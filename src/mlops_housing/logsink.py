@@ -0,0 +1,177 @@
+"""
+logsink.py
+----------
+Escritura del log de predicciones fuera del hilo de la request.
+Las filas se encolan en memoria y un hilo dedicado las persiste en lotes,
+según una política de tamaño (filas) y de tiempo (segundos).
+"""
+
+from __future__ import annotations
+import csv
+import io
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+from loguru import logger
+
+try:  # Bloqueo entre procesos (varios workers de uvicorn sobre el mismo archivo)
+    import fcntl
+except ImportError:  # pragma: no cover - plataformas sin fcntl
+    fcntl = None
+
+
+class CsvLogSink:
+    """
+    Destino CSV append-only. Cada lote se serializa en memoria y se escribe
+    con un único write bajo un lock exclusivo, de modo que las filas de
+    distintos procesos nunca se intercalan.
+    """
+
+    def __init__(self, path: Path, columns: Sequence[str]):
+        self.path = Path(path)
+        self.columns = list(columns)
+
+    def write(self, rows: List[Sequence[Any]]) -> None:
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerows(rows)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # El header se escribe solo si el archivo está vacío (recién creado)
+                if f.tell() == 0:
+                    csv.writer(f, lineterminator="\n").writerow(self.columns)
+                f.write(buf.getvalue())
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class TeeSink:
+    """
+    Reenvía cada lote a varios sinks (e.g., CSV + índice de feedback).
+    """
+
+    def __init__(self, *sinks: Any):
+        self.sinks = sinks
+
+    def write(self, rows: List[Sequence[Any]]) -> None:
+        for sink in self.sinks:
+            sink.write(rows)
+
+
+class LogWriter:
+    """
+    Cola en memoria + hilo escritor que vacía las filas al sink en lotes.
+
+    Args:
+        sink: Objeto con método `write(rows)` (e.g., CsvLogSink)
+        max_rows: Se escribe un lote en cuanto se acumulan estas filas
+        flush_interval: Segundos máximos que una fila puede esperar en memoria
+    """
+
+    _STOP = object()
+
+    def __init__(self, sink: Any, max_rows: int = 256, flush_interval: float = 1.0):
+        self.sink = sink
+        self.max_rows = max(1, max_rows)
+        self.flush_interval = max(0.0, flush_interval)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, row: Sequence[Any]) -> None:
+        """Encola una fila (no bloquea)."""
+        self._queue.put([row])
+
+    def write_many(self, rows: List[Sequence[Any]]) -> None:
+        """Encola varias filas como una sola entrada (no bloquea)."""
+        if rows:
+            self._queue.put(rows)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bloquea hasta que todas las filas encoladas hasta ahora estén en disco.
+        Si el hilo no está corriendo, escribe lo pendiente de forma síncrona.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._drain_sync()
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Vacía lo pendiente y detiene el hilo escritor."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(self._STOP)
+            thread.join(timeout)
+        self._drain_sync()
+
+    def _drain_sync(self) -> None:
+        pending: List[Sequence[Any]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, list):
+                pending.extend(item)
+            elif isinstance(item, threading.Event):
+                item.set()
+        self._write(pending)
+
+    def _write(self, rows: List[Sequence[Any]]) -> None:
+        if not rows:
+            return
+        try:
+            self.sink.write(rows)
+        except Exception as e:
+            logger.error(f"Error escribiendo {len(rows)} filas en el log: {e}")
+
+    def _run(self) -> None:
+        pending: List[Sequence[Any]] = []
+        deadline: Optional[float] = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, list):
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.extend(item)
+                if len(pending) < self.max_rows:
+                    continue
+            elif item is None and deadline is not None and time.monotonic() < deadline:
+                continue
+
+            # Vaciado por tamaño, por tiempo, por flush() explícito o por cierre
+            self._write(pending)
+            pending = []
+            deadline = None
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is self._STOP:
+                return
@@ -0,0 +1,168 @@
+"""
+parquet_log.py
+--------------
+Backend columnar para el log de predicciones y feedback.
+Cada lote se escribe como un archivo Parquet dentro de una partición diaria
+(`<dataset>/date=YYYY-MM-DD/part-*.parquet`). La compactación une los archivos
+pequeños de cada partición y la lectura por ventana solo abre las particiones
+necesarias, con proyección de columnas.
+
+Uso de la compactación:
+    python -m mlops_housing.parquet_log --dataset all
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from loguru import logger
+
+from .config import FEATURES, LOG_COLUMNS, PARQUET_LOG_DIR
+
+PREDICTIONS = "predictions"
+FEEDBACK = "feedback"
+FEEDBACK_COLUMNS: List[str] = ["id", "timestamp", "real_price"]
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    PREDICTIONS: pa.schema(
+        [("id", pa.string()), ("timestamp", pa.timestamp("us"))]
+        + [(f, pa.float64()) for f in FEATURES]
+        + [("predicted_price", pa.float64()), ("real_price", pa.float64())]
+    ),
+    FEEDBACK: pa.schema(
+        [("id", pa.string()), ("timestamp", pa.timestamp("us")), ("real_price", pa.float64())]
+    ),
+}
+COLUMNS: Dict[str, List[str]] = {PREDICTIONS: LOG_COLUMNS, FEEDBACK: FEEDBACK_COLUMNS}
+
+
+def _partition_dir(root: Path, dataset: str, day: str) -> Path:
+    return Path(root) / dataset / f"date={day}"
+
+
+def _part_name() -> str:
+    return f"part-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+class ParquetLogSink:
+    """
+    Sink para logsink.LogWriter: agrupa el lote por fecha del timestamp
+    y escribe un archivo Parquet por partición.
+    Las filas deben venir en el orden de COLUMNS[dataset], con timestamp ISO.
+    """
+
+    def __init__(self, root: Path = PARQUET_LOG_DIR, dataset: str = PREDICTIONS):
+        if dataset not in SCHEMAS:
+            raise ValueError(f"Dataset desconocido: {dataset}")
+        self.root = Path(root)
+        self.dataset = dataset
+        self.schema = SCHEMAS[dataset]
+        self._ts_idx = COLUMNS[dataset].index("timestamp")
+
+    def write(self, rows: List[Sequence[Any]]) -> None:
+        by_day: Dict[str, List[Sequence[Any]]] = {}
+        for row in rows:
+            by_day.setdefault(str(row[self._ts_idx])[:10], []).append(row)
+
+        for day, day_rows in by_day.items():
+            columns = list(zip(*day_rows))
+            arrays = []
+            for field, values in zip(self.schema, columns):
+                if field.name == "timestamp":
+                    values = [datetime.fromisoformat(str(v)) for v in values]
+                arrays.append(pa.array(values, type=field.type))
+            table = pa.Table.from_arrays(arrays, schema=self.schema)
+
+            part_dir = _partition_dir(self.root, self.dataset, day)
+            part_dir.mkdir(parents=True, exist_ok=True)
+            # Se escribe a un nombre oculto y se renombra: los lectores nunca ven archivos a medias
+            tmp_path = part_dir / f".{_part_name()}.tmp"
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, part_dir / tmp_path.name[1:-4])
+
+
+def list_partitions(root: Path, dataset: str, since: Optional[date] = None) -> List[Path]:
+    """
+    Particiones existentes del dataset (ordenadas por fecha), opcionalmente desde `since`.
+    """
+    base = Path(root) / dataset
+    if not base.exists():
+        return []
+    parts = []
+    for p in sorted(base.glob("date=*")):
+        try:
+            day = date.fromisoformat(p.name.split("=", 1)[1])
+        except ValueError:
+            continue
+        if since is None or day >= since:
+            parts.append(p)
+    return parts
+
+
+def read_window(
+    root: Path,
+    dataset: str,
+    since: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+) -> pa.Table:
+    """
+    Lee solo las particiones desde `since` (inclusive) y solo las columnas pedidas.
+    """
+    schema = SCHEMAS[dataset]
+    files = [str(f) for p in list_partitions(root, dataset, since) for f in sorted(p.glob("part-*.parquet"))]
+    if not files:
+        names = columns or schema.names
+        return pa.Table.from_pylist([], schema=pa.schema([schema.field(c) for c in names]))
+    return ds.dataset(files, schema=schema, format="parquet").to_table(columns=columns)
+
+
+def compact(root: Path = PARQUET_LOG_DIR, dataset: str = PREDICTIONS, min_files: int = 2) -> int:
+    """
+    Une los archivos de cada partición con al menos `min_files` archivos en uno solo.
+    Solo toca los archivos que existían al comenzar, por lo que puede correr
+    mientras la API sigue escribiendo lotes nuevos.
+
+    Returns:
+        Número de particiones compactadas.
+    """
+    compacted = 0
+    for part_dir in list_partitions(root, dataset):
+        files = sorted(part_dir.glob("part-*.parquet"))
+        if len(files) < max(2, min_files):
+            continue
+
+        table = ds.dataset([str(f) for f in files], schema=SCHEMAS[dataset], format="parquet").to_table()
+        table = table.sort_by("timestamp")
+        tmp_path = part_dir / f".{_part_name()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_dir / tmp_path.name[1:-4])
+        for f in files:
+            f.unlink()
+
+        compacted += 1
+        logger.info(f"{part_dir}: {len(files)} archivos -> 1 ({table.num_rows} filas)")
+    return compacted
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Compacta las particiones Parquet del log de predicciones")
+    parser.add_argument("--root", type=str, default=str(PARQUET_LOG_DIR))
+    parser.add_argument("--dataset", choices=[PREDICTIONS, FEEDBACK, "all"], default="all")
+    parser.add_argument("--min_files", type=int, default=2)
+    args = parser.parse_args()
+
+    datasets = [PREDICTIONS, FEEDBACK] if args.dataset == "all" else [args.dataset]
+    for dataset in datasets:
+        n = compact(Path(args.root), dataset, args.min_files)
+        logger.success(f"[{dataset}] particiones compactadas: {n}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -6,13 +6,17 @@ Incluye las etapas de preprocesamiento e inferencia en un único objeto sklearn.
 """
 
 from __future__ import annotations
-from typing import List
+from typing import Any, Dict, List, Optional
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.compose import ColumnTransformer
 
-def build_pipeline(features: List[str]) -> Pipeline:
+def build_pipeline(
+    features: List[str],
+    n_jobs: Optional[int] = None,
+    model_params: Optional[Dict[str, Any]] = None,
+) -> Pipeline:
     """
     Construye un pipeline de sklearn con:
       1. Imputador de mediana para cada feature numérica
@@ -20,6 +24,10 @@ def build_pipeline(features: List[str]) -> Pipeline:
 
     Args:
         features: Lista de columnas (features) que se usarán para el modelo.
+        n_jobs: Hilos para entrenar los árboles en paralelo (None = 1).
+            No cambia el resultado: los árboles dependen solo de random_state.
+        model_params: Hiperparámetros del RandomForest que reemplazan a los
+            valores por defecto (e.g., el ganador de la búsqueda en search.py).
 
     Returns:
         Pipeline completamente configurado (listo para .fit() / .predict()).
@@ -35,10 +43,8 @@ def build_pipeline(features: List[str]) -> Pipeline:
     )
 
     # Modelo
-    model = RandomForestRegressor(
-        n_estimators=100,
-        random_state=42
-    )
+    params = {"n_estimators": 100, "random_state": 42, **(model_params or {})}
+    model = RandomForestRegressor(n_jobs=n_jobs, **params)
 
     # Pipeline completo
     pipeline = Pipeline(
@@ -4,19 +4,199 @@ registry.py
 Encargado de guardar y cargar el modelo entrenado en producción.
 Utiliza un enfoque simple basado en filesystem y version.json.
 Para usarse junto a MLflow como sistema de tracking.
+
+Además de version.json (puntero a la versión activa) mantiene un índice
+(artifacts/index.json) con la metadata de todos los runs: tag, timestamp,
+métricas, tamaño y checksum del artefacto, e historial de promociones, para
+listar, comparar, promover o hacer rollback sin recorrer artifacts/.
+Ambos archivos se escriben de forma atómica (archivo temporal + rename).
+
+Cada run puede guardarse en varios formatos (joblib comprimido, variante sin
+comprimir para mmap, bosque compilado float32); formats.json registra tamaño
+y tiempo de carga de cada uno y load_run elige el más rápido que reproduzca
+las predicciones del modelo original sobre un probe set guardado en el run.
 """
 
 from __future__ import annotations
+import argparse
+import hashlib
 import json
+import os
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import joblib
+import numpy as np
+from .compiled import CompiledForest
 from .config import ARTIFACTS_DIR
+from .drift import REFERENCE_FILE
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:  # Bloqueo entre procesos (varios entrenamientos registrando a la vez)
+    import fcntl
+except ImportError:  # pragma: no cover - plataformas sin fcntl
+    fcntl = None
 
 VERSION_FILE = ARTIFACTS_DIR / "version.json"
+INDEX_FILE = ARTIFACTS_DIR / "index.json"
+_LOCK_FILE = ARTIFACTS_DIR / ".index.lock"
+
+# Formatos de artefacto (el canónico, model.joblib, siempre se escribe)
+MODEL_FILE = "model.joblib"
+FORMATS_FILE = "formats.json"
+PROBE_FILE = "probe.joblib"
+TRAINING_FILE = "training.json"
+FORMAT_FILES = {"joblib": MODEL_FILE, "mmap": "model.mmap.joblib", "slim": "model.slim.joblib"}
+# Tolerancia frente al modelo original (el bosque float32 redondea los valores de las hojas)
+FORMAT_ATOL = {"joblib": 0.0, "mmap": 0.0, "slim": 1e-4}
+
+Compress = Union[int, Tuple[str, int]]
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    """Escribe en un temporal del mismo directorio y lo renombra sobre `path`."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _index_lock() -> Iterator[None]:
+    """Lock exclusivo para los read-modify-write del índice."""
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(_LOCK_FILE, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _run_entry(run_dir: Path, metrics: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Metadata de un run: se arma una sola vez, al registrarlo."""
+    run_dir = Path(run_dir)
+    stamp, _, tag = run_dir.name.partition("_")
+    model_path = run_dir / "model.joblib"
+    if metrics is None:
+        metrics_path = run_dir / "metrics.json"
+        metrics = json.loads(metrics_path.read_text(encoding="utf-8")) if metrics_path.exists() else {}
+    try:
+        timestamp = datetime.strptime(stamp, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).isoformat()
+    except ValueError:
+        timestamp = None
+    return {
+        "run_id": run_dir.name,
+        "tag": tag,
+        "timestamp": timestamp,
+        "path": str(run_dir),
+        "metrics": metrics,
+        "model_bytes": model_path.stat().st_size if model_path.exists() else None,
+        "size_bytes": sum(p.stat().st_size for p in run_dir.iterdir() if p.is_file()),
+        "sha256": _sha256(model_path) if model_path.exists() else None,
+        "formats": _read_formats(run_dir),
+    }
+
+
+def _scan_runs() -> Dict[str, Any]:
+    """Reconstruye el índice recorriendo artifacts/ (solo si no existe)."""
+    runs = {}
+    if ARTIFACTS_DIR.exists():
+        for run_dir in sorted(ARTIFACTS_DIR.iterdir()):
+            if run_dir.is_dir() and (run_dir / "metrics.json").exists():
+                runs[run_dir.name] = _run_entry(run_dir)
+    history = []
+    if VERSION_FILE.exists():
+        history.append(read_pointer().name)
+    return {"runs": runs, "history": history}
+
+
+def read_index() -> Dict[str, Any]:
+    """
+    Lee el índice de runs ({"runs": {run_id: metadata}, "history": [...]}).
+    Si todavía no existe se reconstruye a partir de artifacts/.
+    """
+    if INDEX_FILE.exists():
+        return json.loads(INDEX_FILE.read_text(encoding="utf-8"))
+    return _scan_runs()
+
+
+def _write_pointer(run_dir: Path) -> None:
+    _atomic_write_text(VERSION_FILE, json.dumps({"current": str(run_dir)}, indent=2))
+
+def _read_formats(run_dir: Path) -> Dict[str, Any]:
+    path = Path(run_dir) / FORMATS_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _matches_probe(model: Any, probe: Dict[str, Any], atol: float) -> bool:
+    pred = np.asarray(model.predict(probe["X"]), dtype=np.float64)
+    return pred.shape == probe["y"].shape and bool(np.allclose(pred, probe["y"], rtol=0.0, atol=atol))
+
 
-def save_run(model: Any, metrics: Dict[str, float], tag: str) -> Path:
+def _write_formats(model: Any, run_dir: Path, compress: Compress, formats: Iterable[str],
+                   probe: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Escribe las variantes pedidas del artefacto (además de model.joblib) y
+    registra tamaño y tiempo de carga de cada una en formats.json.
+    """
+    artifacts: Dict[str, Any] = {"joblib": model}
+    mmap_able = {"joblib": compress in (0, None)}
+    if "mmap" in formats and not mmap_able["joblib"]:
+        artifacts["mmap"] = model
+        mmap_able["mmap"] = True
+    if "slim" in formats:
+        try:
+            artifacts["slim"] = CompiledForest.from_pipeline(model).slim()
+            mmap_able["slim"] = True
+        except (ValueError, KeyError, AttributeError):
+            pass  # Pipeline no compatible con el motor compilado
+
+    if probe is not None:
+        joblib.dump({"X": probe, "y": np.asarray(model.predict(probe), dtype=np.float64)}, run_dir / PROBE_FILE)
+
+    meta = {}
+    for name, obj in artifacts.items():
+        path = run_dir / FORMAT_FILES[name]
+        if name != "joblib":
+            joblib.dump(obj, path, compress=0)
+        start = time.perf_counter()
+        joblib.load(path)
+        codec = list(compress) if isinstance(compress, tuple) else compress
+        meta[name] = {
+            "file": path.name,
+            "compress": codec if name == "joblib" else 0,
+            "mmap": mmap_able[name],
+            "bytes": path.stat().st_size,
+            "load_seconds": time.perf_counter() - start,
+            "atol": FORMAT_ATOL[name],
+        }
+    (run_dir / FORMATS_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+def save_run(model: Any, metrics: Dict[str, float], tag: str, compress: Compress = 0,
+             reference: Optional[Dict[str, Any]] = None, formats: Iterable[str] = (),
+             probe: Optional[pd.DataFrame] = None,
+             training: Optional[Dict[str, Any]] = None) -> Path:
     """
     Guarda el modelo entrenado y sus métricas en una carpeta única (timestamp + tag).
     Actualiza 'version.json' para indicar la versión activa.
@@ -25,6 +205,17 @@ def save_run(model: Any, metrics: Dict[str, float], tag: str) -> Path:
         model: Pipeline entrenado (sklearn)
         metrics: Diccionario con métricas registradas (e.g., RMSE, R2)
         tag: Etiqueta (ejemplo: "rf_v1")
+        compress: Nivel de compresión de joblib (0-9) o (códec, nivel), e.g.
+            ("lzma", 3). Con 0 el artefacto queda sin comprimir y puede
+            cargarse con mmap_mode='r'.
+        reference: Perfil de referencia para el monitoreo de drift
+            (ver drift.build_reference), se guarda junto a metrics.json.
+        formats: Variantes adicionales: "mmap" (copia sin comprimir si
+            `compress` comprime) y/o "slim" (CompiledForest float32).
+        probe: Filas de ejemplo; se guardan con las predicciones del modelo
+            original para verificar cada formato al cargarlo.
+        training: Metadatos del entrenamiento (e.g. hasta qué feedback se
+            usó), se guardan en training.json antes de activar la versión.
 
     Returns:
         Path del directorio del run generado.
@@ -34,25 +225,144 @@ def save_run(model: Any, metrics: Dict[str, float], tag: str) -> Path:
     run_dir.mkdir(parents=True, exist_ok=True)
 
     # Guardar modelo
-    joblib.dump(model, run_dir / "model.joblib")
+    joblib.dump(model, run_dir / MODEL_FILE, compress=compress)
 
     # Guardar métricas
     metrics_path = run_dir / "metrics.json"
     metrics_path.write_text(json.dumps(metrics, indent=2), encoding="utf-8")
 
-    # Registrar versión activa
-    VERSION_FILE.write_text(json.dumps({"current": str(run_dir)}, indent=2), encoding="utf-8")
+    if reference is not None:
+        (run_dir / REFERENCE_FILE).write_text(json.dumps(reference), encoding="utf-8")
+
+    if training is not None:
+        (run_dir / TRAINING_FILE).write_text(json.dumps(training, indent=2), encoding="utf-8")
+
+    # Variantes de formato con su tamaño y tiempo de carga
+    _write_formats(model, run_dir, compress, set(formats), probe)
+
+    # Registrar en el índice y activar la versión
+    entry = _run_entry(run_dir, metrics)
+    with _index_lock():
+        index = read_index()
+        index["runs"][entry["run_id"]] = entry
+        index["history"].append(entry["run_id"])
+        _atomic_write_text(INDEX_FILE, json.dumps(index, indent=2))
+        _write_pointer(run_dir)
 
     return run_dir
 
 
-def load_current() -> Tuple[Any, Path]:
+def list_runs(tag: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Runs registrados (opcionalmente filtrados por tag), del más nuevo al más viejo."""
+    runs = [r for r in read_index()["runs"].values() if tag is None or r["tag"] == tag]
+    return sorted(runs, key=lambda r: r["run_id"], reverse=True)
+
+
+def get_run(run_id: str) -> Dict[str, Any]:
     """
-    Carga el modelo actualmente activo según 'version.json'.
+    Metadata de un run.
+
+    Raises:
+        KeyError si el run no está en el índice
+    """
+    runs = read_index()["runs"]
+    if run_id not in runs:
+        raise KeyError(f"El run '{run_id}' no está registrado.")
+    return runs[run_id]
+
+
+def baseline_rmse(metrics: Dict[str, float]) -> float:
+    """
+    RMSE de referencia de un run para evaluate: el baseline explícito de los
+    runs incrementales, el cv_rmse del entrenamiento completo o, en runs
+    incrementales viejos, el RMSE de su holdout.
+    """
+    for key in ("baseline_rmse", "cv_rmse", "holdout_rmse"):
+        if key in metrics:
+            return float(metrics[key])
+    return float("nan")
+
+
+def compare_runs(run_a: str, run_b: str) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Compara las métricas de dos runs.
 
     Returns:
-        model: Modelo/Pipeline sklearn cargado
-        run_dir: Directorio de la versión activa
+        {métrica: {"a": valor, "b": valor, "delta": b - a}}
+    """
+    a, b = get_run(run_a)["metrics"], get_run(run_b)["metrics"]
+    out = {}
+    for name in sorted(set(a) | set(b)):
+        va, vb = a.get(name), b.get(name)
+        delta = vb - va if isinstance(va, (int, float)) and isinstance(vb, (int, float)) else None
+        out[name] = {"a": va, "b": vb, "delta": delta}
+    return out
+
+
+def _checked_run_dir(index: Dict[str, Any], run_id: str, verify: bool) -> Path:
+    """Directorio de un run del índice, validado antes de activarlo (ver promote)."""
+    if run_id not in index["runs"]:
+        raise KeyError(f"El run '{run_id}' no está registrado.")
+    entry = index["runs"][run_id]
+    run_dir = Path(entry["path"])
+    model_path = run_dir / "model.joblib"
+    if not model_path.exists():
+        raise FileNotFoundError(f"El modelo no se encontró en {model_path}")
+    if verify and entry.get("sha256") and _sha256(model_path) != entry["sha256"]:
+        raise ValueError(f"El checksum de {model_path} no coincide con el índice.")
+    return run_dir
+
+
+def promote(run_id: str, verify: bool = False) -> Path:
+    """
+    Activa un run registrado reescribiendo version.json de forma atómica.
+
+    Args:
+        run_id: Run a activar
+        verify: Si es True, valida el checksum del artefacto antes de activarlo
+
+    Raises:
+        KeyError si el run no está registrado
+        FileNotFoundError si el run ya no tiene modelo
+        ValueError si el checksum no coincide
+    """
+    with _index_lock():
+        index = read_index()
+        run_dir = _checked_run_dir(index, run_id, verify)
+        index["history"].append(run_id)
+        _atomic_write_text(INDEX_FILE, json.dumps(index, indent=2))
+        _write_pointer(run_dir)
+    return run_dir
+
+
+def rollback(verify: bool = False) -> Path:
+    """
+    Vuelve a la versión activa anterior: saca la versión actual del tope del
+    historial de promociones, así rollbacks sucesivos siguen retrocediendo
+    (c -> b -> a) en lugar de alternar entre las dos últimas.
+
+    Raises:
+        ValueError si no hay una versión anterior
+    """
+    with _index_lock():
+        index = read_index()
+        history = list(index["history"])
+        current = history[-1] if history else None
+        while history and history[-1] == current:
+            history.pop()
+        if not history:
+            raise ValueError("No hay una versión anterior a la cual volver.")
+        run_dir = _checked_run_dir(index, history[-1], verify)
+        index["history"] = history
+        _atomic_write_text(INDEX_FILE, json.dumps(index, indent=2))
+        _write_pointer(run_dir)
+    return run_dir
+
+
+def read_pointer() -> Path:
+    """
+    Lee 'version.json' y devuelve el directorio de la versión activa,
+    sin cargar el modelo.
 
     Raises:
         FileNotFoundError si no existe un modelo registrado
@@ -61,13 +371,111 @@ def load_current() -> Tuple[Any, Path]:
         raise FileNotFoundError(
             "No se encontró 'version.json'. Debes entrenar y registrar un modelo primero."
         )
-    
+
     meta = json.loads(VERSION_FILE.read_text(encoding="utf-8"))
-    run_dir = Path(meta["current"])
+    return Path(meta["current"])
 
-    model_path = run_dir / "model.joblib"
+
+def load_run(run_dir: Path, mmap_mode: Optional[str] = None, fmt: str = "auto") -> Any:
+    """
+    Carga el modelo guardado en el directorio de un run.
+
+    Args:
+        run_dir: Directorio del run
+        mmap_mode: Si es 'r', los arrays numpy del artefacto (sin comprimir)
+            se mapean desde disco en lugar de copiarse a memoria, y las páginas
+            se comparten entre procesos a través del page cache. Solo se
+            consideran los formatos sin comprimir.
+        fmt: "auto" prueba los formatos de formats.json del más rápido al más
+            lento y usa el primero que reproduce las predicciones del probe
+            set; "joblib", "mmap" o "slim" fuerzan un formato.
+
+    Raises:
+        FileNotFoundError si el run no tiene modelo
+        ValueError si el formato pedido no existe o no pasa la verificación
+    """
+    run_dir = Path(run_dir)
+    model_path = run_dir / MODEL_FILE
     if not model_path.exists():
         raise FileNotFoundError(f"El modelo no se encontró en {model_path}")
 
-    model = joblib.load(model_path)
+    formats = _read_formats(run_dir)
+    if fmt != "auto" and fmt != "joblib" and fmt not in formats:
+        raise ValueError(f"El run {run_dir.name} no tiene el formato '{fmt}'.")
+    candidates = sorted(formats, key=lambda name: formats[name]["load_seconds"]) if fmt == "auto" else [fmt]
+    if mmap_mode is not None:
+        candidates = [name for name in candidates if formats.get(name, {}).get("mmap", True)]
+
+    probe_path = run_dir / PROBE_FILE
+    probe = joblib.load(probe_path) if probe_path.exists() else None
+    for name in candidates:
+        if name == "joblib":
+            break  # El canónico no necesita verificación
+        if probe is None and fmt == "auto":
+            continue  # Sin probe set no se puede verificar la variante
+        info = formats[name]
+        try:
+            model = joblib.load(run_dir / info["file"], mmap_mode=mmap_mode)
+            if probe is None or _matches_probe(model, probe, info["atol"]):
+                return model
+        except Exception:
+            pass
+        if fmt != "auto":
+            raise ValueError(f"El formato '{fmt}' de {run_dir.name} no reproduce las predicciones del probe set.")
+
+    return joblib.load(model_path, mmap_mode=mmap_mode)
+
+
+def load_current(mmap_mode: Optional[str] = None, fmt: str = "auto") -> Tuple[Any, Path]:
+    """
+    Carga el modelo actualmente activo según 'version.json'.
+
+    Args:
+        mmap_mode: Ver `load_run`.
+        fmt: Ver `load_run`.
+
+    Returns:
+        model: Modelo/Pipeline sklearn cargado (o CompiledForest en formato "slim")
+        run_dir: Directorio de la versión activa
+
+    Raises:
+        FileNotFoundError si no existe un modelo registrado
+    """
+    run_dir = read_pointer()
+    model = load_run(run_dir, mmap_mode=mmap_mode, fmt=fmt)
     return model, run_dir
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Consulta y administra los runs registrados en artifacts/")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="Lista los runs registrados")
+    p_list.add_argument("--tag", type=str, default=None)
+    p_cmp = sub.add_parser("compare", help="Compara las métricas de dos runs")
+    p_cmp.add_argument("run_a")
+    p_cmp.add_argument("run_b")
+    p_promote = sub.add_parser("promote", help="Activa un run registrado")
+    p_promote.add_argument("run_id")
+    p_promote.add_argument("--verify", action="store_true", help="Valida el checksum antes de activar")
+    p_rollback = sub.add_parser("rollback", help="Vuelve a la versión activa anterior")
+    p_rollback.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = read_pointer().name if VERSION_FILE.exists() else None
+        for run in list_runs(args.tag):
+            marker = "*" if run["run_id"] == current else " "
+            rmse = run["metrics"].get("cv_rmse")
+            rmse_text = f"{rmse:.4f}" if isinstance(rmse, (int, float)) else "-"
+            print(f"{marker} {run['run_id']}  cv_rmse={rmse_text}  size={run['size_bytes']}")
+    elif args.command == "compare":
+        for name, values in compare_runs(args.run_a, args.run_b).items():
+            print(f"{name}: {values['a']} -> {values['b']} (delta={values['delta']})")
+    elif args.command == "promote":
+        print(f"Versión activa: {promote(args.run_id, verify=args.verify)}")
+    else:
+        print(f"Versión activa: {rollback(verify=args.verify)}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,226 @@
+"""
+score.py
+--------
+Scoring masivo offline con el modelo activo.
+Lee un CSV o Parquet por bloques (pyarrow, sin cargar el archivo completo),
+reparte los bloques entre un pool de procesos que cargan el modelo una sola
+vez cada uno (con mmap si el artefacto está sin comprimir) y escribe las
+predicciones en Parquet con un ID por fila. Opcionalmente agrega todas las
+filas al log de predicciones en bloque, para poder recibir feedback.
+
+Uso:
+    python -m mlops_housing.score --input inventario.csv --output precios.parquet
+    python -m mlops_housing.score --input inventario.parquet --output precios.parquet --workers 8 --append-log
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from .config import FEATURES, LOG_PATH, LOG_COLUMNS, FEEDBACK_DB_PATH, PARQUET_LOG_DIR
+from .registry import read_pointer, load_current, load_run
+
+_CSV_BYTES_PER_ROW = 64  # Aproximado, para traducir chunksize (filas) a bloques de lectura
+
+# Modelo del proceso worker (se carga una vez en el initializer)
+_SERVED = None
+
+
+def _served(model: Any, run_dir: Path, engine: str):
+    from .api.model_manager import ServedModel
+
+    served = ServedModel(model, run_dir, engine=engine)
+    served.warm_up()
+    if hasattr(served.model, "set_params"):  # El paralelismo lo dan los procesos del pool
+        try:
+            served.model.set_params(model__n_jobs=1)
+        except ValueError:
+            pass
+    return served
+
+
+def _init_worker(run_dir: str, mmap_mode: Optional[str], fmt: str, engine: str) -> None:
+    global _SERVED
+    _SERVED = _served(load_run(Path(run_dir), mmap_mode=mmap_mode, fmt=fmt), Path(run_dir), engine)
+
+
+def _score_chunk(X: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    """Predice un bloque en el worker y genera los IDs de sus predicciones."""
+    preds = np.round(_SERVED.predict_matrix(X).astype(float), 3)
+    return [str(uuid.uuid4()) for _ in range(len(X))], preds
+
+
+def iter_batches(path: Path, chunksize: int, columns: List[str]) -> Iterator[pa.RecordBatch]:
+    """Bloques de ~`chunksize` filas de un CSV o Parquet, solo con `columns`."""
+    path = Path(path)
+    if path.suffix in (".parquet", ".pq"):
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+        return
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=max(1 << 20, chunksize * _CSV_BYTES_PER_ROW)),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={f: pa.float64() for f in FEATURES},
+        ),
+    )
+    yield from reader
+
+
+def _matrix(batch: pa.RecordBatch) -> np.ndarray:
+    """Matriz (n_filas, n_features) en el orden de FEATURES; los nulos quedan como NaN."""
+    return np.column_stack([
+        batch.column(batch.schema.get_field_index(f)).to_numpy(zero_copy_only=False).astype(float)
+        for f in FEATURES
+    ])
+
+
+def _log_sink(backend: str):
+    """Mismo destino que la API: log (CSV o Parquet por día) + índice de feedback."""
+    from .feedback_store import FeedbackStore
+    from .logsink import CsvLogSink, TeeSink
+
+    if backend == "parquet":
+        from .parquet_log import ParquetLogSink, PREDICTIONS
+        log = ParquetLogSink(PARQUET_LOG_DIR, PREDICTIONS)
+    else:
+        log = CsvLogSink(LOG_PATH, LOG_COLUMNS)
+    store = FeedbackStore(FEEDBACK_DB_PATH)
+    return TeeSink(log, store), store
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    chunksize: int = 250_000,
+    workers: Optional[int] = None,
+    engine: str = "sklearn",
+    mmap: bool = True,
+    fmt: str = "auto",
+    key: Optional[str] = None,
+    append_log: bool = False,
+    progress: bool = True,
+) -> Dict[str, Any]:
+    """
+    Puntúa `input_path` con el modelo activo y escribe `output_path` (Parquet)
+    con las columnas [key], id y predicted_price, en el orden de entrada.
+
+    Args:
+        workers: Procesos del pool (None = todos los cores; 0 = en este proceso)
+        mmap: Carga el modelo con mmap_mode='r' en los workers (páginas compartidas)
+        key: Columna del input que se copia a la salida (e.g. ID del inmueble)
+        append_log: Agrega las predicciones al log y al índice de feedback
+
+    Returns:
+        Resumen con filas, segundos, filas/s y run del modelo.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    mmap_mode = "r" if mmap else None
+    columns = [*FEATURES, key] if key else list(FEATURES)
+    timestamp = datetime.utcnow().isoformat()
+
+    global _SERVED
+    executor = None
+    if workers > 0:
+        run_dir = read_pointer()  # Todos los workers usan la misma versión
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(str(run_dir), mmap_mode, fmt, engine),
+        )
+    else:
+        model, run_dir = load_current(mmap_mode=mmap_mode, fmt=fmt)
+        _SERVED = _served(model, run_dir, engine)
+
+    sink, store = _log_sink(os.getenv("LOG_BACKEND", "csv")) if append_log else (None, None)
+    writer: Optional[pq.ParquetWriter] = None
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    n_rows, start = 0, time.perf_counter()
+
+    def _write(batch: pa.RecordBatch, X: np.ndarray, ids: List[str], preds: np.ndarray) -> None:
+        nonlocal writer, n_rows
+        out = {key: batch.column(batch.schema.get_field_index(key))} if key else {}
+        out.update({"id": pa.array(ids, pa.string()), "predicted_price": pa.array(preds, pa.float64())})
+        table = pa.table(out)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+        if sink is not None:
+            sink.write([[pid, timestamp, *row, p, None] for pid, row, p in zip(ids, X.tolist(), preds.tolist())])
+        n_rows += len(ids)
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"[score] {n_rows:,} filas | {n_rows / elapsed:,.0f} filas/s", flush=True)
+
+    try:
+        # Ventana acotada de bloques en vuelo: memoria constante y salida en orden
+        pending: deque = deque()
+        for batch in iter_batches(Path(input_path), chunksize, columns):
+            X = _matrix(batch)
+            if executor is None:
+                _write(batch, X, *_score_chunk(X))
+                continue
+            pending.append((batch, X, executor.submit(_score_chunk, X)))
+            if len(pending) >= 2 * workers:
+                b, x, future = pending.popleft()
+                _write(b, x, *future.result())
+        while pending:
+            b, x, future = pending.popleft()
+            _write(b, x, *future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if writer is not None:
+            writer.close()
+        if store is not None:
+            store.close()
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "rows": n_rows,
+        "seconds": seconds,
+        "rows_per_second": n_rows / seconds if seconds > 0 else float("nan"),
+        "run_id": Path(run_dir).name,
+        "output": str(output_path),
+    }
+    if progress:
+        print(
+            f"[score] {n_rows:,} filas en {seconds:.1f}s ({summary['rows_per_second']:,.0f} filas/s) "
+            f"con {summary['run_id']} -> {output_path}"
+        )
+    return summary
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Scoring masivo offline con el modelo activo")
+    parser.add_argument("--input", type=str, required=True, help="CSV o Parquet con las columnas de FEATURES")
+    parser.add_argument("--output", type=str, required=True, help="Parquet de salida (id, predicted_price)")
+    parser.add_argument("--chunksize", type=int, default=250_000, help="Filas aproximadas por bloque")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (default: todos los cores; 0 = sin pool)")
+    parser.add_argument("--engine", type=str, default="sklearn", choices=["sklearn", "compiled"])
+    parser.add_argument("--format", type=str, default="auto", help="Formato del artefacto (auto, joblib, mmap, slim)")
+    parser.add_argument("--no-mmap", action="store_true", help="Carga el modelo completo en cada worker")
+    parser.add_argument("--key", type=str, default=None, help="Columna del input que se copia a la salida")
+    parser.add_argument("--append-log", action="store_true",
+                        help="Agrega las predicciones al log y al índice de feedback")
+    args = parser.parse_args()
+    score_file(
+        args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+        engine=args.engine, mmap=not args.no_mmap, fmt=args.format, key=args.key,
+        append_log=args.append_log,
+    )
+
+
+if __name__ == "__main__":
+    cli()
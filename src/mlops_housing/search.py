@@ -0,0 +1,144 @@
+"""
+search.py
+---------
+Búsqueda de hiperparámetros del RandomForest con successive halving.
+Todos los candidatos se evalúan con CV sobre una fracción de los datos y
+solo el mejor 1/eta pasa a la siguiente ronda, con eta veces más datos;
+la última ronda usa el dataset completo. Los candidatos de cada ronda se
+evalúan en paralelo (un proceso por candidato).
+
+Cada trial registra, además del RMSE de CV, la latencia de predicción de
+una fila y el tamaño serializado del modelo, para poder elegir un bosque
+más chico y rápido a cambio de un poco de RMSE.
+"""
+
+from __future__ import annotations
+import math
+import pickle
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import KFold, ParameterSampler, cross_validate
+
+from .pipeline import build_pipeline
+
+# Espacio de búsqueda (incluye bosques chicos para favorecer latencia y tamaño)
+SEARCH_SPACE: Dict[str, List[Any]] = {
+    "n_estimators": [10, 25, 50, 100, 200],
+    "max_depth": [None, 6, 10, 16],
+    "min_samples_split": [2, 5, 10],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+
+
+@dataclass
+class Trial:
+    """Resultado de evaluar un candidato en una ronda."""
+    candidate: int
+    rung: int
+    n_samples: int
+    params: Dict[str, Any]
+    cv_rmse: float
+    cv_r2: float
+    fit_seconds: float
+    latency_ms: float = float("nan")
+    model_size_bytes: int = 0
+    estimator: Any = field(default=None, repr=False)
+
+
+def _evaluate(candidate: int, rung: int, params: Dict[str, Any], features: List[str],
+              X: pd.DataFrame, y: pd.Series, k: int) -> Trial:
+    model = build_pipeline(features, model_params=params)
+    cv = KFold(n_splits=k, shuffle=True, random_state=42)
+    start = time.perf_counter()
+    scores = cross_validate(
+        model, X, y, cv=cv, return_estimator=True,
+        scoring={"rmse": "neg_root_mean_squared_error", "r2": "r2"},
+    )
+    return Trial(
+        candidate=candidate,
+        rung=rung,
+        n_samples=len(X),
+        params=params,
+        cv_rmse=float(-scores["test_rmse"].mean()),
+        cv_r2=float(scores["test_r2"].mean()),
+        fit_seconds=time.perf_counter() - start,
+        estimator=scores["estimator"][0],
+    )
+
+
+def measure_latency_ms(model: Any, X_row: pd.DataFrame, repeats: int = 20) -> float:
+    """Mediana de la latencia de predecir una fila, en milisegundos."""
+    model.predict(X_row)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X_row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000.0)
+
+
+def model_size_bytes(model: Any) -> int:
+    """Tamaño del modelo serializado (pickle), en bytes."""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def successive_halving(
+    X: pd.DataFrame,
+    y: pd.Series,
+    features: List[str],
+    n_candidates: int = 24,
+    eta: int = 3,
+    k: int = 5,
+    n_jobs: Optional[int] = -1,
+    random_state: int = 42,
+) -> List[Trial]:
+    """
+    Ejecuta la búsqueda y devuelve todos los trials (todas las rondas),
+    con latencia y tamaño medidos secuencialmente para no mezclar la
+    medición con la carga de los procesos en paralelo.
+    """
+    candidates = list(ParameterSampler(SEARCH_SPACE, n_iter=n_candidates, random_state=random_state))
+    n_rungs = int(math.floor(math.log(len(candidates), eta))) + 1
+    order = np.random.default_rng(random_state).permutation(len(X))
+    X_row = X.iloc[[0]]
+
+    trials: List[Trial] = []
+    alive = list(range(len(candidates)))
+    for rung in range(n_rungs):
+        n_samples = max(k * 10, int(len(X) * eta ** (rung - n_rungs + 1)))
+        idx = order[:min(n_samples, len(X))]
+        X_r, y_r = X.iloc[idx], y.iloc[idx]
+
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate)(c, rung, candidates[c], features, X_r, y_r, k) for c in alive
+        )
+        for trial in results:
+            trial.latency_ms = measure_latency_ms(trial.estimator, X_row)
+            trial.model_size_bytes = model_size_bytes(trial.estimator)
+            trial.estimator = None
+        trials.extend(results)
+
+        # Sobreviven los mejores 1/eta (por RMSE) a la siguiente ronda
+        ranked = sorted(results, key=lambda t: t.cv_rmse)
+        alive = [t.candidate for t in ranked[:max(1, math.ceil(len(ranked) / eta))]]
+
+    return trials
+
+
+def select_winner(trials: List[Trial], rmse_tolerance: float = 0.0) -> Trial:
+    """
+    Elige entre los trials de la última ronda: el más rápido cuyo RMSE esté
+    dentro de `rmse_tolerance` (relativo) del mejor RMSE. Con tolerancia 0
+    gana simplemente el de menor RMSE.
+    """
+    last_rung = max(t.rung for t in trials)
+    final = [t for t in trials if t.rung == last_rung]
+    best_rmse = min(t.cv_rmse for t in final)
+    eligible = [t for t in final if t.cv_rmse <= best_rmse * (1.0 + rmse_tolerance)]
+    return min(eligible, key=lambda t: (t.latency_ms, t.cv_rmse))
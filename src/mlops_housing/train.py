@@ -7,32 +7,69 @@ y guarda la versión final del modelo en artifacts/.
 
 from __future__ import annotations
 import argparse
-from typing import Dict, Tuple
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import KFold, cross_val_score
+from joblib import cpu_count
+from sklearn.model_selection import KFold, cross_validate
 from sklearn.metrics import mean_squared_error, r2_score
 from loguru import logger
-import mlflow
-import mlflow.sklearn
 
 from .config import FEATURES, TARGET, DEFAULT_DATA_PATH
+from .drift import build_reference
+from .loader import load_training_data
 from .pipeline import build_pipeline
 from .registry import save_run
+from .search import successive_halving, select_winner
 
 
-def evaluate_cv(model, X: pd.DataFrame, y: pd.Series, k: int = 5) -> Tuple[float, float]:
+def resolve_jobs(n_jobs: Optional[int], k: int = 5) -> Tuple[int, int]:
     """
-    Calcula RMSE y R2 mediante validación cruzada.
+    Reparte los cores disponibles entre folds (procesos) y árboles (hilos)
+    sin sobresuscribir la máquina.
+
+    Args:
+        n_jobs: Cores totales a usar (None/-1 = todos)
+        k: Número de folds
+
+    Returns:
+        (cv_jobs, tree_jobs)
+    """
+    total = cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+    cv_jobs = max(1, min(k, total))
+    tree_jobs = max(1, total // cv_jobs)
+    return cv_jobs, tree_jobs
+
+
+def evaluate_cv(
+    model, X: pd.DataFrame, y: pd.Series, k: int = 5, n_jobs: Optional[int] = None
+) -> Tuple[float, float]:
+    """
+    Calcula RMSE y R2 mediante validación cruzada, en una sola pasada
+    (cada fold se entrena una vez y se evalúa con ambos scorers).
+
+    Args:
+        n_jobs: Procesos para correr los folds en paralelo (None = 1)
     """
     cv = KFold(n_splits=k, shuffle=True, random_state=42)
-    rmse = -cross_val_score(model, X, y, scoring="neg_root_mean_squared_error", cv=cv).mean()
-    r2 = cross_val_score(model, X, y, scoring="r2", cv=cv).mean()
+    scores = cross_validate(
+        model, X, y, cv=cv, n_jobs=n_jobs,
+        scoring={"rmse": "neg_root_mean_squared_error", "r2": "r2"},
+    )
+    rmse = -scores["test_rmse"].mean()
+    r2 = scores["test_r2"].mean()
     return float(rmse), float(r2)
 
 
-def train_and_register(data_path: str, tag: str = "rf") -> Dict[str, float]:
+def train_and_register(
+    data_path: str,
+    tag: str = "rf",
+    n_jobs: Optional[int] = -1,
+    model_params: Optional[Dict[str, Any]] = None,
+    compress: Any = 0,
+    formats: Sequence[str] = (),
+) -> Dict[str, float]:
     """
     Pipeline completo de entrenamiento con MLflow:
       1. Cargar datos
@@ -40,24 +77,39 @@ def train_and_register(data_path: str, tag: str = "rf") -> Dict[str, float]:
       3. Entrenar sobre todo el dataset
       4. Logear en MLflow
       5. Guardar artefacto en artifacts/
+
+    Args:
+        n_jobs: Cores a usar (-1 = todos). Las métricas no dependen de este valor.
+        model_params: Hiperparámetros del RandomForest (default: los de build_pipeline)
+        compress: Compresión de model.joblib: nivel (0-9) o (códec, nivel)
+        formats: Variantes extra del artefacto ("mmap", "slim"), ver registry.save_run
     """
     logger.info(f"Cargando dataset desde: {data_path}")
-    df = pd.read_csv(data_path)
+    df = load_training_data(data_path)  # Features float32, parser multihilo de pyarrow
 
-    X = df[FEATURES].copy()
-    y = df[TARGET].copy()
+    X, y = df[FEATURES], df[TARGET]
+    del df
+
+    cv_jobs, tree_jobs = resolve_jobs(n_jobs, k=5)
 
     logger.info("Construyendo pipeline de producción...")
-    model = build_pipeline(FEATURES)
+    model = build_pipeline(FEATURES, n_jobs=tree_jobs, model_params=model_params)
+
+    # Anidado cuando se llama desde search_and_register
+    import mlflow  # Import diferido: pesado y solo necesario al entrenar
+    import mlflow.sklearn
 
-    with mlflow.start_run():
+    with mlflow.start_run(nested=mlflow.active_run() is not None):
         # Evaluación con CV previa al entrenamiento final
-        logger.info("Ejecutando validación cruzada (CV)")
-        cv_rmse, cv_r2 = evaluate_cv(model, X, y, k=5)
+        logger.info(f"Ejecutando validación cruzada (CV) con {cv_jobs} procesos x {tree_jobs} hilos")
+        cv_rmse, cv_r2 = evaluate_cv(model, X, y, k=5, n_jobs=cv_jobs)
 
-        # Entrenar sobre todo el dataset
+        # Entrenar sobre todo el dataset (con todos los cores para los árboles)
         logger.info("Entrenando modelo final con todo el dataset")
+        model.set_params(model__n_jobs=cv_jobs * tree_jobs)
         model.fit(X, y)
+        # En producción se predice fila a fila: sin pool de hilos por request
+        model.set_params(model__n_jobs=None)
         y_hat = model.predict(X)
 
         # Métricas sobre train completo (solo para monitoreo, no para selección)
@@ -77,7 +129,9 @@ def train_and_register(data_path: str, tag: str = "rf") -> Dict[str, float]:
 
         mlflow.log_metrics(metrics)
         mlflow.log_param("model_type", "RandomForestRegressor")
-        mlflow.log_param("n_estimators", 100)
+        mlflow.log_param("n_estimators", model.named_steps["model"].n_estimators)
+        if model_params:
+            mlflow.log_params(model_params)
 
         # Log del modelo con input_example y sin artifact_path (usamos name="model")
         mlflow.sklearn.log_model(
@@ -89,19 +143,119 @@ def train_and_register(data_path: str, tag: str = "rf") -> Dict[str, float]:
 
         # Guardamos también en artifacts/ para que lo cargue la API fácilmente
         logger.info("Guardando artefactos en carpeta local artifacts/")
-        run_dir = save_run(model, metrics, tag=tag)
+        run_dir = save_run(
+            model, metrics, tag=tag, compress=compress,
+            reference=build_reference(X, y_hat),
+            formats=formats, probe=X.sample(min(64, len(X)), random_state=0),
+        )
 
     logger.success(f"Entrenamiento completado. Artefactos guardados en: {run_dir}")
     return metrics
 
 
+def search_and_register(
+    data_path: str,
+    tag: str = "rf_search",
+    n_jobs: Optional[int] = -1,
+    n_candidates: int = 24,
+    eta: int = 3,
+    rmse_tolerance: float = 0.0,
+    compress: Any = 0,
+    formats: Sequence[str] = (),
+) -> Dict[str, float]:
+    """
+    Búsqueda de hiperparámetros con successive halving (ver search.py):
+      1. Evaluar candidatos por rondas, en paralelo, descartando los peores
+      2. Logear cada trial (RMSE, latencia, tamaño) como run anidado en MLflow
+      3. Entrenar y registrar solo el ganador con train_and_register
+
+    Args:
+        rmse_tolerance: Tolerancia relativa sobre el mejor RMSE dentro de la cual
+            se prefiere el modelo más rápido (e.g., 0.02 = hasta 2% peor)
+    """
+    logger.info(f"Cargando dataset desde: {data_path}")
+    df = load_training_data(data_path)
+    X, y = df[FEATURES], df[TARGET]
+    del df
+
+    import mlflow
+
+    with mlflow.start_run(run_name=f"search_{tag}"):
+        mlflow.log_params({"n_candidates": n_candidates, "eta": eta, "rmse_tolerance": rmse_tolerance})
+
+        logger.info(f"Búsqueda con successive halving: {n_candidates} candidatos, eta={eta}")
+        trials = successive_halving(X, y, FEATURES, n_candidates=n_candidates, eta=eta, n_jobs=n_jobs)
+
+        for t in trials:
+            with mlflow.start_run(run_name=f"trial_{t.candidate}_rung{t.rung}", nested=True):
+                mlflow.log_params({**t.params, "rung": t.rung, "n_samples": t.n_samples})
+                mlflow.log_metrics({
+                    "cv_rmse": t.cv_rmse,
+                    "cv_r2": t.cv_r2,
+                    "latency_ms": t.latency_ms,
+                    "model_size_bytes": t.model_size_bytes,
+                    "fit_seconds": t.fit_seconds,
+                })
+
+        winner = select_winner(trials, rmse_tolerance)
+        logger.info(
+            f"Ganador: {winner.params} (cv_rmse={winner.cv_rmse:.3f}, "
+            f"latencia={winner.latency_ms:.2f} ms, tamaño={winner.model_size_bytes / 1e6:.1f} MB)"
+        )
+        mlflow.log_metrics({"best_cv_rmse": winner.cv_rmse, "best_latency_ms": winner.latency_ms})
+
+        return train_and_register(
+            data_path, tag, n_jobs=n_jobs, model_params=winner.params, compress=compress, formats=formats,
+        )
+
+
+def parse_compress(text: str) -> Any:
+    """'3' -> 3, 'lzma:3' -> ('lzma', 3), 'zlib' -> ('zlib', 3)."""
+    if ":" not in text and text.isdigit():
+        return int(text)
+    codec, _, level = text.partition(":")
+    return codec, int(level or 3)
+
+
 def cli():
     parser = argparse.ArgumentParser(description="Entrena y registra un modelo RandomForest")
     parser.add_argument("--data_path", type=str, default=str(DEFAULT_DATA_PATH))
     parser.add_argument("--tag", type=str, default="rf")
+    parser.add_argument("--n_jobs", type=int, default=-1, help="Cores para CV y árboles (-1 = todos)")
+    parser.add_argument("--search", action="store_true", help="Búsqueda de hiperparámetros con successive halving")
+    parser.add_argument("--n_candidates", type=int, default=24)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--rmse_tolerance", type=float, default=0.0,
+                        help="Acepta hasta este RMSE relativo extra a cambio de menor latencia "
+                             "(o frente al modelo anterior con --incremental)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Agrega árboles al modelo activo con el feedback nuevo (warm_start + holdout)")
+    parser.add_argument("--n_new_trees", type=int, default=20)
+    parser.add_argument("--max_trees", type=int, default=200)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fracción del feedback nuevo para validar")
+    parser.add_argument("--compress", type=str, default="0",
+                        help="Compresión de model.joblib: nivel (0-9) o códec:nivel (zlib, gzip, bz2, lzma, xz, lz4)")
+    parser.add_argument("--formats", type=str, default="",
+                        help="Variantes extra separadas por coma: mmap (sin comprimir), slim (bosque float32)")
     args = parser.parse_args()
+    compress = parse_compress(args.compress)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
 
-    train_and_register(args.data_path, args.tag)
+    if args.incremental:
+        from .incremental import retrain_incremental
+        retrain_incremental(
+            args.data_path, tag=args.tag if args.tag != "rf" else "rf_incremental",
+            n_new_trees=args.n_new_trees, max_trees=args.max_trees, holdout=args.holdout,
+            rmse_tolerance=args.rmse_tolerance, n_jobs=args.n_jobs, formats=formats,
+        )
+    elif args.search:
+        search_and_register(
+            args.data_path, args.tag, n_jobs=args.n_jobs,
+            n_candidates=args.n_candidates, eta=args.eta, rmse_tolerance=args.rmse_tolerance,
+            compress=compress, formats=formats,
+        )
+    else:
+        train_and_register(args.data_path, args.tag, n_jobs=args.n_jobs, compress=compress, formats=formats)
 
 
 if __name__ == "__main__":
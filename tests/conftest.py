@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+from mlops_housing import registry
+
+# Los tests de la API usan los endpoints /admin (deshabilitados por defecto)
+os.environ.setdefault("ADMIN_ENABLED", "1")
+
+
+@pytest.fixture
+def tmp_registry(tmp_path, monkeypatch):
+    """
+    Registro de modelos aislado en un directorio temporal (artifacts/,
+    version.json, índice y lock). Devuelve el directorio de artifacts.
+    """
+    artifacts = tmp_path / "artifacts"
+    monkeypatch.setattr(registry, "ARTIFACTS_DIR", artifacts)
+    monkeypatch.setattr(registry, "VERSION_FILE", artifacts / "version.json")
+    monkeypatch.setattr(registry, "INDEX_FILE", artifacts / "index.json")
+    monkeypatch.setattr(registry, "_LOCK_FILE", artifacts / ".index.lock")
+    return artifacts
@@ -21,3 +21,209 @@ def test_predict_endpoint():
         data = resp.json()
         assert "predicted_price" in data
         assert isinstance(data["predicted_price"], float)
+
+
+def test_predict_batch_endpoint():
+
+    # Reutiliza el modelo registrado por el test anterior
+    with TestClient(app) as client:
+        row = {
+            "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+            "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+            "PTRATIO": 15, "B": 390, "LSTAT": 5.0
+        }
+        single = client.post("/predict", json=row).json()
+
+        resp = client.post("/predict/batch", json={"rows": [row, row, row]})
+        assert resp.status_code == 200, resp.text
+        preds = resp.json()["predictions"]
+        assert len(preds) == 3
+        assert len({p["id"] for p in preds}) == 3
+        assert all(p["predicted_price"] == single["predicted_price"] for p in preds)
+
+        # Payload columnar equivalente
+        columns = {k: [v, v] for k, v in row.items()}
+        resp = client.post("/predict/batch", json={"columns": columns})
+        assert resp.status_code == 200, resp.text
+        assert [p["predicted_price"] for p in resp.json()["predictions"]] == [single["predicted_price"]] * 2
+
+        # Ambos formatos a la vez no es válido
+        resp = client.post("/predict/batch", json={"rows": [row], "columns": columns})
+        assert resp.status_code == 422
+
+
+def test_feedback_endpoint():
+
+    with TestClient(app) as client:
+        payload = {
+            "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+            "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+            "PTRATIO": 15, "B": 390, "LSTAT": 5.0
+        }
+        prediction_id = client.post("/predict", json=payload).json()["id"]
+
+        resp = client.post("/feedback", json={"id": prediction_id, "real_price": 24.5})
+        assert resp.status_code == 200, resp.text
+
+        resp = client.post("/feedback", json={"id": "no-existe", "real_price": 24.5})
+        assert resp.status_code == 404
+
+
+def test_feedback_bulk_endpoint():
+
+    with TestClient(app) as client:
+        payload = {
+            "rows": [{
+                "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+                "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+                "PTRATIO": 15, "B": 390, "LSTAT": 5.0
+            }] * 3
+        }
+        ids = [p["id"] for p in client.post("/predict/batch", json=payload).json()["predictions"]]
+
+        body = "\n".join(f'{{"id": "{pid}", "real_price": 24.5}}' for pid in ids)
+        body += '\n{"id": "no-existe", "real_price": 1.0}\nno es json\n'
+        resp = client.post("/feedback/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+        assert resp.status_code == 200, resp.text
+        assert resp.json() == {"received": 4, "matched": 3, "unmatched": 1, "invalid": 1}
+
+        csv_body = "id,real_price\n" + "\n".join(f"{pid},25.0" for pid in ids)
+        resp = client.post("/feedback/bulk", content=csv_body, headers={"content-type": "text/csv"})
+        assert resp.json()["matched"] == 3
+
+        resp = client.post("/feedback/bulk?format=csv", content="id,precio\nabc,1.0\n")
+        assert resp.status_code == 400
+
+        # Una línea enorme (o un body sin saltos de línea) se descarta sin acumularse
+        def body():
+            yield f'{{"id": "{ids[0]}", "real_price": 26.0}}\n'.encode()
+            for _ in range(64):
+                yield b"x" * 65536
+            yield f'\n{{"id": "{ids[1]}", "real_price": 26.0}}'.encode()
+
+        resp = client.post("/feedback/bulk", content=body())
+        assert resp.json() == {"received": 2, "matched": 2, "unmatched": 0, "invalid": 1}
+
+
+def test_admin_endpoints_disabled_by_default():
+    """
+    Sin ADMIN_ENABLED=1 los endpoints /admin no se montan (404). Se importa
+    la app en otro proceso porque el flag se lee al importarla.
+    """
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "from fastapi.testclient import TestClient\n"
+        "from mlops_housing.api.app import app\n"
+        "client = TestClient(app)\n"
+        "print([client.post('/admin/reload').status_code,"
+        " client.post('/admin/shadow', params={'run_id': 'x'}).status_code,"
+        " client.delete('/admin/shadow').status_code,"
+        " client.post('/admin/profile', params={'seconds': 0.01}).status_code])\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "ADMIN_ENABLED"}
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[404, 404, 404, 404]"
+
+
+def test_admin_reload_swaps_model():
+
+    with TestClient(app) as client:
+        before = client.get("/version").json()["run_id"]
+
+        # Registrar una nueva versión con la API corriendo
+        train_and_register(str(DEFAULT_DATA_PATH), tag="test_reload")
+        resp = client.post("/admin/reload")
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["reloaded"] is True
+
+        version = client.get("/version").json()
+        after = version["run_id"]
+        assert "cv_rmse" in version["metrics"]
+        assert after != before and after.endswith("test_reload")
+        assert f'model_active_info{{run_id="{after}"}} 1.0' in client.get("/metrics").text
+
+        # Sin cambios en version.json no hay recarga
+        assert client.post("/admin/reload").json()["reloaded"] is False
+
+
+def test_compiled_engine_matches_sklearn(monkeypatch):
+
+    with TestClient(app) as client:
+        payload = {
+            "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+            "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+            "PTRATIO": 15, "B": 390, "LSTAT": 5.0
+        }
+        expected = client.post("/predict", json=payload).json()["predicted_price"]
+
+        monkeypatch.setenv("MODEL_ENGINE", "compiled")
+        assert client.post("/admin/reload", params={"force": True}).status_code == 200
+        import mlops_housing.api.app as app_module
+        assert app_module.MODEL.engine == "compiled"
+        assert client.post("/predict", json=payload).json()["predicted_price"] == expected
+
+        monkeypatch.delenv("MODEL_ENGINE")
+        client.post("/admin/reload", params={"force": True})
+
+
+def test_stage_metrics_and_profiler():
+
+    with TestClient(app) as client:
+        row = {
+            "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+            "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+            "PTRATIO": 15, "B": 390, "LSTAT": 5.0
+        }
+        assert client.post("/predict", json=row).status_code == 200
+
+        lines = [
+            l for l in client.get("/metrics").text.splitlines()
+            if l.startswith("api_stage_latency_seconds_count") and 'handler="predict"' in l
+        ]
+        for stage in ("validation", "features", "inference", "id", "log"):
+            assert any(f'stage="{stage}"' in l for l in lines), stage
+
+        resp = client.post("/admin/profile", params={"seconds": 0.05, "mode": "sample"})
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["samples"] > 0
+
+        resp = client.post("/admin/profile", params={"seconds": 0.05, "mode": "cprofile"})
+        assert resp.status_code == 200, resp.text
+        assert "stats" in resp.json()
+
+        assert client.post("/admin/profile", params={"mode": "bogus"}).status_code == 400
+
+
+def test_shadow_candidate_scores_in_background():
+
+    import mlops_housing.api.app as app_module
+
+    with TestClient(app) as client:
+        payload = {
+            "CRIM": 0.1, "ZN": 18, "INDUS": 2.3, "CHAS": 0, "NOX": 0.5,
+            "RM": 6.2, "AGE": 45, "DIS": 4.2, "RAD": 1, "TAX": 300,
+            "PTRATIO": 15, "B": 390, "LSTAT": 5.0
+        }
+        run_id = client.get("/version").json()["run_id"]
+        assert client.post("/admin/shadow", params={"run_id": "no-existe"}).status_code == 404
+        # Solo runs registrados: ni rutas absolutas ni fuera de artifacts/
+        run_dir = str(app_module.ARTIFACTS_DIR.resolve() / run_id)
+        for run in (run_dir, f"../artifacts/{run_id}", f"{run_id}/../{run_id}"):
+            assert client.post("/admin/shadow", params={"run_id": run}).status_code == 404
+
+        resp = client.post("/admin/shadow", params={"run_id": run_id, "fraction": 1.0})
+        assert resp.status_code == 200, resp.text
+        assert client.get("/version").json()["shadow"]["run_id"] == run_id
+
+        prediction_id = client.post("/predict", json=payload).json()["id"]
+        assert client.delete("/admin/shadow").status_code == 200  # Puntúa lo pendiente
+
+        app_module.LOG_WRITER.flush()
+        assert client.post("/feedback", json={"id": prediction_id, "real_price": 24.5}).status_code == 200
+        metrics = app_module.FEEDBACK_STORE.shadow_metrics()
+        assert metrics[run_id]["n"] >= 1
+        assert metrics[run_id]["rmse"] == metrics[run_id]["served_rmse"]  # Mismo modelo
+        assert client.get("/version").json()["shadow"] is None
@@ -0,0 +1,27 @@
+import asyncio
+import numpy as np
+from mlops_housing.api.batching import MicroBatcher
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    """
+    Las requests concurrentes se resuelven con un solo predict por lote
+    y cada una recibe su propio resultado.
+    """
+    calls = []
+
+    def predict_fn(X: np.ndarray) -> np.ndarray:
+        calls.append(len(X))
+        return X.sum(axis=1)
+
+    async def scenario():
+        batcher = MicroBatcher(predict_fn, max_rows=8, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*[batcher.submit([i, 1.0]) for i in range(20)])
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == [i + 1.0 for i in range(20)]
+    assert sum(calls) == 20
+    assert max(calls) == 8 and len(calls) < 20
@@ -0,0 +1,29 @@
+import time
+
+from mlops_housing.api.cache import PredictionCache, cache_key
+
+
+def test_prediction_cache_lru_ttl_and_invalidation():
+    cache = PredictionCache(n_features=2, max_entries=2, ttl_seconds=0.05)
+    a, b, c = cache_key([1, 0]), cache_key([2.0, 0.0]), cache_key([3, 1])
+    assert cache_key([1, 0]) == cache_key([1.0, 0.0])
+
+    cache.put(a, 10.0, "v1")
+    cache.put(b, 20.0, "v1")
+    assert cache.get(a, "v1") == 10.0   # `a` pasa a ser el más reciente
+    cache.put(c, 30.0, "v1")            # desaloja `b` (LRU)
+    assert cache.get(b, "v1") is None
+    assert cache.get(c, "v1") == 30.0
+
+    # Un modelo nuevo invalida todo el cache
+    assert cache.get(a, "v2") is None
+    assert len(cache) == 0
+
+    # Expiración por TTL
+    cache.put(a, 10.0, "v2")
+    time.sleep(0.06)
+    assert cache.get(a, "v2") is None
+
+    # El límite de memoria también acota la capacidad
+    small = PredictionCache(n_features=13, max_entries=10_000, max_bytes=10 * 1024)
+    assert small.capacity < 10_000
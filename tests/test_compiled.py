@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from mlops_housing.compiled import CompiledForest
+from mlops_housing.config import FEATURES, TARGET, DEFAULT_DATA_PATH
+from mlops_housing.pipeline import build_pipeline
+
+
+def test_compiled_forest_matches_pipeline():
+    """
+    El motor compilado debe reproducir las predicciones del pipeline sklearn,
+    incluyendo filas con valores faltantes (imputación por mediana).
+    """
+    df = pd.read_csv(DEFAULT_DATA_PATH)
+    pipeline = build_pipeline(FEATURES)
+    pipeline.fit(df[FEATURES], df[TARGET])
+
+    compiled = CompiledForest.from_pipeline(pipeline)
+    assert compiled.n_trees == 100
+
+    # Datos de entrenamiento (con NaN), perturbados y una fila completamente vacía
+    rng = np.random.default_rng(0)
+    X = df[FEATURES].copy()
+    noisy = X * rng.normal(1.0, 0.05, X.shape)
+    empty = pd.DataFrame([[np.nan] * len(FEATURES)], columns=FEATURES)
+    X_all = pd.concat([X, noisy, empty], ignore_index=True)
+
+    expected = pipeline.predict(X_all)
+    np.testing.assert_allclose(compiled.predict(X_all), expected, rtol=1e-12, atol=0)
+
+    # Matriz en el orden de FEATURES y una sola fila
+    np.testing.assert_allclose(compiled.predict(X_all.to_numpy()), expected, rtol=1e-12, atol=0)
+    np.testing.assert_allclose(compiled.predict(X_all.iloc[[5]]), expected[[5]], rtol=1e-12, atol=0)
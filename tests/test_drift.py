@@ -0,0 +1,86 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from mlops_housing.config import DEFAULT_DATA_PATH, FEATURES
+from mlops_housing.drift import REFERENCE_FILE, DriftMonitor, build_reference, read_drift
+from mlops_housing.loader import load_training_data
+
+
+def test_drift_monitor_scores_and_persistence(tmp_path):
+    df = pd.read_csv(DEFAULT_DATA_PATH)
+    X = df[FEATURES]
+    preds = df["MEDV"].to_numpy(dtype=float)
+    reference = build_reference(X, preds)
+
+    # Fila a fila (O(1) por predicción) y por lote dan el mismo estado
+    one, many = DriftMonitor(reference, "run"), DriftMonitor(reference, "run")
+    for row, p in zip(X.to_numpy(dtype=float), preds):
+        one.update(row, p)
+    many.update_many(X.to_numpy(dtype=float), preds)
+    s1, s2 = one.state()["columns"], many.state()["columns"]
+    for c in s1:
+        assert s1[c]["counts"] == s2[c]["counts"]
+        assert np.isclose(s1[c]["mean"], s2[c]["mean"]) and np.isclose(s1[c]["m2"], s2[c]["m2"])
+
+    # Misma distribución: sin drift. Distribución corrida: PSI alto en esa feature
+    assert all(s["psi"] < 0.01 for s in one.scores().values())
+    shifted = DriftMonitor(reference, "run")
+    X_shift = X.to_numpy(dtype=float).copy()
+    X_shift[:, FEATURES.index("RM")] += 2.0
+    shifted.update_many(X_shift, preds)
+    scores = shifted.scores()
+    assert scores["RM"]["psi"] > 1.0 and scores["RM"]["ks"] > 0.5
+    assert scores["CRIM"]["psi"] < 0.01
+
+    # evaluate lee los estados persistidos por los procesos de la API
+    run_dir = tmp_path / "artifacts" / "run"
+    run_dir.mkdir(parents=True)
+    (run_dir / REFERENCE_FILE).write_text(json.dumps(reference), encoding="utf-8")
+    state_dir = tmp_path / "drift"
+    one.start(state_dir, interval=0)
+    one.save(one.path)
+    shifted.start(state_dir, interval=0)
+    shifted.save(shifted.path)
+
+    merged = read_drift(state_dir, run_dir, window_days=1)
+    assert merged["RM"]["n"] == 2 * len(X)
+    assert 0.1 < merged["RM"]["psi"] < scores["RM"]["psi"]
+
+    # Fuera de la ventana solo cuenta el estado actualizado recientemente
+    old = time.time() - 2 * 86400
+    os.utime(shifted.path, (old, old))
+    assert read_drift(state_dir, run_dir, window_days=1)["RM"]["n"] == len(X)
+    assert read_drift(state_dir, run_dir)["RM"]["n"] == 2 * len(X)
+
+    # Al detenerse cada proceso borra su archivo; los abandonados se limpian al arrancar
+    one.stop()
+    assert read_drift(state_dir, run_dir, window_days=1) is None
+    os.utime(shifted.path, (old - 7 * 86400, old - 7 * 86400))
+    DriftMonitor(reference, "run").start(state_dir, interval=0)
+    assert not shifted.path.exists()
+
+
+def test_drift_reference_from_typed_loader_matches_requests():
+    """
+    Con la referencia armada desde el loader (features float32), las mismas
+    filas de entrenamiento enviadas como float64 (como llegan a la API)
+    caen en los mismos bins: PSI ~ 0.
+    """
+    typed = load_training_data(DEFAULT_DATA_PATH)
+    preds = typed["MEDV"].to_numpy(dtype=float)
+    reference = build_reference(typed[FEATURES], preds)
+
+    X = pd.read_csv(DEFAULT_DATA_PATH)[FEATURES].to_numpy(dtype=float)
+    one, many = DriftMonitor(reference, "run"), DriftMonitor(reference, "run")
+    for row, p in zip(X, preds):
+        one.update(row, p)
+    many.update_many(X, preds)
+    for monitor in (one, many):
+        columns = monitor.state()["columns"]
+        for name, ref in reference["columns"].items():
+            assert columns[name]["counts"] == ref["counts"], name
+        assert all(s["psi"] < 1e-6 for s in monitor.scores().values())
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+from mlops_housing import evaluate
+from mlops_housing.config import FEATURES
+
+
+def test_streaming_metrics_match_full_load(tmp_path, monkeypatch):
+    """
+    El modo streaming (por bloques, con sumas corridas) debe producir las
+    mismas métricas que la carga completa del log.
+    """
+    rng = np.random.default_rng(0)
+    n = 5000
+    now = pd.Timestamp.utcnow().tz_localize(None)
+    # Mitad de las filas fuera de la ventana de 1 día, en orden cronológico
+    ts = now - pd.to_timedelta(np.linspace(3, 0.01, n), unit="D")
+    real = rng.normal(25, 5, n)
+    real[rng.random(n) < 0.3] = np.nan
+    df = pd.DataFrame({
+        "id": [f"id{i}" for i in range(n)],
+        "timestamp": [t.isoformat() for t in ts],
+        **{f: 0.0 for f in FEATURES},
+        "predicted_price": rng.normal(25, 5, n),
+        "real_price": real,
+    })
+    log_path = tmp_path / "predictions.csv"
+    df.to_csv(log_path, index=False)
+    monkeypatch.setattr(evaluate, "LOG_PATH", log_path)
+    monkeypatch.setattr(evaluate, "FEEDBACK_DB_PATH", tmp_path / "feedback.db")
+
+    window = evaluate._filter_window(pd.read_csv(log_path), 1)
+    acc = evaluate._stream_window_metrics(1, chunksize=512)
+
+    assert acc.n == len(window)
+    y_true, y_pred = window["real_price"], window["predicted_price"]
+    assert np.isclose(acc.rmse, np.sqrt(mean_squared_error(y_true, y_pred)))
+    assert np.isclose(acc.mae, mean_absolute_error(y_true, y_pred))
+    assert np.isclose(acc.r2, r2_score(y_true, y_pred))
+    assert len(acc.sample_true) == min(acc.n, acc.sample_size)
+
+
+def test_plot_payload_downsamples_large_windows(tmp_path):
+    """
+    Ventanas grandes se dibujan como histograma 2D de tamaño fijo en lugar
+    de un punto por predicción.
+    """
+    rng = np.random.default_rng(0)
+    y_true = rng.normal(25, 5, 20_000)
+    y_pred = y_true + rng.normal(0, 1, 20_000)
+
+    small = evaluate._plot_payload(y_true[:100], y_pred[:100], max_points=1000)
+    assert small["kind"] == "scatter" and len(small["x"]) == 100
+
+    large = evaluate._plot_payload(y_true, y_pred, max_points=1000, bins=50)
+    assert large["kind"] == "density" and large["counts"].shape == (50, 50)
+    assert large["counts"].sum() == len(y_true)
+
+    fig_path = evaluate._render_plot(large, "test", str(tmp_path / "plot.png"))
+    assert (tmp_path / "plot.png").stat().st_size > 0 and fig_path.endswith("plot.png")
+
+
+def test_decision_does_not_wait_for_mlflow(tmp_path, monkeypatch):
+    """
+    El exit code sale apenas está el RMSE: el registro en MLflow (y las
+    métricas secundarias) corre después, en un hilo aparte.
+    """
+    import threading
+
+    n = 50
+    now = pd.Timestamp.utcnow().tz_localize(None)
+    pd.DataFrame({
+        "id": [f"id{i}" for i in range(n)],
+        "timestamp": [(now - pd.Timedelta(minutes=i)).isoformat() for i in range(n)],
+        **{f: 0.0 for f in FEATURES},
+        "predicted_price": 30.0,
+        "real_price": 20.0,
+    }).to_csv(tmp_path / "predictions.csv", index=False)
+    monkeypatch.setattr(evaluate, "LOG_PATH", tmp_path / "predictions.csv")
+    monkeypatch.setattr(evaluate, "FEEDBACK_DB_PATH", tmp_path / "feedback.db")
+    monkeypatch.setattr(evaluate, "_check_drift", lambda *args: (None, False))
+    monkeypatch.setattr(evaluate, "_baseline_rmse", lambda: 3.0)
+
+    release, logged = threading.Event(), []
+
+    def slow_log(params, metrics, *args):
+        release.wait(5)  # MLflow lento: la decisión no debe esperarlo
+        logged.append(metrics)
+
+    monkeypatch.setattr(evaluate, "_log_evaluation", slow_log)
+    assert evaluate.evaluate_and_decide(plot=False) == 2
+    assert not logged
+    release.set()
+    evaluate.wait_for_logging(5)
+    assert logged[0]["prod_rmse"] == 10.0 and logged[0]["degraded_flag"] == 1.0
+
+    logged.clear()
+    assert evaluate.evaluate_and_decide(plot=False, log_mlflow=False) == 2
+    evaluate.wait_for_logging(5)
+    assert not logged
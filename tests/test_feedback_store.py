@@ -0,0 +1,92 @@
+import pandas as pd
+from mlops_housing.config import LOG_COLUMNS
+from mlops_housing.feedback_store import FeedbackStore
+
+
+def test_feedback_store_roundtrip(tmp_path):
+    """
+    Verifica el ciclo predicción -> feedback en el índice SQLite,
+    incluyendo IDs inexistentes y la actualización de un feedback previo.
+    """
+    store = FeedbackStore(tmp_path / "feedback.db")
+    row = ["abc", "2025-01-01T00:00:00", *[0.0] * 13, 21.5, None]
+    assert len(row) == len(LOG_COLUMNS)
+    store.write([row])
+
+    assert store.has_prediction("abc")
+    assert not store.set_feedback("missing", 10.0)
+    assert store.set_feedback("abc", 20.0)
+    assert store.set_feedback("abc", 22.0)
+    assert store.get_feedback() == {"abc": 22.0}
+    assert store.get_feedback(["abc", "missing"]) == {"abc": 22.0}
+    store.close()
+
+
+def test_feedback_store_backfill(tmp_path):
+    """
+    El primer arranque indexa el log CSV existente, incluyendo su real_price.
+    """
+    log_path = tmp_path / "predictions.csv"
+    pd.DataFrame(
+        [["a", "2025-01-01T00:00:00", *[0.0] * 13, 20.0, 19.0],
+         ["b", "2025-01-01T00:00:01", *[0.0] * 13, 21.0, None]],
+        columns=LOG_COLUMNS,
+    ).to_csv(log_path, index=False)
+
+    store = FeedbackStore(tmp_path / "feedback.db")
+    assert store.backfill_from_log(log_path) == 2
+    assert store.backfill_from_log(log_path) == 0
+    assert store.has_prediction("b")
+    assert store.get_feedback() == {"a": 19.0}
+    # El feedback histórico no cuenta como nuevo para el reentrenamiento incremental
+    assert store.feedback_since("") == [("a", "2025-01-01T00:00:00", 19.0, "2025-01-01T00:00:00")]
+    assert store.feedback_since("2025-06-01T00:00:00") == []
+    store.close()
+
+
+def test_feedback_bulk_ingest(tmp_path):
+    """
+    Carga masiva por lotes: pares con y sin predicción, líneas inválidas e
+    IDs repetidos (gana el último), en JSONL y CSV.
+    """
+    from mlops_housing.bulk_feedback import ingest_lines
+
+    store = FeedbackStore(tmp_path / "feedback.db")
+    store.add_predictions([(f"p{i}", "2025-01-01T00:00:00", 20.0) for i in range(5)])
+    assert store.set_feedback_many([("p0", 1.0), ("x", 2.0)]) == [("p0", 1.0)]
+
+    lines = [
+        '{"id": "p1", "real_price": 10.0}',
+        '{"id": "p1", "real_price": 11.0}',
+        '{"id": "x", "real_price": 12.0}',
+        '{"id": "p2", "real_price": "no-numero"}',
+        "",
+        "{roto",
+    ]
+    journal = []
+    summary = ingest_lines(lines, store, "jsonl", batch_size=2, on_matched=journal.extend)
+    assert summary == {"received": 3, "matched": 1, "unmatched": 1, "invalid": 2}
+    assert store.get_feedback(["p1"]) == {"p1": 11.0}
+    assert journal == [("p1", 11.0)]
+
+    summary = ingest_lines(["real_price,id", "30.0,p3", "31.0,p4", "sin-precio"], store, "csv")
+    assert summary == {"received": 2, "matched": 2, "unmatched": 0, "invalid": 1}
+    assert store.get_feedback(["p3", "p4"]) == {"p3": 30.0, "p4": 31.0}
+    store.close()
+
+
+def test_line_splitter_bounds_long_lines():
+    """
+    Las líneas de más de max_line bytes se descartan aunque lleguen partidas
+    en varios bloques, sin acumularlas en memoria.
+    """
+    from mlops_housing.bulk_feedback import LineSplitter
+
+    splitter = LineSplitter(max_line=8)
+    assert splitter.feed(b"a,1\nb,") == ["a,1"]
+    assert splitter.feed(b"2\n" + b"x" * 20) == ["b,2"]
+    assert splitter.feed(b"y" * 20) == []
+    assert len(splitter._buffer) == 0
+    assert splitter.feed(b"zz\nc,3\n" + b"w" * 12 + b"\nd") == ["c,3"]
+    assert splitter.close() == ["d"]
+    assert splitter.too_long == 2
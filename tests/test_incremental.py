@@ -0,0 +1,66 @@
+import json
+
+import pandas as pd
+
+from mlops_housing import incremental, registry
+from mlops_housing.config import DEFAULT_DATA_PATH, FEATURES, LOG_COLUMNS, TARGET
+from mlops_housing.feedback_store import FeedbackStore
+from mlops_housing.pipeline import build_pipeline
+
+
+def _log_feedback(store, log_path, df, start):
+    """Registra predicciones (log CSV + índice) con su feedback real."""
+    rows = [
+        [f"id{start + i}", f"2025-01-01T00:00:{i:02d}", *r[FEATURES].tolist(), 0.0, None]
+        for i, (_, r) in enumerate(df.iterrows())
+    ]
+    frame = pd.DataFrame(rows, columns=LOG_COLUMNS)
+    frame.to_csv(log_path, mode="a", header=not log_path.exists(), index=False)
+    store.write(rows)
+    for i, price in enumerate(df[TARGET]):
+        assert store.set_feedback(f"id{start + i}", float(price))
+
+
+def test_incremental_retrain_uses_only_new_feedback(tmp_registry, tmp_path, monkeypatch):
+    """
+    El reentrenamiento incremental agrega árboles al modelo activo usando
+    solo el feedback posterior al último run y respeta el máximo de árboles.
+    """
+    data_path = str(DEFAULT_DATA_PATH.resolve())
+    monkeypatch.chdir(tmp_path)  # mlruns/ queda en el directorio temporal
+    log_path, db_path = tmp_path / "predictions.csv", tmp_path / "feedback.db"
+    monkeypatch.setattr(incremental, "LOG_PATH", log_path)
+    monkeypatch.setattr(incremental, "FEEDBACK_DB_PATH", db_path)
+
+    df = pd.read_csv(data_path)
+    model = build_pipeline(FEATURES, model_params={"n_estimators": 10}).fit(df[FEATURES], df[TARGET])
+    base_run = registry.save_run(model, {"cv_rmse": 3.0}, tag="base")
+
+    store = FeedbackStore(db_path)
+    _log_feedback(store, log_path, df.head(30), start=0)
+    rows, until = incremental.collect_feedback_rows(incremental._run_cutoff(base_run))
+    assert len(rows) == 30 and until
+
+    metrics = incremental.retrain_incremental(
+        data_path, n_new_trees=5, max_trees=100, rmse_tolerance=10.0, n_jobs=1,
+    )
+    assert metrics["n_trees"] == 15 and metrics["n_new_rows"] == 30 and metrics["n_holdout"] == 6
+    assert metrics["baseline_rmse"] == 3.0  # Holdout chico: se hereda el baseline del run base
+    run_dir = registry.read_pointer()
+    assert json.loads((run_dir / registry.TRAINING_FILE).read_text())["feedback_until"] == until
+
+    # Sin feedback nuevo no se reentrena
+    assert incremental.retrain_incremental(data_path, rmse_tolerance=10.0) is None
+
+    # Solo las 25 filas nuevas; con el máximo alcanzado se reemplazan los árboles más viejos
+    _log_feedback(store, log_path, df.iloc[30:55], start=30)
+    store.close()
+    metrics = incremental.retrain_incremental(
+        data_path, n_new_trees=5, max_trees=12, rmse_tolerance=10.0, n_jobs=1,
+    )
+    assert metrics["n_new_rows"] == 25
+    assert metrics["n_trees"] == 12 and metrics["n_trees_replaced"] == 8
+    model, _ = registry.load_current()
+    trees = model.named_steps["model"].estimators_
+    assert len(trees) == 12
+    assert len({t.random_state for t in trees}) == 12  # Los árboles nuevos no repiten semillas
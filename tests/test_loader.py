@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from mlops_housing import evaluate, train
+from mlops_housing.config import DEFAULT_DATA_PATH, FEATURES, LOG_COLUMNS, TARGET
+from mlops_housing.loader import load_frame, load_training_data
+from mlops_housing.pipeline import build_pipeline
+
+
+def test_typed_loader_csv_and_parquet(tmp_path):
+    """
+    El loader tipado lee CSV y Parquet con features en float32, target en
+    float64 y los mismos valores que pd.read_csv.
+    """
+    expected = pd.read_csv(DEFAULT_DATA_PATH)
+    parquet_path = tmp_path / "data.parquet"
+    expected.to_parquet(parquet_path)
+
+    for path in (DEFAULT_DATA_PATH, parquet_path):
+        df = load_training_data(path)
+        assert set(df.columns) == {*FEATURES, TARGET}
+        assert (df[FEATURES].dtypes == np.float32).all()
+        assert df[TARGET].dtype == np.float64
+        assert np.allclose(df[FEATURES], expected[FEATURES], equal_nan=True)
+        assert df[TARGET].equals(expected[TARGET])
+
+
+def test_typed_loader_trains_same_model_as_read_csv():
+    """
+    Las métricas de validación cruzada con el loader tipado son las mismas
+    que con pd.read_csv (features float32 no cambian los árboles).
+    """
+    expected = pd.read_csv(DEFAULT_DATA_PATH)
+    df = load_training_data(DEFAULT_DATA_PATH)
+
+    model = build_pipeline(FEATURES)
+    rmse, r2 = train.evaluate_cv(model, df[FEATURES], df[TARGET])
+    expected_rmse, expected_r2 = train.evaluate_cv(model, expected[FEATURES], expected[TARGET])
+    assert rmse == expected_rmse
+    assert r2 == expected_r2
+
+
+def test_typed_loader_log_window_matches_read_csv(tmp_path):
+    """
+    El log se lee solo con las columnas pedidas y el timestamp ya parseado;
+    la ventana de evaluate es la misma que con pd.read_csv.
+    """
+    now = pd.Timestamp.utcnow().tz_localize(None)
+    n = 200
+    log = pd.DataFrame({
+        "id": [f"id{i}" for i in range(n)],
+        "timestamp": [(now - pd.Timedelta(hours=i)).isoformat() for i in range(n)],
+        **{f: 1.0 for f in FEATURES},
+        "predicted_price": np.linspace(10, 30, n),
+        "real_price": np.where(np.arange(n) % 3 == 0, np.nan, 20.0),
+    })[LOG_COLUMNS]
+    log_path = tmp_path / "predictions.csv"
+    log.to_csv(log_path, index=False)
+
+    df = load_frame(log_path, ["id", "timestamp", "predicted_price", "real_price", "missing"])
+    assert df.columns.tolist() == ["id", "timestamp", "predicted_price", "real_price"]
+    assert pd.api.types.is_datetime64_any_dtype(df["timestamp"])
+
+    window = evaluate._filter_window(df, 2)
+    expected = evaluate._filter_window(pd.read_csv(log_path), 2)
+    assert window["id"].tolist() == expected["id"].tolist()
+
+    # Timestamps con zona horaria: se parsean con pandas en lugar de Arrow
+    log["timestamp"] = [f"{t}+00:00" for t in log["timestamp"]]
+    log.to_csv(log_path, index=False)
+    df = load_frame(log_path, ["id", "timestamp"])
+    assert df["timestamp"].notna().all()
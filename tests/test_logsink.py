@@ -0,0 +1,29 @@
+import csv
+from mlops_housing.logsink import CsvLogSink, LogWriter
+
+
+def test_log_writer_flush_and_close(tmp_path):
+    """
+    Verifica que el writer escribe el header una sola vez, respeta flush()
+    y vacía las filas pendientes al cerrarse.
+    """
+    path = tmp_path / "log.csv"
+    writer = LogWriter(CsvLogSink(path, ["id", "value"]), max_rows=1000, flush_interval=60)
+    writer.start()
+
+    writer.write(["a", 1.5])
+    writer.write_many([["b", None], ["c", 3]])
+    assert writer.flush(timeout=5)
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [["id", "value"], ["a", "1.5"], ["b", ""], ["c", "3"]]
+
+    # Filas pendientes se escriben al cerrar, aunque no se alcance el lote
+    writer.write(["d", 4])
+    writer.close(timeout=5)
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[-1] == ["d", "4"]
+    assert sum(r == ["id", "value"] for r in rows) == 1
@@ -0,0 +1,28 @@
+import threading
+
+from mlops_housing.api.model_manager import VersionWatcher
+
+
+def test_version_watcher_retries_failed_reload(tmp_path):
+    """
+    Si la recarga falla (e.g. artefacto a medio escribir), el watcher la
+    reintenta en el siguiente ciclo aunque version.json no vuelva a cambiar.
+    """
+    version_file = tmp_path / "version.json"
+    version_file.write_text('{"path": "a"}')
+    calls, done = [], threading.Event()
+
+    def on_change():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("artefacto incompleto")
+        done.set()
+
+    watcher = VersionWatcher(0.01, on_change, path=version_file)
+    version_file.write_text('{"path": "bb"}')
+    watcher.start()
+    try:
+        assert done.wait(5)
+    finally:
+        watcher.stop()
+    assert len(calls) == 3  # Tras la recarga exitosa no se vuelve a llamar
@@ -0,0 +1,31 @@
+from datetime import date
+from mlops_housing.parquet_log import (
+    ParquetLogSink, read_window, compact, list_partitions, PREDICTIONS, FEEDBACK,
+)
+
+
+def _row(pid, ts, pred):
+    return [pid, ts, *[0.0] * 12, 1.0, pred, None]
+
+
+def test_parquet_log_partitions_and_compaction(tmp_path):
+    """
+    Verifica la partición por día, la lectura por ventana con proyección
+    y que la compactación deja un archivo por partición sin perder filas.
+    """
+    preds = ParquetLogSink(tmp_path, PREDICTIONS)
+    preds.write([_row("a", "2025-01-01T10:00:00", 20.0), _row("b", "2025-01-02T10:00:00", 21.0)])
+    preds.write([_row("c", "2025-01-02T11:00:00", 22.0)])
+    ParquetLogSink(tmp_path, FEEDBACK).write([["c", "2025-01-03T09:00:00", 23.0]])
+
+    assert [p.name for p in list_partitions(tmp_path, PREDICTIONS)] == ["date=2025-01-01", "date=2025-01-02"]
+
+    table = read_window(tmp_path, PREDICTIONS, since=date(2025, 1, 2), columns=["id", "predicted_price"])
+    assert table.column_names == ["id", "predicted_price"]
+    assert sorted(table.column("id").to_pylist()) == ["b", "c"]
+
+    assert compact(tmp_path, PREDICTIONS) == 1
+    assert len(list((tmp_path / PREDICTIONS / "date=2025-01-02").glob("*.parquet"))) == 1
+    assert read_window(tmp_path, PREDICTIONS).num_rows == 3
+
+    assert read_window(tmp_path, FEEDBACK, columns=["id", "real_price"]).to_pylist() == [{"id": "c", "real_price": 23.0}]
@@ -1,4 +1,7 @@
+import json
+
 import pandas as pd
+import pytest
 from mlops_housing.registry import load_current
 from mlops_housing.config import FEATURES
 
@@ -18,3 +21,88 @@ def test_load_current_model():
     assert prediction is not None
     assert len(prediction) == 1
     assert isinstance(prediction[0], float)
+
+
+def test_registry_index_promote_and_rollback(tmp_registry):
+    """
+    save_run registra cada run en el índice; promote/rollback mueven el
+    puntero de version.json sin recorrer artifacts/.
+    """
+    from sklearn.dummy import DummyRegressor
+    from mlops_housing import registry
+
+    model = DummyRegressor().fit([[0.0]], [1.0])
+    run_a = registry.save_run(model, {"cv_rmse": 3.0}, tag="a")
+    run_b = registry.save_run(model, {"cv_rmse": 2.5}, tag="b")
+    assert registry.read_pointer() == run_b
+
+    assert {r["run_id"] for r in registry.list_runs()} == {run_a.name, run_b.name}
+    assert [r["run_id"] for r in registry.list_runs(tag="a")] == [run_a.name]
+    entry = registry.get_run(run_a.name)
+    assert entry["tag"] == "a" and entry["sha256"] and entry["model_bytes"] > 0
+    assert registry.compare_runs(run_a.name, run_b.name)["cv_rmse"]["delta"] == -0.5
+
+    assert registry.rollback() == run_a
+    assert registry.read_pointer() == run_a
+    assert registry.promote(run_b.name, verify=True) == run_b
+
+    # Rollbacks sucesivos retroceden por el historial (c -> b -> a), sin alternar
+    run_c = registry.save_run(model, {"cv_rmse": 2.0}, tag="c")
+    assert registry.rollback() == run_b
+    assert registry.rollback() == run_a
+    assert registry.read_pointer() == run_a
+    with pytest.raises(ValueError):
+        registry.rollback()
+    assert registry.promote(run_c.name) == run_c
+    assert registry.promote(run_b.name, verify=True) == run_b
+
+    # Un artefacto alterado no pasa la verificación de checksum
+    (run_a / "model.joblib").write_bytes(b"corrupto")
+    with pytest.raises(ValueError):
+        registry.promote(run_a.name, verify=True)
+    assert json.loads((tmp_registry / "version.json").read_text())["current"] == str(run_b)
+
+
+def test_artifact_formats_fastest_verified(tmp_registry):
+    """
+    load_run elige el formato más rápido que reproduce el probe set y
+    vuelve a model.joblib si la variante no pasa la verificación.
+    """
+    import joblib
+    import numpy as np
+    from mlops_housing import registry
+    from mlops_housing.compiled import CompiledForest
+    from mlops_housing.config import DEFAULT_DATA_PATH, TARGET
+    from mlops_housing.pipeline import build_pipeline
+
+    df = pd.read_csv(DEFAULT_DATA_PATH)
+    model = build_pipeline(FEATURES, model_params={"n_estimators": 10}).fit(df[FEATURES], df[TARGET])
+    run_dir = registry.save_run(
+        model, {"cv_rmse": 3.0}, tag="fmt", compress=("zlib", 3),
+        formats=["mmap", "slim"], probe=df[FEATURES].head(32),
+    )
+
+    meta = registry.get_run(run_dir.name)["formats"]
+    assert set(meta) == {"joblib", "mmap", "slim"}
+    assert meta["joblib"]["compress"] == ["zlib", 3] and not meta["joblib"]["mmap"]
+    assert all(m["bytes"] > 0 and m["load_seconds"] > 0 for m in meta.values())
+
+    # Forzar el orden: slim es el más rápido
+    meta["slim"]["load_seconds"] = 0.0
+    (run_dir / registry.FORMATS_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    loaded = registry.load_run(run_dir)
+    assert isinstance(loaded, CompiledForest)
+    pred = loaded.predict(df[FEATURES])
+    assert isinstance(pred[0], float)
+    assert np.allclose(pred, model.predict(df[FEATURES]), atol=1e-4)
+
+    # Con mmap solo se consideran los formatos sin comprimir
+    assert not isinstance(registry.load_run(run_dir, mmap_mode="r", fmt="mmap"), CompiledForest)
+
+    # Si el probe set no coincide, se descarta la variante
+    probe = joblib.load(run_dir / registry.PROBE_FILE)
+    probe["y"] = probe["y"] + 1.0
+    joblib.dump(probe, run_dir / registry.PROBE_FILE)
+    assert not isinstance(registry.load_run(run_dir), CompiledForest)
+    with pytest.raises(ValueError):
+        registry.load_run(run_dir, fmt="slim")
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from mlops_housing import score
+from mlops_housing.config import DEFAULT_DATA_PATH, FEATURES
+from mlops_housing.feedback_store import FeedbackStore
+from mlops_housing.registry import load_current
+
+
+def test_score_file_matches_model_and_appends_log(tmp_path, monkeypatch):
+    """
+    El scoring offline (en proceso y con pool) reproduce las predicciones del
+    modelo activo, respeta el orden de entrada y puede indexar las filas para
+    recibir feedback.
+    """
+    df = pd.read_csv(DEFAULT_DATA_PATH).head(120)
+    df["sku"] = np.arange(len(df))
+    csv_path, parquet_path = tmp_path / "input.csv", tmp_path / "input.parquet"
+    df.to_csv(csv_path, index=False)
+    df.to_parquet(parquet_path)
+    model, _ = load_current()
+    expected = np.round(model.predict(df[FEATURES]), 3)
+
+    monkeypatch.setattr(score, "LOG_PATH", tmp_path / "predictions.csv")
+    monkeypatch.setattr(score, "FEEDBACK_DB_PATH", tmp_path / "feedback.db")
+    summary = score.score_file(
+        str(csv_path), str(tmp_path / "out.parquet"), chunksize=50, workers=0,
+        key="sku", append_log=True, progress=False,
+    )
+    assert summary["rows"] == len(df)
+    out = pq.read_table(tmp_path / "out.parquet").to_pandas()
+    assert out.columns.tolist() == ["sku", "id", "predicted_price"]
+    assert out["sku"].tolist() == df["sku"].tolist() and out["id"].is_unique
+    assert np.allclose(out["predicted_price"], expected)
+
+    log = pd.read_csv(tmp_path / "predictions.csv")
+    assert log["id"].tolist() == out["id"].tolist()
+    store = FeedbackStore(tmp_path / "feedback.db")
+    assert store.set_feedback(out["id"].iloc[0], 24.0)
+    store.close()
+
+    summary = score.score_file(
+        str(parquet_path), str(tmp_path / "out_pool.parquet"), chunksize=40, workers=2, progress=False,
+    )
+    pooled = pq.read_table(tmp_path / "out_pool.parquet").to_pandas()
+    assert summary["rows"] == len(df) and np.allclose(pooled["predicted_price"], expected)
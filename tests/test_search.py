@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from mlops_housing.config import FEATURES
+from mlops_housing.search import successive_halving, select_winner
+
+
+def test_successive_halving_prunes_and_records_costs():
+    """
+    Cada ronda conserva ~1/eta de los candidatos con más datos, y cada trial
+    registra RMSE, latencia y tamaño del modelo.
+    """
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, len(FEATURES))), columns=FEATURES)
+    y = pd.Series(X["RM"] * 3 + rng.normal(size=200))
+
+    trials = successive_halving(X, y, FEATURES, n_candidates=4, eta=2, k=3, n_jobs=1)
+
+    by_rung = {}
+    for t in trials:
+        by_rung.setdefault(t.rung, []).append(t)
+    assert [len(by_rung[r]) for r in sorted(by_rung)] == [4, 2, 1]
+    assert by_rung[2][0].n_samples == len(X)
+    assert all(t.latency_ms > 0 and t.model_size_bytes > 0 for t in trials)
+
+    assert select_winner(trials) is by_rung[2][0]
@@ -0,0 +1,40 @@
+import numpy as np
+from sklearn.dummy import DummyRegressor
+
+from mlops_housing.api.model_manager import ServedModel
+from mlops_housing.api.shadow import ShadowScorer
+from mlops_housing.config import FEATURES
+from mlops_housing.feedback_store import FeedbackStore
+
+
+def test_shadow_scorer_logs_candidate_under_same_id(tmp_path):
+    """
+    El candidato puntúa en segundo plano y sus predicciones quedan con el
+    ID de la predicción servida, listas para compararse contra el feedback.
+    """
+    store = FeedbackStore(tmp_path / "feedback.db")
+    candidate = ServedModel(DummyRegressor(strategy="constant", constant=20.0).fit([[0.0] * 13], [0.0]),
+                            tmp_path / "20250101T000000Z_candidate")
+    scorer = ShadowScorer(candidate, store.add_shadow, fraction=1.0, max_rows=4)
+    scorer.start()
+
+    ids = [f"id{i}" for i in range(10)]
+    store.add_predictions((pid, "2025-01-01T00:00:00", 25.0) for pid in ids)
+    for pid in ids[:6]:
+        assert scorer.offer([pid], np.zeros((1, len(FEATURES))))
+    assert scorer.offer(ids[6:], np.zeros((4, len(FEATURES))))
+    scorer.stop()  # Puntúa lo pendiente
+
+    for pid in ids:
+        assert store.set_feedback(pid, 24.0)
+    metrics = store.shadow_metrics("2024-12-31")
+    assert set(metrics) == {candidate.run_id}
+    m = metrics[candidate.run_id]
+    assert m["n"] == 10 and np.isclose(m["rmse"], 4.0) and np.isclose(m["served_rmse"], 1.0)
+    assert store.shadow_metrics("2025-01-02") == {}
+
+    # Fuera de la fracción muestreada o con la cola llena no se encola nada
+    assert not ShadowScorer(candidate, store.add_shadow, fraction=0.0).offer(["x"], np.zeros((1, 13)))
+    full = ShadowScorer(candidate, store.add_shadow, max_pending=2)
+    assert not full.offer(["a", "b", "c"], np.zeros((3, 13)))
+    store.close()